@@ -1,12 +1,25 @@
 ﻿from flask import Flask
 from flask_cors import CORS
 from app.config import Config
+from app.blockchain_nft import SharedBlockchainNFT
+from app.diploma_index import DiplomaIndex
+from app.indexer import DiplomaIndexer
+from app.jobs import MintJobQueue
+from app.storage_backends import create_ipfs_service, FilesystemIPFSService
+from app.pin_index import get_pin_index
+from app.ipfs_cache import IPFSCache
+from app.uploads import DiplomaRequest
+from app.cli import pins_cli, students_cli
+from app.blockchain import BlockchainManager
 import os
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Fichiers uploadés écrits et hachés une seule fois pendant la réception
+    app.request_class = DiplomaRequest
+    
     CORS(app, resources={
         r"/*": {
             "origins": "*",
@@ -17,7 +30,70 @@ def create_app():
     
     os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
     
+    # Base des étudiants (import CSV/XLSX): créée ici, plus à l'import de app.blockchain
+    app.extensions['students'] = BlockchainManager(app.config['STUDENTS_DB_PATH'])
+    
     from app import routes
     app.register_blueprint(routes.bp)
     
+    # Client blockchain unique par processus (créé à la première utilisation)
+    blockchain = SharedBlockchainNFT({
+        'RPC_URL': app.config['RPC_URL'],
+        'CONTRACT_ADDRESS': app.config['CONTRACT_ADDRESS'],
+        'OWNER_PRIVATE_KEY': app.config['OWNER_PRIVATE_KEY'],
+        'CHAIN_ID': app.config['CHAIN_ID'],
+        'RPC_POOL_SIZE': app.config['RPC_POOL_SIZE'],
+        'DIPLOMA_CACHE_SIZE': app.config['DIPLOMA_CACHE_SIZE'],
+        'DIPLOMA_CACHE_TTL': app.config['DIPLOMA_CACHE_TTL']
+    })
+    app.extensions['blockchain_nft'] = blockchain
+    
+    # Index local des diplômes (SQLite), alimenté par les jobs et la blockchain
+    diploma_index = DiplomaIndex(app.config['DATA_DB_PATH'])
+    app.extensions['diploma_index'] = diploma_index
+    
+    indexer = DiplomaIndexer(
+        blockchain,
+        diploma_index,
+        start_block=app.config['INDEXER_START_BLOCK'],
+        chunk_size=app.config['INDEXER_CHUNK_SIZE']
+    )
+    # Les événements indexés invalident le cache des lectures du client
+    indexer.add_listener(lambda minted, revoked: blockchain.get().cache.on_events(minted, revoked))
+    # Sans indexeur actif, rien n'invalide ce cache: les lectures vont alors au contrat
+    blockchain.config['DIPLOMA_CACHE_LIVE'] = indexer.is_running
+    app.extensions['diploma_indexer'] = indexer
+    if app.config['INDEXER_ENABLED']:
+        indexer.start()
+    
+    # Service IPFS unique, partagé par les workers (backend choisi par IPFS_BACKEND)
+    ipfs_service = create_ipfs_service(app.config, pin_index=get_pin_index(app.config['DATA_DB_PATH']))
+    app.extensions['ipfs_service'] = ipfs_service
+    
+    # Cache disque des contenus IPFS (route /ipfs/<cid>)
+    ipfs_cache = IPFSCache(
+        app.config['IPFS_CACHE_DIR'],
+        app.config['IPFS_CACHE_MAX_BYTES'],
+        app.config['IPFS_GATEWAY_URL'],
+        max_object_size=app.config['MAX_FILE_SIZE'],
+        local_store=ipfs_service if isinstance(ipfs_service, FilesystemIPFSService) else None
+    )
+    app.extensions['ipfs_cache'] = ipfs_cache
+    
+    # File de jobs de minting (upload IPFS + blockchain en arrière-plan)
+    mint_jobs = MintJobQueue(
+        ipfs_service,
+        app.config['DATA_DB_PATH'],
+        blockchain,
+        max_workers=app.config['MINT_WORKERS'],
+        on_confirmed=diploma_index.record_issued,
+        ipfs_cache=ipfs_cache
+    )
+    mint_jobs.resume_pending()
+    app.extensions['mint_jobs'] = mint_jobs
+    
+    # Commandes d'administration (flask pins reconcile...)
+    app.cli.add_command(pins_cli)
+    app.cli.add_command(students_cli)
+    
     return app
@@ -1,7 +1,8 @@
 from flask import Flask, render_template, request, redirect, flash
-import json
-import os
+import atexit
+import threading
 from grading import get_mention
+from journal import StudentJournal
   
 
 app = Flask(__name__)
@@ -10,59 +11,76 @@ app.secret_key = "votre_cle_secrete_ici"  # Pour les messages flash
 # Fichier de persistance (optionnel, pour ne pas perdre les données)
 DATA_FILE = "etudiants.json"
 
+# Instantané + journal des ajouts/suppressions (cf. journal.py)
+journal = StudentJournal(DATA_FILE)
+atexit.register(journal.close)
+
 # --- BASE DE DONNÉES EN MÉMOIRE ---
-etudiants = []
+etudiants = journal.etudiants
 
-def charger_donnees():
-    """Charge les données depuis le fichier JSON si il existe"""
-    global etudiants
-    if os.path.exists(DATA_FILE):
-        try:
-            with open(DATA_FILE, 'r', encoding='utf-8') as f:
-                etudiants = json.load(f)
-            print(f"✓ {len(etudiants)} étudiants chargés")
-            # NOUVEAU : Recalcule mentions si manquantes (pour anciens JSON)
-            for etu in etudiants:
-                if 'mention' not in etu:
-                    etu['mention'] = get_mention(etu['moyenne'])
-            print("✓ Mentions recalculées pour les anciens étudiants")
-        except Exception as e:
-            print(f"Erreur chargement: {e}")
-            etudiants = []
-    else:
-        etudiants = []
+class StatistiquesCourantes:
+    """Totaux tenus à jour à chaque ajout/suppression (lecture en O(1))"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reinitialiser()
+
+    def reinitialiser(self):
+        with self._lock:
+            self.total = 0
+            self.somme = 0.0
+            self.reussis = 0
+            self.excellents = 0
+            self.mentions = {}
+
+    def reconstruire(self, liste):
+        """Recalcule les totaux en un seul passage (au chargement)"""
+        self.reinitialiser()
+        for etu in liste:
+            self.ajouter(etu)
+
+    def ajouter(self, etu, signe=1):
+        moyenne = etu["moyenne"]
+        with self._lock:
+            self.total += signe
+            self.somme += signe * moyenne
+            self.reussis += signe * (moyenne >= 10)
+            self.excellents += signe * (moyenne >= 16)
+            self.mentions[etu["mention"]] = self.mentions.get(etu["mention"], 0) + signe
+
+    def retirer(self, etu):
+        self.ajouter(etu, signe=-1)
 
-def sauvegarder_donnees():
-    """Sauvegarde les données dans un fichier JSON"""
+    def resume(self):
+        with self._lock:
+            return {
+                "total": self.total,
+                "moyenne_classe": self.somme / self.total if self.total > 0 else 0,
+                "reussis": self.reussis,
+                "excellents": self.excellents,
+                "mentions": {mention: n for mention, n in self.mentions.items() if n}
+            }
+
+stats_courantes = StatistiquesCourantes()
+
+def charger_donnees():
+    """Charge l'instantané JSON puis rejoue le journal des opérations"""
     try:
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
-            json.dump(etudiants, f, ensure_ascii=False, indent=2)
-        print("✓ Données sauvegardées")
+        journal.load()
+        print(f"✓ {len(etudiants)} étudiants chargés")
+        # NOUVEAU : Recalcule mentions si manquantes (pour anciens JSON)
+        for etu in etudiants:
+            if 'mention' not in etu:
+                etu['mention'] = get_mention(etu['moyenne'])
+        print("✓ Mentions recalculées pour les anciens étudiants")
     except Exception as e:
-        print(f"Erreur sauvegarde: {e}")
+        print(f"Erreur chargement: {e}")
+        etudiants.clear()
+    stats_courantes.reconstruire(etudiants)
 
 def calculer_statistiques():
-    """Calcule les statistiques des étudiants"""
-    if not etudiants:
-        return {
-            "total": 0,
-            "moyenne_classe": 0,
-            "reussis": 0,
-            "excellents": 0
-        }
-    
-    total = len(etudiants)
-    moyennes = [e["moyenne"] for e in etudiants]
-    moyenne_classe = sum(moyennes) / total if total > 0 else 0
-    reussis = sum(1 for m in moyennes if m >= 10)
-    excellents = sum(1 for m in moyennes if m >= 16)
-    
-    return {
-        "total": total,
-        "moyenne_classe": moyenne_classe,
-        "reussis": reussis,
-        "excellents": excellents
-    }
+    """Retourne les statistiques des étudiants (totaux courants, sans parcours)"""
+    return stats_courantes.resume()
 
 # Configuration fictive pour les templates
 config = {
@@ -97,7 +115,11 @@ def ajouter():
                 flash("Le nom et le prénom sont obligatoires", "danger")
                 return render_template("ajouter.html")
             
-            moyenne = float(moyenne_str)
+            try:
+                moyenne = float(moyenne_str)
+            except ValueError:
+                flash("Moyenne invalide. Veuillez entrer un nombre.", "danger")
+                return render_template("ajouter.html")
             
             if moyenne < 0 or moyenne > 20:
                 flash("La moyenne doit être entre 0 et 20", "danger")
@@ -106,25 +128,26 @@ def ajouter():
             # NOUVEAU : Calcule la mention
             mention = get_mention(moyenne)
             
-            # NOUVEAU : Ajout de l'étudiant avec TOUS les champs
-            etudiants.append({
+            # NOUVEAU : Ajout de l'étudiant avec TOUS les champs (journalisé)
+            etudiant = {
                 "adresse": adresse,
                 "nom": nom,
                 "prenom": prenom,
                 "date_naissance": date_naissance,
                 "moyenne": moyenne,
                 "mention": mention
-            })
-            
-            # Sauvegarde
-            sauvegarder_donnees()
+            }
+            try:
+                journal.add(etudiant)
+            except (OSError, ValueError) as e:
+                # Journal inaccessible (disque, fichier fermé): la saisie n'est pas en cause
+                flash(f"Erreur d'enregistrement de l'étudiant: {str(e)}", "danger")
+                return render_template("ajouter.html")
+            stats_courantes.ajouter(etudiant)
             
             flash(f"Étudiant {prenom} {nom} ajouté avec succès !", "success")
             return redirect("/liste")
             
-        except ValueError:
-            flash("Moyenne invalide. Veuillez entrer un nombre.", "danger")
-            return render_template("ajouter.html")
         except Exception as e:
             flash(f"Erreur lors de l'ajout: {str(e)}", "danger")
             return render_template("ajouter.html")
@@ -142,8 +165,8 @@ def supprimer(index):
     """Supprime un étudiant par son index"""
     try:
         if 0 <= index < len(etudiants):
-            etudiant = etudiants.pop(index)
-            sauvegarder_donnees()
+            etudiant = journal.delete(index)
+            stats_courantes.retirer(etudiant)
             flash(f"Étudiant {etudiant['prenom']} {etudiant['nom']} supprimé", "info")
         else:
             flash("Étudiant introuvable", "danger")
@@ -155,9 +178,8 @@ def supprimer(index):
 @app.route("/reinitialiser")
 def reinitialiser():
     """Réinitialise toutes les données"""
-    global etudiants
-    etudiants = []
-    sauvegarder_donnees()
+    journal.reset()
+    stats_courantes.reinitialiser()
     flash("Toutes les données ont été réinitialisées", "warning")
     return redirect("/")
 
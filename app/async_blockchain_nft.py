@@ -0,0 +1,257 @@
+import asyncio
+import json
+from pathlib import Path
+
+from hexbytes import HexBytes
+from web3 import AsyncWeb3, Web3
+
+from app.blockchain_nft import BlockchainNFT
+from app.fee_oracle import get_fee_oracle, get_gas_model
+from app.nonce_manager import get_nonce_manager, is_already_known, is_nonce_error
+from app.receipt_tracker import get_receipt_tracker
+
+
+class AsyncBlockchainNFT:
+    """
+    Variante asyncio de BlockchainNFT (AsyncHTTPProvider), mêmes dicts de résultat.
+
+    Une seule boucle d'événements garde des centaines de mints et de lectures
+    en vol; max_concurrency borne le nombre d'appels RPC simultanés. Les
+    receipts sont attendus via le tracker partagé (un batch par bloc).
+    """
+
+    # ABI de secours et traduction des erreurs identiques au client synchrone
+    _get_minimal_abi = BlockchainNFT._get_minimal_abi
+    _explain_error = BlockchainNFT._explain_error
+
+    def __init__(self, config, max_concurrency=50):
+        """
+        Args:
+            config: Mêmes clés que BlockchainNFT (RPC_URL, CONTRACT_ADDRESS...)
+            max_concurrency: Nombre maximal d'opérations en vol
+        """
+        self.rpc_url = config['RPC_URL']
+        self.contract_address = config['CONTRACT_ADDRESS']
+        self.owner_private_key = config['OWNER_PRIVATE_KEY']
+        self.chain_id = config['CHAIN_ID']
+
+        self.w3 = AsyncWeb3(AsyncWeb3.AsyncHTTPProvider(self.rpc_url, request_kwargs={'timeout': 30}))
+
+        # Charger ABI
+        abi_path = Path(__file__).parent.parent / 'contracts' / 'DiplomaNFT_ABI.json'
+        if abi_path.exists():
+            with open(abi_path, 'r') as f:
+                self.contract_abi = json.load(f)
+        else:
+            self.contract_abi = self._get_minimal_abi()
+
+        self.contract = self.w3.eth.contract(
+            address=Web3.to_checksum_address(self.contract_address),
+            abi=self.contract_abi
+        )
+
+        if not self.owner_private_key.startswith("0x"):
+            self.owner_private_key = "0x" + self.owner_private_key
+
+        self.owner_account = self.w3.eth.account.from_key(self.owner_private_key)
+
+        # Nonces, frais et suivi des receipts partagés avec le client synchrone du processus:
+        # leurs rares appels RPC (resynchronisation, feeHistory) passent par un thread
+        sync_w3 = Web3(Web3.HTTPProvider(self.rpc_url, request_kwargs={'timeout': 30}))
+        self.nonce_manager = get_nonce_manager(sync_w3, self.chain_id, self.owner_account.address)
+        self.receipt_tracker = get_receipt_tracker(self.rpc_url)
+        self.fee_oracle = get_fee_oracle(sync_w3, self.chain_id)
+        self.gas_model = get_gas_model(self.chain_id, self.contract_address)
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @classmethod
+    async def create(cls, config, max_concurrency=50):
+        """Construit le client et vérifie la connexion au RPC"""
+        client = cls(config, max_concurrency=max_concurrency)
+        if not await client.is_connected():
+            raise Exception("Impossible de se connecter au réseau Polygon Amoy (RPC).")
+        return client
+
+    # -------------------------------------------------------------------
+    # Mint NFT
+    # -------------------------------------------------------------------
+    async def mint_diploma(self, student_address, ipfs_uri, student_name, degree_type, institution,
+                           on_tx_sent=None):
+        try:
+            # Le sémaphore borne les appels RPC jusqu'à l'envoi; l'attente du receipt
+            # (tracker partagé) n'occupe pas de place
+            async with self._semaphore:
+                if not self.w3.is_address(student_address):
+                    return {'success': False, 'error': "Adresse étudiante invalide."}
+
+                call = self.contract.functions.mintDiploma(
+                    Web3.to_checksum_address(student_address),
+                    ipfs_uri,
+                    student_name,
+                    degree_type,
+                    institution
+                )
+
+                gas = await self.gas_model.gas_limit_async(
+                    call,
+                    [ipfs_uri, student_name, degree_type, institution],
+                    self.owner_account.address
+                )
+
+                tx = await call.build_transaction({
+                    "from": self.owner_account.address,
+                    "nonce": 0,
+                    "gas": gas,
+                    "chainId": self.chain_id,
+                    **await asyncio.to_thread(self.fee_oracle.fee_params)
+                })
+
+                tx_hash, nonce = await self._send_transaction(tx)
+
+            print(f"Transaction envoyée : {tx_hash.hex()}")
+
+            try:
+                # Permet aux jobs de mémoriser le hash avant la confirmation
+                if on_tx_sent:
+                    try:
+                        on_tx_sent(tx_hash.hex())
+                    except Exception as e:
+                        # Transaction diffusée quand même: elle sera minée, ne pas la dire échouée
+                        return {
+                            'success': False,
+                            'error': f'Transaction envoyée mais non enregistrée: {e}',
+                            'tx_hash': Web3.to_hex(tx_hash),
+                            'pending': True
+                        }
+                return await self.wait_for_mint(tx_hash)
+            finally:
+                self.nonce_manager.done(nonce)
+
+        except Exception as e:
+            return {"success": False, "error": self._explain_error(e)}
+
+    async def _send_transaction(self, tx, max_attempts=3):
+        """Signe et diffuse une transaction; retourne (tx_hash, nonce)"""
+        for attempt in range(max_attempts):
+            # allocate() ne touche le RPC qu'à la première synchronisation
+            nonce = await asyncio.to_thread(self.nonce_manager.allocate)
+            tx["nonce"] = nonce
+
+            try:
+                signed_txn = self.w3.eth.account.sign_transaction(tx, self.owner_private_key)
+                try:
+                    raw_tx = signed_txn.raw_transaction
+                except AttributeError:
+                    raw_tx = signed_txn.rawTransaction
+
+                return await self.w3.eth.send_raw_transaction(raw_tx), nonce
+
+            except Exception as e:
+                if is_already_known(e):
+                    # Même transaction signée déjà reçue par le nœud: elle est diffusée,
+                    # un nouvel envoi avec un autre nonce minterait le diplôme deux fois
+                    return HexBytes(signed_txn.hash), nonce
+                if is_nonce_error(e):
+                    self.nonce_manager.done(nonce)
+                    await asyncio.to_thread(self.nonce_manager.resync)
+                    if attempt < max_attempts - 1:
+                        print(f"⚠️ Nonce {nonce} refusé, nouvel essai...")
+                        continue
+                else:
+                    self.nonce_manager.release(nonce)
+                raise
+
+    async def wait_for_mint(self, tx_hash, timeout=300):
+        """Attend le receipt d'un mint et décode le Token ID"""
+        tx_hash = HexBytes(tx_hash)
+        try:
+            receipt = await self._wait_receipt(tx_hash, timeout)
+            if receipt is None:
+                print(f"⚠️ Timeout d'attente pour {Web3.to_hex(tx_hash)}")
+                return {
+                    'success': False,
+                    'error': 'Transaction envoyée mais pas encore confirmée. Vérifiez sur PolygonScan.',
+                    'tx_hash': Web3.to_hex(tx_hash),
+                    'pending': True
+                }
+            print(f"✅ Transaction confirmée dans le bloc {receipt['blockNumber']}")
+
+            if receipt['status'] != 1:
+                return {
+                    "success": False,
+                    "error": "Transaction échouée sur la blockchain",
+                    "tx_hash": Web3.to_hex(tx_hash)
+                }
+
+            token_id = None
+            try:
+                logs = self.contract.events.DiplomaMinted().process_receipt(receipt)
+                if logs:
+                    token_id = logs[0]["args"]["tokenId"]
+                    print(f"🎉 NFT créé avec Token ID: {token_id}")
+            except Exception as e:
+                print(f"⚠️ Impossible de décoder l'événement: {e}")
+
+            return {
+                "success": True,
+                "tx_hash": Web3.to_hex(tx_hash),
+                "token_id": token_id,
+                "gas_used": receipt['gasUsed'],
+                "block_number": receipt['blockNumber']
+            }
+
+        except Exception as e:
+            return {"success": False, "error": self._explain_error(e), "tx_hash": Web3.to_hex(tx_hash)}
+
+    async def _wait_receipt(self, tx_hash, timeout):
+        """Receipt via le tracker partagé (None au timeout), sans bloquer la boucle"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+
+        def resolve(receipt):
+            # Appelé depuis le thread du tracker
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(receipt))
+
+        self.receipt_tracker.track(tx_hash, callback=resolve, timeout=timeout)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    # -------------------------------------------------------------------
+    # Lectures
+    # -------------------------------------------------------------------
+    async def total_supply(self):
+        async with self._semaphore:
+            try:
+                return await self.contract.functions.totalSupply().call()
+            except Exception as e:
+                print(f"Erreur totalSupply: {e}")
+                return 0
+
+    async def get_diploma_info(self, token_id):
+        async with self._semaphore:
+            try:
+                info = await self.contract.functions.getDiplomaInfo(token_id).call()
+                return {
+                    "success": True,
+                    "student_name": info[0],
+                    "degree_type": info[1],
+                    "institution": info[2],
+                    "issue_date": info[3],
+                    "is_valid": info[4]
+                }
+            except Exception as e:
+                return {"success": False, "error": str(e)}
+
+    async def get_balance(self, address):
+        try:
+            bal = await self.w3.eth.get_balance(Web3.to_checksum_address(address))
+            return float(self.w3.from_wei(bal, "ether"))
+        except Exception as e:
+            print(f"Erreur get_balance: {e}")
+            return 0.0
+
+    async def is_connected(self):
+        return await self.w3.is_connected()
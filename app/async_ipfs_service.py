@@ -0,0 +1,316 @@
+import asyncio
+import json
+import time
+
+import aiohttp
+
+from app.cid import compute_cid, compute_file_cid, json_bytes
+from app.ipfs_service import PinnedResultMixin
+
+# Réponses Pinata qui justifient une nouvelle tentative
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class AsyncIPFSService(PinnedResultMixin):
+    """
+    Variante asyncio d'IPFSService (aiohttp), mêmes dicts de résultat.
+
+    Une seule session aiohttp garde ses connexions ouvertes; max_concurrency
+    borne le nombre de requêtes Pinata simultanées.
+    """
+
+    def __init__(self, api_key, secret_key, jwt, pin_index=None, max_concurrency=20,
+                 max_retries=3, backoff_factor=0.5):
+        """
+        Args:
+            api_key: Clé API Pinata
+            secret_key: Clé secrète Pinata
+            jwt: JWT Token Pinata
+            pin_index: Index local des contenus déjà épinglés (PinIndex, optionnel)
+            max_concurrency: Nombre maximal de requêtes Pinata en vol
+            max_retries: Nombre maximal de nouvelles tentatives (5xx, 429, erreurs réseau)
+            backoff_factor: Base de l'attente exponentielle entre deux tentatives (secondes)
+        """
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.jwt = jwt
+        self.pin_index = pin_index
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff_factor = backoff_factor
+        self.pinata_api_url = 'https://api.pinata.cloud/pinning/pinFileToIPFS'
+        self.pinata_json_url = 'https://api.pinata.cloud/pinning/pinJSONToIPFS'
+        self.gateway_url = 'https://gateway.pinata.cloud/ipfs/'
+        self._session = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def close(self):
+        """Ferme la session HTTP (à appeler avant de quitter la boucle)"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self):
+        # Créée dans la boucle d'événements qui l'utilise
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_concurrency),
+                headers={'Authorization': f'Bearer {self.jwt}'}
+            )
+        return self._session
+
+    # -------------------------------------------------------------------
+    # Requêtes avec nouvelles tentatives
+    # -------------------------------------------------------------------
+    async def _post(self, url, timeout, build_body):
+        """
+        POST vers Pinata avec backoff exponentiel (respecte Retry-After)
+
+        Args:
+            url: URL de l'API
+            timeout: Timeout total d'une tentative (secondes)
+            build_body: Fonction retournant les arguments du corps (data=/json=),
+                        rappelée à chaque tentative
+
+        Returns:
+            tuple: (code HTTP, texte de la réponse)
+        """
+        session = self._get_session()
+        for attempt in range(self.max_retries + 1):
+            delay = self.backoff_factor * (2 ** attempt)
+            try:
+                async with self._semaphore:
+                    with build_body() as body:
+                        async with session.post(url, timeout=aiohttp.ClientTimeout(total=timeout), **body) as response:
+                            text = await response.text()
+                            status = response.status
+                            retry_after = response.headers.get('Retry-After')
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == self.max_retries:
+                    raise
+                await asyncio.sleep(delay)
+                continue
+
+            if status not in RETRY_STATUSES or attempt == self.max_retries:
+                return status, text
+            if retry_after and retry_after.isdigit():
+                delay = int(retry_after)
+            await asyncio.sleep(delay)
+
+    def _pin_result(self, status, text):
+        """Convertit une réponse Pinata en dict de résultat"""
+        if status == 200:
+            result = json.loads(text)
+            return self._result(result['IpfsHash'], result.get('PinSize', 0), result.get('Timestamp', ''))
+
+        error_message = text
+        try:
+            error_message = json.loads(text).get('error', {}).get('details', error_message)
+        except Exception:
+            pass
+        return {
+            'success': False,
+            'error': f'Erreur Pinata ({status}): {error_message}'
+        }
+
+    # -------------------------------------------------------------------
+    # Uploads
+    # -------------------------------------------------------------------
+    async def upload_file(self, file_path, file_name, cid=None):
+        """
+        Upload un fichier sur IPFS via Pinata (lu par blocs depuis le disque)
+
+        Args:
+            file_path: Chemin du fichier à uploader
+            file_name: Nom du fichier
+            cid: CID déjà calculé localement (évite une relecture du fichier)
+
+        Returns:
+            dict: Résultat de l'upload
+        """
+        try:
+            local_cid = None
+            if self.pin_index is not None:
+                local_cid = cid or await asyncio.to_thread(compute_file_cid, file_path)
+                pinned = await asyncio.to_thread(self._find_pinned, local_cid)
+                if pinned:
+                    return pinned
+
+            pinata_metadata = json.dumps({
+                'name': file_name,
+                'keyvalues': {
+                    'type': 'diploma',
+                    'uploaded_at': str(int(time.time()))
+                }
+            })
+
+            def build_body():
+                return _FileForm(file_path, file_name, {
+                    'pinataMetadata': pinata_metadata,
+                    'pinataOptions': json.dumps({'cidVersion': 1})
+                })
+
+            status, text = await self._post(self.pinata_api_url, 120, build_body)
+            upload_result = self._pin_result(status, text)
+            if upload_result['success'] and local_cid:
+                await asyncio.to_thread(self.pin_index.add, local_cid, upload_result, file_name, 'diploma')
+            return upload_result
+
+        except asyncio.TimeoutError:
+            return {
+                'success': False,
+                'error': 'Timeout lors de l\'upload sur IPFS. Le fichier est peut-être trop volumineux.'
+            }
+        except aiohttp.ClientError as e:
+            return {
+                'success': False,
+                'error': f'Erreur de connexion à Pinata: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Erreur lors de l\'upload du fichier: {str(e)}'
+            }
+
+    async def upload_metadata(self, metadata):
+        """
+        Upload des métadonnées JSON sur IPFS via Pinata
+
+        Args:
+            metadata: Dictionnaire de métadonnées
+
+        Returns:
+            dict: Résultat de l'upload
+        """
+        try:
+            local_cid = None
+            if self.pin_index is not None:
+                local_cid = compute_cid(json_bytes(metadata))
+                pinned = await asyncio.to_thread(self._find_pinned, local_cid)
+                if pinned:
+                    return pinned
+
+            data = {
+                'pinataContent': metadata,
+                'pinataMetadata': {
+                    'name': f"metadata_{metadata.get('name', 'unknown')}",
+                    'keyvalues': {
+                        'type': 'diploma_metadata',
+                        'student': metadata.get('name', ''),
+                        'uploaded_at': str(int(time.time()))
+                    }
+                },
+                'pinataOptions': {
+                    'cidVersion': 1
+                }
+            }
+
+            status, text = await self._post(self.pinata_json_url, 60, lambda: _JSONBody(data))
+            upload_result = self._pin_result(status, text)
+            if upload_result['success'] and local_cid:
+                await asyncio.to_thread(
+                    self.pin_index.add, local_cid, upload_result,
+                    data['pinataMetadata']['name'], 'diploma_metadata'
+                )
+            return upload_result
+
+        except asyncio.TimeoutError:
+            return {
+                'success': False,
+                'error': 'Timeout lors de l\'upload des métadonnées sur IPFS.'
+            }
+        except aiohttp.ClientError as e:
+            return {
+                'success': False,
+                'error': f'Erreur de connexion à Pinata: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Erreur lors de l\'upload des métadonnées: {str(e)}'
+            }
+
+    async def pin_diploma_bundle(self, pdf_path, pdf_name, metadata_template, pdf_cid=None):
+        """
+        Épingler le PDF d'un diplôme et ses métadonnées en parallèle
+        (voir IPFSService.pin_diploma_bundle)
+
+        Returns:
+            dict: Résultats des deux uploads ('pdf' et 'metadata')
+        """
+        try:
+            local_cid = pdf_cid or await asyncio.to_thread(compute_file_cid, pdf_path)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Échec de l\'upload IPFS: {str(e)}'
+            }
+
+        metadata = metadata_template(f'{self.gateway_url}{local_cid}')
+        pdf_result, metadata_result = await asyncio.gather(
+            self.upload_file(pdf_path, pdf_name, cid=local_cid),
+            self.upload_metadata(metadata)
+        )
+
+        if not pdf_result['success']:
+            return {
+                'success': False,
+                'error': f"Échec de l'upload IPFS: {pdf_result.get('error', 'Erreur inconnue')}"
+            }
+
+        if pdf_result['ipfs_hash'] != local_cid:
+            print(f"⚠️ CID inattendu pour {pdf_name}: {pdf_result['ipfs_hash']} (attendu {local_cid})")
+            metadata_result = await self.upload_metadata(metadata_template(pdf_result['url']))
+
+        if not metadata_result['success']:
+            return {
+                'success': False,
+                'error': f"Échec de l'upload des métadonnées: {metadata_result.get('error', 'Erreur inconnue')}"
+            }
+
+        return {
+            'success': True,
+            'pdf': pdf_result,
+            'metadata': metadata_result
+        }
+
+
+class _FileForm:
+    """Formulaire multipart d'une tentative: le fichier est rouvert puis refermé"""
+
+    def __init__(self, file_path, file_name, fields):
+        self.file_path = file_path
+        self.file_name = file_name
+        self.fields = fields
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.file_path, 'rb')
+        form = aiohttp.FormData()
+        for name, value in self.fields.items():
+            form.add_field(name, value)
+        form.add_field('file', self._file, filename=self.file_name,
+                       content_type='application/octet-stream')
+        return {'data': form}
+
+    def __exit__(self, *exc):
+        self._file.close()
+
+
+class _JSONBody:
+    """Corps JSON d'une tentative"""
+
+    def __init__(self, data):
+        self.data = data
+
+    def __enter__(self):
+        return {'json': self.data}
+
+    def __exit__(self, *exc):
+        pass
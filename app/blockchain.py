@@ -11,11 +11,52 @@ if USE_BLOCKCHAIN:
 
 else:
     import sqlite3
+    import threading
 
-    DB_PATH = os.path.join(os.path.dirname(__file__), "..", "students.db")
+    DB_PATH = os.getenv('STUDENTS_DB_PATH', os.path.join(os.path.dirname(__file__), "..", "students.db"))
 
-    def init_db():
-        conn = sqlite3.connect(DB_PATH)
+    # Une connexion par thread et par base, ouverte une seule fois: les requêtes
+    # préparées restent dans le cache de la connexion d'un appel à l'autre
+    _local = threading.local()
+
+    # Colonnes explicites: la base peut avoir une colonne mention (add_mention_column.py)
+    INSERT_STUDENT = ("INSERT INTO students (adresse, nom, prenom, dateNaissance, moyenne) "
+                      "VALUES (?, ?, ?, ?, ?)")
+    IMPORT_STUDENT = ("INSERT INTO students (adresse, nom, prenom, dateNaissance, moyenne, mention, email) "
+                      "VALUES (?, ?, ?, ?, ?, ?, ?)")
+
+    def get_connection(db_path=None):
+        """
+        Connexion du thread courant à la base des étudiants
+
+        Args:
+            db_path: Chemin de la base (par défaut STUDENTS_DB_PATH ou students.db)
+        """
+        path = db_path or DB_PATH
+        conns = getattr(_local, 'conns', None)
+        if conns is None:
+            conns = _local.conns = {}
+        conn = conns.get(path)
+        if conn is None:
+            conn = sqlite3.connect(path, timeout=30, cached_statements=256)
+            # WAL: les lectures ne bloquent plus les écritures (et inversement)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA cache_size=-20000")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conns[path] = conn
+        return conn
+
+    def init_db(db_path=None):
+        """
+        Crée (ou met à niveau) la base des étudiants
+
+        Appelée par BlockchainManager (donc par create_app), plus à l'import du module.
+
+        Args:
+            db_path: Chemin de la base (par défaut STUDENTS_DB_PATH ou students.db)
+        """
+        conn = get_connection(db_path)
         c = conn.cursor()
         c.execute('''
             CREATE TABLE IF NOT EXISTS students (
@@ -26,18 +67,78 @@ else:
                 moyenne REAL
             )
         ''')
+        # Colonnes renseignées par l'import CSV/XLSX (mention: cf. add_mention_column.py)
+        columns = [row[1] for row in c.execute("PRAGMA table_info(students)")]
+        for column in ('mention', 'email'):
+            if column not in columns:
+                c.execute(f"ALTER TABLE students ADD COLUMN {column} TEXT")
+        # Doublons de l'import cherchés sans tenir compte de la casse (adresses checksum ou non)
+        c.execute("CREATE INDEX IF NOT EXISTS idx_students_adresse_lower ON students (lower(adresse))")
         conn.commit()
-        conn.close()
+        init_stats(conn)
+
+    # Compteurs tenus par colonne: (nom, condition sur la moyenne)
+    STATS_COUNTERS = [
+        ('reussis', '{m} >= 10'),
+        ('excellents', '{m} >= 16'),
+        ('passable', '{m} < 10'),
+        ('assez_bien', '{m} >= 10 AND {m} < 12'),
+        ('bien', '{m} >= 12 AND {m} < 14'),
+        ('tres_bien', '{m} >= 14 AND {m} < 16'),
+        ('excellent', '{m} >= 16'),
+    ]
 
-    init_db()
+    def _stats_delta(sign, m):
+        """SET incrémentant (+) ou décrémentant (-) les compteurs pour la moyenne m"""
+        columns = [f"total = total {sign} 1", f"somme = somme {sign} COALESCE({m}, 0)"]
+        columns += [f"{name} = {name} {sign} COALESCE({cond.format(m=m)}, 0)" for name, cond in STATS_COUNTERS]
+        return ', '.join(columns)
+
+    def init_stats(conn):
+        """
+        Table de synthèse d'une ligne tenue à jour par triggers: les statistiques
+        se lisent en O(1) quelle que soit la taille de la promotion
+        """
+        counters = ', '.join(f"{name} INTEGER NOT NULL" for name, _ in STATS_COUNTERS)
+        sums = ', '.join(f"COALESCE(SUM(CASE WHEN {cond.format(m='moyenne')} THEN 1 ELSE 0 END), 0)"
+                         for _, cond in STATS_COUNTERS)
+        conn.executescript(f'''
+            BEGIN;
+            CREATE TABLE IF NOT EXISTS students_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total INTEGER NOT NULL,
+                somme REAL NOT NULL,
+                {counters}
+            );
+            -- Première création (ou base existante): calcul initial en SQL
+            INSERT OR IGNORE INTO students_stats
+                SELECT 1, COUNT(*), COALESCE(SUM(moyenne), 0), {sums} FROM students;
+            CREATE TRIGGER IF NOT EXISTS students_stats_insert AFTER INSERT ON students
+            BEGIN
+                UPDATE students_stats SET {_stats_delta('+', 'NEW.moyenne')} WHERE id = 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS students_stats_delete AFTER DELETE ON students
+            BEGIN
+                UPDATE students_stats SET {_stats_delta('-', 'OLD.moyenne')} WHERE id = 1;
+            END;
+            CREATE TRIGGER IF NOT EXISTS students_stats_update AFTER UPDATE OF moyenne ON students
+            BEGIN
+                UPDATE students_stats SET {_stats_delta('-', 'OLD.moyenne')} WHERE id = 1;
+                UPDATE students_stats SET {_stats_delta('+', 'NEW.moyenne')} WHERE id = 1;
+            END;
+            COMMIT;
+        ''')
 
     class BlockchainManager:
+        def __init__(self, db_path=None):
+            # Chemin propre à l'instance: deux gestionnaires peuvent viser deux bases
+            self.db_path = db_path or DB_PATH
+            init_db(self.db_path)
+
         def get_all_students(self):
-            conn = sqlite3.connect(DB_PATH)
-            c = conn.cursor()
+            c = get_connection(self.db_path).cursor()
             c.execute("SELECT adresse, nom, prenom, dateNaissance, moyenne FROM students")
             rows = c.fetchall()
-            conn.close()
             return [
                 {"adresse": r[0], "nom": r[1], "prenom": r[2],
                  "dateNaissance": r[3], "moyenneGenerale": float(r[4])}
@@ -45,55 +146,82 @@ else:
             ]
 
         def add_student(self, adresse, nom, prenom, dateNaissance, moyenne):
-            conn = sqlite3.connect(DB_PATH)
-            c = conn.cursor()
+            conn = get_connection(self.db_path)
             try:
-                c.execute("INSERT INTO students VALUES (?, ?, ?, ?, ?)",
-                          (adresse, nom, prenom, dateNaissance, float(moyenne)))
-                conn.commit()
+                with conn:
+                    conn.execute(INSERT_STUDENT,
+                                 (adresse, nom, prenom, dateNaissance, float(moyenne)))
                 print(f"Étudiant {nom} {prenom} ajouté en local !")
             except sqlite3.IntegrityError:
                 raise ValueError("Cette adresse existe déjà")
-            finally:
-                conn.close()
             return type('obj', (object,), {'transactionHash': {'hex': lambda: '0xLOCAL123'}})()
 
+        def add_students(self, students):
+            """
+            Ajoute une liste d'étudiants en une seule transaction
+
+            Args:
+                students: dicts avec adresse, nom, prenom, dateNaissance, moyenne
+
+            Returns:
+                int: Nombre d'étudiants ajoutés (aucun si une adresse existe déjà)
+            """
+            rows = [
+                (s["adresse"], s["nom"], s["prenom"], s["dateNaissance"], float(s["moyenne"]))
+                for s in students
+            ]
+            conn = get_connection(self.db_path)
+            try:
+                with conn:
+                    conn.executemany(INSERT_STUDENT, rows)
+                print(f"{len(rows)} étudiants ajoutés en local !")
+            except sqlite3.IntegrityError as e:
+                raise ValueError(f"Import annulé, adresse en double: {e}")
+            return len(rows)
+
         def get_statistics(self):
-            students = self.get_all_students()
-            total = len(students)
-            if total == 0:
-                return {'total': 0, 'moyenne_generale': 0.0, 'reussis': 0, 'excellents': 0,
-                        'mentions': {'Passable':0, 'AssezBien':0, 'Bien':0, 'TresBien':0, 'Excellent':0}}
-
-            moyenne = sum(s["moyenneGenerale"] for s in students) / total
-            reussis = sum(1 for s in students if s["moyenneGenerale"] >= 10)
-            excellents = sum(1 for s in students if s["moyenneGenerale"] >= 16)
-
-            def mention(m):
-                if m < 10: return "Passable"
-                elif m < 12: return "AssezBien"
-                elif m < 14: return "Bien"
-                elif m < 16: return "TresBien"
-                else: return "Excellent"
-
-            mentions = {"Passable":0, "AssezBien":0, "Bien":0, "TresBien":0, "Excellent":0}
-            for s in students:
-                mentions[mention(s["moyenneGenerale"])] += 1
+            row = get_connection(self.db_path).execute(
+                "SELECT total, somme, reussis, excellents, passable, assez_bien, bien, tres_bien, excellent "
+                "FROM students_stats WHERE id = 1"
+            ).fetchone()
+            total, somme, reussis, excellents = row[:4]
+            mentions = dict(zip(["Passable", "AssezBien", "Bien", "TresBien", "Excellent"], row[4:]))
 
             return {
                 'total': total,
-                'moyenne_generale': round(moyenne, 2),
+                'moyenne_generale': round(somme / total, 2) if total else 0.0,
                 'reussis': reussis,
                 'excellents': excellents,
                 'mentions': mentions
             }
 
+        def page_students(self, after=None, limit=50):
+            """
+            Une page d'étudiants (import CSV/XLSX compris), triés par adresse
+
+            Args:
+                after: Adresse du dernier étudiant de la page précédente (None: première page)
+                limit: Nombre d'étudiants par page
+
+            Returns:
+                tuple: (étudiants, adresse à passer en after pour la page suivante ou None)
+            """
+            rows = get_connection(self.db_path).execute(
+                "SELECT adresse, nom, prenom, dateNaissance, moyenne, mention, email FROM students "
+                "WHERE adresse > ? ORDER BY adresse LIMIT ?",
+                (after or '', limit + 1)
+            ).fetchall()
+            students = [
+                {"adresse": r[0], "nom": r[1], "prenom": r[2], "dateNaissance": r[3],
+                 "moyenneGenerale": float(r[4]), "mention": r[5], "email": r[6]}
+                for r in rows[:limit]
+            ]
+            return students, (students[-1]["adresse"] if len(rows) > limit else None)
+
         def get_student(self, adresse):
-            conn = sqlite3.connect(DB_PATH)
-            c = conn.cursor()
+            c = get_connection(self.db_path).cursor()
             c.execute("SELECT * FROM students WHERE adresse = ?", (adresse,))
             row = c.fetchone()
-            conn.close()
             if row:
                 return {"adresse": row[0], "nom": row[1], "prenom": row[2],
                         "dateNaissance": row[3], "moyenneGenerale": float(row[4])}
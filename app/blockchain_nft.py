@@ -1,6 +1,78 @@
 ﻿from web3 import Web3
+from web3.logs import DISCARD
+from hexbytes import HexBytes
 import json
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
 from pathlib import Path
+from app.nonce_manager import get_nonce_manager, is_already_known, is_nonce_error
+from app.receipt_tracker import get_receipt_tracker
+from app.fee_oracle import get_fee_oracle, get_gas_model
+from app.rpc import batch_request
+from app.diploma_cache import DiplomaCache
+from eth_abi import decode
+
+# Multicall3 est déployé à la même adresse sur la plupart des chaînes EVM
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+MULTICALL3_ABI = [
+    {
+        "inputs": [
+            {
+                "components": [
+                    {"internalType": "address", "name": "target", "type": "address"},
+                    {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+                    {"internalType": "bytes", "name": "callData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Call3[]",
+                "name": "calls",
+                "type": "tuple[]"
+            }
+        ],
+        "name": "aggregate3",
+        "outputs": [
+            {
+                "components": [
+                    {"internalType": "bool", "name": "success", "type": "bool"},
+                    {"internalType": "bytes", "name": "returnData", "type": "bytes"}
+                ],
+                "internalType": "struct Multicall3.Result[]",
+                "name": "returnData",
+                "type": "tuple[]"
+            }
+        ],
+        "stateMutability": "payable",
+        "type": "function"
+    }
+]
+
+
+def _decode_revert(data):
+    """Extrait le message d'un revert Error(string)"""
+    if data[:4] == bytes.fromhex('08c379a0'):
+        try:
+            return decode(['string'], data[4:])[0]
+        except Exception:
+            pass
+    return 'Appel rejeté par le contrat'
+
+class SharedBlockchainNFT:
+    """Client BlockchainNFT unique par processus, créé au premier usage"""
+
+    def __init__(self, config):
+        self.config = config
+        self._client = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        """Retourne le client partagé (connexion, ABI et compte chargés une seule fois)"""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = BlockchainNFT(self.config)
+        return self._client
+
 
 class BlockchainNFT:
     """Gestionnaire de la blockchain pour les NFT diplômes"""
@@ -11,8 +83,13 @@ class BlockchainNFT:
         self.owner_private_key = config['OWNER_PRIVATE_KEY']
         self.chain_id = config['CHAIN_ID']
 
-        # Connexion Web3
-        self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+        # Connexion Web3 sur une session HTTP keep-alive partagée entre threads
+        pool_size = config.get('RPC_POOL_SIZE', 10)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.w3 = Web3(Web3.HTTPProvider(self.rpc_url, session=self.session, request_kwargs={'timeout': 30}))
 
         if not self.w3.is_connected():
             raise Exception("Impossible de se connecter au réseau Polygon Amoy (RPC).")
@@ -37,6 +114,22 @@ class BlockchainNFT:
 
         self.owner_account = self.w3.eth.account.from_key(self.owner_private_key)
 
+        # Nonces et suivi des receipts partagés par tout le processus
+        self.nonce_manager = get_nonce_manager(self.w3, self.chain_id, self.owner_account.address)
+        self.receipt_tracker = get_receipt_tracker(self.rpc_url, session=self.session)
+        self.fee_oracle = get_fee_oracle(self.w3, self.chain_id)
+        self.gas_model = get_gas_model(self.chain_id, self.contract_address)
+        self._multicall_available = None
+
+        # Cache des lectures (invalidé par les événements observés, contourné sans indexeur)
+        self.cache = DiplomaCache(
+            config.get('DIPLOMA_CACHE_SIZE', 10000),
+            ttl=config.get('DIPLOMA_CACHE_TTL', 300),
+            live=config.get('DIPLOMA_CACHE_LIVE')
+        )
+        self._head = None
+        self._head_lock = threading.Lock()
+
     # -------------------------------------------------------------------
     # ABI minimal fallback
     # -------------------------------------------------------------------
@@ -55,6 +148,19 @@ class BlockchainNFT:
                 "stateMutability": "nonpayable",
                 "type": "function"
             },
+            {
+                "inputs": [
+                    {"internalType": "address[]", "name": "studentAddresses", "type": "address[]"},
+                    {"internalType": "string[]", "name": "tokenURIs", "type": "string[]"},
+                    {"internalType": "string[]", "name": "studentNames", "type": "string[]"},
+                    {"internalType": "string[]", "name": "degreeTypes", "type": "string[]"},
+                    {"internalType": "string[]", "name": "institutions", "type": "string[]"}
+                ],
+                "name": "batchMintDiploma",
+                "outputs": [{"internalType": "uint256[]", "name": "", "type": "uint256[]"}],
+                "stateMutability": "nonpayable",
+                "type": "function"
+            },
             {
                 "inputs": [{"internalType": "uint256", "name": "tokenId", "type": "uint256"}],
                 "name": "getDiplomaInfo",
@@ -75,6 +181,13 @@ class BlockchainNFT:
                 "stateMutability": "view",
                 "type": "function"
             },
+            {
+                "inputs": [{"internalType": "uint256", "name": "tokenId", "type": "uint256"}],
+                "name": "tokenURI",
+                "outputs": [{"internalType": "string", "name": "", "type": "string"}],
+                "stateMutability": "view",
+                "type": "function"
+            },
             {
                 "anonymous": False,
                 "inputs": [
@@ -84,87 +197,262 @@ class BlockchainNFT:
                 ],
                 "name": "DiplomaMinted",
                 "type": "event"
+            },
+            {
+                "anonymous": False,
+                "inputs": [
+                    {"indexed": True, "internalType": "uint256", "name": "tokenId", "type": "uint256"}
+                ],
+                "name": "DiplomaRevoked",
+                "type": "event"
             }
         ]
 
     # -------------------------------------------------------------------
     # Mint NFT - VERSION CORRIGÉE
     # -------------------------------------------------------------------
-    def mint_diploma(self, student_address, ipfs_uri, student_name, degree_type, institution):
+    def mint_diploma(self, student_address, ipfs_uri, student_name, degree_type, institution,
+                     on_tx_sent=None):
         try:
             if not self.w3.is_address(student_address):
                 return {'success': False, 'error': "Adresse étudiante invalide."}
 
-            nonce = self.w3.eth.get_transaction_count(self.owner_account.address)
-
-            # -------------------------------------------------------------------
-            # EIP-1559 — FIX SPÉCIAL POLYGON AMOY
-            # -------------------------------------------------------------------
-            base_fee = self.w3.eth.gas_price  # ~30 Gwei
-            min_priority_fee = self.w3.to_wei(30, "gwei")  # REQUIRED: >= 25 Gwei
-            max_fee = base_fee + self.w3.to_wei(50, "gwei")  # Base + 50 Gwei
-
-            # Construire la transaction
-            tx = self.contract.functions.mintDiploma(
+            call = self.contract.functions.mintDiploma(
                 Web3.to_checksum_address(student_address),
                 ipfs_uri,
                 student_name,
                 degree_type,
                 institution
-            ).build_transaction({
+            )
+
+            # Gas limit estimé une fois par taille de payload
+            gas = self.gas_model.gas_limit(
+                call,
+                [ipfs_uri, student_name, degree_type, institution],
+                self.owner_account.address
+            )
+
+            # Construire la transaction (le nonce est ajouté à l'envoi)
+            tx = call.build_transaction({
                 "from": self.owner_account.address,
-                "nonce": nonce,
-                "gas": 500000,
-                "maxPriorityFeePerGas": min_priority_fee,
-                "maxFeePerGas": max_fee,
-                "chainId": self.chain_id
+                "nonce": 0,
+                "gas": gas,
+                "chainId": self.chain_id,
+                **self._fee_params()
             })
 
-            # SIGNER — Web3.py 6.x
-            signed_txn = self.w3.eth.account.sign_transaction(tx, self.owner_private_key)
-
-            # FIX CRITIQUE: Pour Web3.py 6.x, utilisez raw_transaction (pas rawTransaction)
-            # Mais vérifier la version et utiliser la bonne propriété
-            try:
-                raw_tx = signed_txn.raw_transaction
-            except AttributeError:
-                raw_tx = signed_txn.rawTransaction
-            
-            tx_hash = self.w3.eth.send_raw_transaction(raw_tx)
+            tx_hash, nonce = self._send_transaction(tx)
 
             print(f"Transaction envoyée : {tx_hash.hex()}")
-            print("⏳ Attente de confirmation...")
 
-            # Augmenter le timeout à 300 secondes (5 minutes)
             try:
-                receipt = self.w3.eth.wait_for_transaction_receipt(tx_hash, timeout=300)
-                print(f"✅ Transaction confirmée dans le bloc {receipt['blockNumber']}")
-            except Exception as timeout_error:
-                print(f"⚠️ Timeout d'attente, vérification du statut...")
-                # Essayer de récupérer le receipt quand même
-                try:
-                    receipt = self.w3.eth.get_transaction_receipt(tx_hash)
-                    if not receipt:
+                # Permet aux jobs de mémoriser le hash avant la confirmation
+                if on_tx_sent:
+                    try:
+                        on_tx_sent(tx_hash.hex())
+                    except Exception as e:
+                        # Transaction diffusée quand même: elle sera minée, ne pas la dire échouée
                         return {
                             'success': False,
-                            'error': f'Transaction envoyée mais pas encore confirmée. Vérifiez sur PolygonScan.',
-                            'tx_hash': tx_hash.hex(),
+                            'error': f'Transaction envoyée mais non enregistrée: {e}',
+                            'tx_hash': Web3.to_hex(tx_hash),
                             'pending': True
                         }
-                except:
-                    return {
-                        'success': False,
-                        'error': f'Transaction envoyée mais confirmation impossible. Hash: {tx_hash.hex()}',
-                        'tx_hash': tx_hash.hex(),
-                        'pending': True
+                return self.wait_for_mint(tx_hash)
+            finally:
+                # Même si le callback échoue: la transaction est diffusée, le nonce est consommé
+                self.nonce_manager.done(nonce)
+
+        except Exception as e:
+            return {"success": False, "error": self._explain_error(e)}
+
+    # -------------------------------------------------------------------
+    # Mint par lots (batchMintDiploma)
+    # -------------------------------------------------------------------
+    def mint_batch(self, diplomas, max_per_tx=100, block_gas_fraction=0.5):
+        """
+        Minter une promotion entière avec batchMintDiploma
+
+        Args:
+            diplomas: Liste de dicts (student_address, ipfs_uri, student_name,
+                      degree_type, institution)
+            max_per_tx: Nombre maximal de diplômes par transaction
+            block_gas_fraction: Part maximale du gas limit d'un bloc par transaction
+
+        Returns:
+            dict: Résultat global et un résultat par diplôme (dans l'ordre)
+        """
+        try:
+            results = [None] * len(diplomas)
+            valid = []
+            for index, diploma in enumerate(diplomas):
+                if self.w3.is_address(diploma['student_address']):
+                    valid.append(index)
+                else:
+                    results[index] = {'success': False, 'error': "Adresse étudiante invalide."}
+
+            block_gas_limit = self.w3.eth.get_block('latest')['gasLimit']
+            gas_budget = int(block_gas_limit * block_gas_fraction)
+
+            # 1. Découper la promotion en lots qui tiennent dans un bloc
+            chunks = []
+            position = 0
+            chunk_size = max_per_tx
+            while position < len(valid):
+                indexes = valid[position:position + chunk_size]
+                call = self._batch_call([diplomas[i] for i in indexes])
+                gas = call.estimate_gas({"from": self.owner_account.address})
+                if gas > gas_budget and len(indexes) > 1:
+                    chunk_size = max(1, len(indexes) // 2)
+                    continue
+                chunks.append((indexes, call, min(int(gas * 1.2), gas_budget)))
+                position += len(indexes)
+
+            # 2. Envoyer tous les lots: les nonces locaux permettent de les garder en vol
+            sent = []
+            for indexes, call, gas in chunks:
+                tx = call.build_transaction({
+                    "from": self.owner_account.address,
+                    "nonce": 0,
+                    "gas": gas,
+                    "chainId": self.chain_id,
+                    **self._fee_params()
+                })
+                try:
+                    tx_hash, nonce = self._send_transaction(tx)
+                    print(f"Lot de {len(indexes)} diplômes envoyé : {tx_hash.hex()}")
+                    sent.append((indexes, tx_hash, nonce))
+                except Exception as e:
+                    error = self._explain_error(e)
+                    for i in indexes:
+                        results[i] = {'success': False, 'error': error}
+
+            # 3. Attendre les receipts et décoder chaque DiplomaMinted
+            tracked = [(indexes, tx_hash, nonce, self.receipt_tracker.track(tx_hash))
+                       for indexes, tx_hash, nonce in sent]
+            total_gas = 0
+            for indexes, tx_hash, nonce, entry in tracked:
+                entry.done.wait(300)
+                receipt = entry.receipt
+                self.nonce_manager.done(nonce)
+
+                tx_hex = Web3.to_hex(tx_hash)
+                if receipt is None or receipt['status'] != 1:
+                    error = ('Transaction envoyée mais pas encore confirmée. Vérifiez sur PolygonScan.'
+                             if receipt is None else 'Transaction échouée sur la blockchain')
+                    for i in indexes:
+                        results[i] = {'success': False, 'error': error, 'tx_hash': tx_hex,
+                                      'pending': receipt is None}
+                    continue
+
+                total_gas += receipt['gasUsed']
+                self.cache.invalidate_total_supply()
+                events = self.contract.events.DiplomaMinted().process_receipt(receipt, errors=DISCARD)
+                if len(events) != len(indexes):
+                    print(f"⚠️ {len(events)} événements DiplomaMinted pour {len(indexes)} diplômes")
+                for i in indexes[len(events):]:
+                    results[i] = {'success': False, 'error': "Impossible de décoder l'événement",
+                                  'tx_hash': tx_hex}
+                for i, event in zip(indexes, events):
+                    results[i] = {
+                        'success': True,
+                        'token_id': event['args']['tokenId'],
+                        'tx_hash': tx_hex,
+                        'block_number': receipt['blockNumber']
                     }
+                print(f"✅ Lot confirmé dans le bloc {receipt['blockNumber']} ({len(events)} NFT)")
+
+            return {
+                'success': all(r['success'] for r in results),
+                'minted': sum(1 for r in results if r['success']),
+                'transactions': len(sent),
+                'gas_used': total_gas,
+                'results': results
+            }
+
+        except Exception as e:
+            return {"success": False, "error": self._explain_error(e)}
+
+    def _batch_call(self, diplomas):
+        return self.contract.functions.batchMintDiploma(
+            [Web3.to_checksum_address(d['student_address']) for d in diplomas],
+            [d['ipfs_uri'] for d in diplomas],
+            [d['student_name'] for d in diplomas],
+            [d['degree_type'] for d in diplomas],
+            [d['institution'] for d in diplomas]
+        )
+
+    # -------------------------------------------------------------------
+    # EIP-1559 — frais calculés par l'oracle partagé (eth_feeHistory)
+    # -------------------------------------------------------------------
+    def _fee_params(self):
+        return self.fee_oracle.fee_params()
+
+    # -------------------------------------------------------------------
+    # Signature et envoi avec un nonce alloué localement
+    # -------------------------------------------------------------------
+    def _send_transaction(self, tx, max_attempts=3):
+        """Signe et diffuse une transaction; retourne (tx_hash, nonce)"""
+        for attempt in range(max_attempts):
+            nonce = self.nonce_manager.allocate()
+            tx["nonce"] = nonce
+
+            try:
+                # SIGNER — Web3.py 6.x
+                signed_txn = self.w3.eth.account.sign_transaction(tx, self.owner_private_key)
+
+                # FIX CRITIQUE: Pour Web3.py 6.x, utilisez raw_transaction (pas rawTransaction)
+                # Mais vérifier la version et utiliser la bonne propriété
+                try:
+                    raw_tx = signed_txn.raw_transaction
+                except AttributeError:
+                    raw_tx = signed_txn.rawTransaction
+
+                return self.w3.eth.send_raw_transaction(raw_tx), nonce
+
+            except Exception as e:
+                if is_already_known(e):
+                    # Même transaction signée déjà reçue par le nœud: elle est diffusée,
+                    # un nouvel envoi avec un autre nonce minterait le diplôme deux fois
+                    return HexBytes(signed_txn.hash), nonce
+                if is_nonce_error(e):
+                    # Nonce déjà consommé sur la chaîne: ne pas le réutiliser
+                    self.nonce_manager.done(nonce)
+                    self.nonce_manager.resync()
+                    if attempt < max_attempts - 1:
+                        print(f"⚠️ Nonce {nonce} refusé, nouvel essai...")
+                        continue
+                else:
+                    self.nonce_manager.release(nonce)
+                raise
+
+    # -------------------------------------------------------------------
+    # Attente de confirmation d'un mint déjà envoyé
+    # -------------------------------------------------------------------
+    def wait_for_mint(self, tx_hash, timeout=300):
+        """Attend le receipt d'un mint et décode le Token ID"""
+        tx_hash = HexBytes(tx_hash)
+        try:
+            print("⏳ Attente de confirmation...")
+
+            # Le tracker partagé interroge tous les receipts en attente en un seul batch
+            receipt = self.receipt_tracker.wait(tx_hash, timeout=timeout)
+            if receipt is None:
+                print(f"⚠️ Timeout d'attente pour {Web3.to_hex(tx_hash)}")
+                return {
+                    'success': False,
+                    'error': f'Transaction envoyée mais pas encore confirmée. Vérifiez sur PolygonScan.',
+                    'tx_hash': Web3.to_hex(tx_hash),
+                    'pending': True
+                }
+            print(f"✅ Transaction confirmée dans le bloc {receipt['blockNumber']}")
 
             # Vérifier le statut de la transaction
             if receipt['status'] != 1:
                 return {
                     "success": False, 
                     "error": "Transaction échouée sur la blockchain", 
-                    "tx_hash": tx_hash.hex()
+                    "tx_hash": Web3.to_hex(tx_hash)
                 }
 
             # Lecture de l'événement DiplomaMinted
@@ -182,43 +470,69 @@ class BlockchainNFT:
                 except:
                     token_id = 0
 
+            self.cache.invalidate_total_supply()
+
             return {
                 "success": True,
-                "tx_hash": tx_hash.hex(),
+                "tx_hash": Web3.to_hex(tx_hash),
                 "token_id": token_id,
                 "gas_used": receipt['gasUsed'],
                 "block_number": receipt['blockNumber']
             }
 
         except Exception as e:
-            error_msg = str(e)
-            print(f"❌ Erreur lors de la création du NFT: {error_msg}")
-            
-            # Messages d'erreur plus explicites
-            if 'insufficient funds' in error_msg.lower():
-                error_msg = 'Fonds insuffisants pour payer les frais de gas. Obtenez des MATIC de test sur https://faucet.polygon.technology/'
-            elif 'nonce too low' in error_msg.lower():
-                error_msg = 'Erreur de nonce. Une transaction est peut-être en attente. Attendez quelques secondes.'
-            elif 'replacement transaction underpriced' in error_msg.lower():
-                error_msg = 'Transaction en attente. Attendez la confirmation de la transaction précédente.'
-            elif 'execution reverted' in error_msg.lower():
-                error_msg = 'Transaction rejetée par le contrat. Vérifiez que vous êtes le propriétaire du contrat.'
-            
-            return {"success": False, "error": error_msg}
+            return {"success": False, "error": self._explain_error(e), "tx_hash": Web3.to_hex(tx_hash)}
+
+    def _explain_error(self, e):
+        """Traduit les erreurs RPC courantes en messages explicites"""
+        error_msg = str(e)
+        print(f"❌ Erreur lors de la création du NFT: {error_msg}")
+        
+        # Messages d'erreur plus explicites
+        if 'insufficient funds' in error_msg.lower():
+            error_msg = 'Fonds insuffisants pour payer les frais de gas. Obtenez des MATIC de test sur https://faucet.polygon.technology/'
+        elif 'nonce too low' in error_msg.lower():
+            error_msg = 'Erreur de nonce. Une transaction est peut-être en attente. Attendez quelques secondes.'
+        elif 'replacement transaction underpriced' in error_msg.lower():
+            error_msg = 'Transaction en attente. Attendez la confirmation de la transaction précédente.'
+        elif 'execution reverted' in error_msg.lower():
+            error_msg = 'Transaction rejetée par le contrat. Vérifiez que vous êtes le propriétaire du contrat.'
+        
+        return error_msg
 
     # -------------------------------------------------------------------
     def total_supply(self):
         try:
-            return self.contract.functions.totalSupply().call()
+            # totalSupply ne change qu'avec un nouveau bloc: une lecture par bloc
+            block_number = self._head_block()
+            total = self.cache.get_total_supply(block_number)
+            if total is None:
+                total = self.contract.functions.totalSupply().call(block_identifier=block_number)
+                self.cache.put_total_supply(block_number, total)
+            return total
         except Exception as e:
             print(f"Erreur totalSupply: {e}")
             return 0
 
+    def _head_block(self, ttl=1.0):
+        """Numéro du dernier bloc, relu au plus une fois par seconde"""
+        with self._head_lock:
+            now = time.monotonic()
+            if self._head is None or now >= self._head[1]:
+                self._head = (self.w3.eth.block_number, now + ttl)
+            return self._head[0]
+
     # -------------------------------------------------------------------
     def get_diploma_info(self, token_id):
+        # Les infos d'un diplôme ne changent qu'à sa révocation (invalidée par l'indexeur,
+        # au plus tard à l'expiration de l'entrée)
+        cached = self.cache.get_info(token_id)
+        if cached is not None:
+            return cached
+
         try:
             info = self.contract.functions.getDiplomaInfo(token_id).call()
-            return {
+            result = {
                 "success": True,
                 "student_name": info[0],
                 "degree_type": info[1],
@@ -226,9 +540,117 @@ class BlockchainNFT:
                 "issue_date": info[3],
                 "is_valid": info[4]
             }
+            self.cache.put_info(token_id, result)
+            return result
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def get_total_supply(self):
+        """Nombre de diplômes mintés, sans repli sur 0 en cas d'erreur (contrairement à total_supply)"""
+        try:
+            return {"success": True, "total_supply": self.contract.functions.totalSupply().call()}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def get_token_uri(self, token_id):
+        """URI des métadonnées d'un diplôme (tokenURI)"""
+        try:
+            return {"success": True, "token_uri": self.contract.functions.tokenURI(token_id).call()}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    # -------------------------------------------------------------------
+    # Lecture groupée: Multicall3 si déployé, sinon batch JSON-RPC
+    # -------------------------------------------------------------------
+    def get_diplomas_info(self, token_ids, chunk_size=200):
+        """
+        Récupérer les informations de plusieurs diplômes en un minimum d'appels
+
+        Args:
+            token_ids: Liste des Token IDs
+            chunk_size: Nombre d'appels par eth_call Multicall3 / par batch
+
+        Returns:
+            list: Un dict par token (même format que get_diploma_info, avec token_id)
+        """
+        results = {}
+        missing = []
+        for token_id in token_ids:
+            cached = self.cache.get_info(token_id)
+            if cached is not None:
+                results[token_id] = {"token_id": token_id, **cached}
+            else:
+                missing.append(token_id)
+
+        # Seuls les diplômes absents du cache partent vers le RPC
+        for start in range(0, len(missing), chunk_size):
+            chunk = missing[start:start + chunk_size]
+            try:
+                if self._has_multicall():
+                    raw = self._multicall_diploma_info(chunk)
+                else:
+                    raw = self._batch_diploma_info(chunk)
+            except Exception as e:
+                raw = [(None, str(e))] * len(chunk)
+
+            for token_id, (data, error) in zip(chunk, raw):
+                if error is None:
+                    try:
+                        info = decode(self._diploma_info_types, data)
+                        result = {
+                            "success": True,
+                            "student_name": info[0],
+                            "degree_type": info[1],
+                            "institution": info[2],
+                            "issue_date": info[3],
+                            "is_valid": info[4]
+                        }
+                        self.cache.put_info(token_id, result)
+                        results[token_id] = {"token_id": token_id, **result}
+                        continue
+                    except Exception as e:
+                        error = f"Réponse illisible: {e}"
+                results[token_id] = {"token_id": token_id, "success": False, "error": error}
+        return [results[token_id] for token_id in token_ids]
+
+    @property
+    def _diploma_info_types(self):
+        outputs = self.contract.get_function_by_name('getDiplomaInfo').abi['outputs']
+        return [output['type'] for output in outputs]
+
+    def _has_multicall(self):
+        if self._multicall_available is None:
+            try:
+                code = self.w3.eth.get_code(MULTICALL3_ADDRESS)
+                self._multicall_available = len(code) > 0
+            except Exception:
+                self._multicall_available = False
+        return self._multicall_available
+
+    def _multicall_diploma_info(self, token_ids):
+        multicall = self.w3.eth.contract(address=MULTICALL3_ADDRESS, abi=MULTICALL3_ABI)
+        calls = [
+            (self.contract.address, True, self.contract.encodeABI(fn_name='getDiplomaInfo', args=[token_id]))
+            for token_id in token_ids
+        ]
+        return [
+            (data, None) if success else (None, _decode_revert(data))
+            for success, data in multicall.functions.aggregate3(calls).call()
+        ]
+
+    def _batch_diploma_info(self, token_ids):
+        calls = [
+            ('eth_call', [{
+                'to': self.contract.address,
+                'data': self.contract.encodeABI(fn_name='getDiplomaInfo', args=[token_id])
+            }, 'latest'])
+            for token_id in token_ids
+        ]
+        return [
+            (HexBytes(result), None) if error is None else (None, error)
+            for result, error in batch_request(self.session, self.rpc_url, calls)
+        ]
+
     # -------------------------------------------------------------------
     def get_balance(self, address):
         try:
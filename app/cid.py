@@ -0,0 +1,111 @@
+import base64
+import hashlib
+import json
+
+# Paramètres identiques à ceux demandés à Pinata (cidVersion=1):
+# chunker size-262144, feuilles "raw", arbre équilibré de 174 liens max
+CHUNK_SIZE = 262144
+MAX_LINKS = 174
+
+CODEC_RAW = 0x55
+CODEC_DAG_PB = 0x70
+SHA2_256 = 0x12
+
+
+def _varint(value):
+    out = bytearray()
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return bytes(out)
+
+
+def _field(number, wire_type, payload):
+    key = _varint((number << 3) | wire_type)
+    if wire_type == 0:
+        return key + _varint(payload)
+    return key + _varint(len(payload)) + payload
+
+
+def _cid_bytes(codec, data):
+    digest = hashlib.sha256(data).digest()
+    return _varint(1) + _varint(codec) + bytes([SHA2_256, len(digest)]) + digest
+
+
+def cid_to_str(cid):
+    """Encode un CID binaire en base32 (préfixe 'b', format des CIDv1)"""
+    return 'b' + base64.b32encode(cid).decode('ascii').lower().rstrip('=')
+
+
+class CIDBuilder:
+    """Calcule le CIDv1 UnixFS d'un fichier au fil de l'eau (mémoire bornée à un chunk)"""
+
+    def __init__(self, chunk_size=CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.size = 0
+        self._buffer = bytearray()
+        self._leaves = []
+
+    def update(self, data):
+        self.size += len(data)
+        self._buffer += data
+        while len(self._buffer) >= self.chunk_size:
+            self._add_leaf(bytes(self._buffer[:self.chunk_size]))
+            del self._buffer[:self.chunk_size]
+
+    def _add_leaf(self, chunk):
+        # (cid, taille du contenu, taille cumulée des blocs)
+        self._leaves.append((_cid_bytes(CODEC_RAW, chunk), len(chunk), len(chunk)))
+
+    def hexdigest(self):
+        """CID final (chaîne base32)"""
+        if self._buffer or not self._leaves:
+            self._add_leaf(bytes(self._buffer))
+            self._buffer = bytearray()
+
+        nodes = self._leaves
+        while len(nodes) > 1:
+            nodes = [self._parent(nodes[i:i + MAX_LINKS]) for i in range(0, len(nodes), MAX_LINKS)]
+        return cid_to_str(nodes[0][0])
+
+    @staticmethod
+    def _parent(children):
+        links = b''.join(
+            _field(2, 2, _field(1, 2, cid) + _field(2, 2, b'') + _field(3, 0, tsize))
+            for cid, _, tsize in children
+        )
+        filesize = sum(size for _, size, _ in children)
+        unixfs = _field(1, 0, 2) + _field(3, 0, filesize) + b''.join(
+            _field(4, 0, size) for _, size, _ in children
+        )
+        node = links + _field(1, 2, unixfs)
+        return (
+            _cid_bytes(CODEC_DAG_PB, node),
+            filesize,
+            len(node) + sum(tsize for _, _, tsize in children)
+        )
+
+
+def compute_cid(data):
+    """CIDv1 de données en mémoire"""
+    builder = CIDBuilder()
+    builder.update(data)
+    return builder.hexdigest()
+
+
+def compute_file_cid(file_path, block_size=65536):
+    """CIDv1 d'un fichier sur disque (lecture par blocs)"""
+    builder = CIDBuilder()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            builder.update(block)
+    return builder.hexdigest()
+
+
+def json_bytes(content):
+    """Sérialisation identique à celle de pinJSONToIPFS (JSON.stringify compact)"""
+    return json.dumps(content, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
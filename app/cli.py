@@ -0,0 +1,84 @@
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from app.pin_reconcile import onchain_references, reconcile_pins
+from app.student_import import IMPORT_FORMATS, read_rows, import_students
+
+pins_cli = AppGroup('pins', help='Gestion des contenus épinglés sur IPFS')
+students_cli = AppGroup('students', help='Gestion des étudiants (students.db)')
+
+
+def _format_size(size):
+    return f'{size / 1024 / 1024:.1f} Mo'
+
+
+@pins_cli.command('reconcile')
+@click.option('--apply', is_flag=True, help='Supprimer les orphelins (par défaut: simple listing)')
+@click.option('--min-age-hours', default=24, show_default=True,
+              help='Âge minimal d\'un pin pour être supprimé')
+@click.option('--batch-size', default=10, show_default=True, help='Unpins envoyés en parallèle')
+@click.option('--rate', default=2.0, show_default=True, help='Unpins par seconde au maximum')
+def reconcile_command(apply, min_age_hours, batch_size, rate):
+    """Supprime les pins des mints qui n'ont jamais abouti (avec --apply)"""
+    extensions = current_app.extensions
+    diploma_index = extensions['diploma_index']
+    dry_run = not apply
+
+    # Diplômes mintés relus on-chain: l'index peut ignorer les mints antérieurs à son premier bloc
+    onchain, errors = onchain_references(extensions['blockchain_nft'].get(), extensions['ipfs_cache'], diploma_index)
+    if errors:
+        for error in errors:
+            if error['token_id'] is None:
+                click.echo(f"❌ {error['error']}")
+            else:
+                click.echo(f"❌ Diplôme #{error['token_id']}: {error['error']}")
+        click.echo(f'⛔ {len(errors)} lectures on-chain en échec: aucun pin supprimé')
+        raise SystemExit(1)
+
+    references = onchain + diploma_index.ipfs_references() + extensions['mint_jobs'].ipfs_references()
+
+    report = reconcile_pins(
+        extensions['ipfs_service'],
+        references,
+        min_age_hours=min_age_hours,
+        batch_size=batch_size,
+        rate=rate,
+        dry_run=dry_run
+    )
+
+    click.echo(f"📌 {report['scanned']} pins parcourus, {report['orphans']} orphelins "
+               f"({_format_size(report['orphan_bytes'])})")
+    if dry_run:
+        click.echo('ℹ️ Mode simulation: aucun pin supprimé')
+        return
+    click.echo(f"✅ {report['unpinned']} pins supprimés, {_format_size(report['bytes_reclaimed'])} récupérés")
+    for error in report['errors']:
+        click.echo(f"❌ {error['ipfs_hash']}: {error['error']}")
+    if report['failed']:
+        raise SystemExit(1)
+
+
+@students_cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--batch-size', default=5000, show_default=True, help='Lignes insérées par lot')
+def import_command(path, batch_size):
+    """Importe un fichier CSV ou XLSX d'étudiants en une seule transaction"""
+    fmt = path.rsplit('.', 1)[-1].lower()
+    if fmt not in IMPORT_FORMATS:
+        raise click.BadParameter(f"format attendu: {', '.join(IMPORT_FORMATS)}", param_hint='PATH')
+    try:
+        records = read_rows(path, fmt)
+    except (ValueError, RuntimeError) as e:
+        raise click.ClickException(str(e))
+
+    try:
+        for event in import_students(records, batch_size=batch_size,
+                                     db_path=current_app.extensions['students'].db_path):
+            if 'error' in event:
+                click.echo(f"❌ Ligne {event['line']}: {event['error']}")
+            else:
+                click.echo(f"✅ {event['imported']} étudiants importés, {event['rejected']} lignes rejetées")
+    except ValueError as e:
+        # Fichier illisible en cours de lecture: la transaction est annulée
+        raise click.ClickException(f'Import annulé: {e}')
@@ -7,14 +7,47 @@ class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev-secret-key')
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
     MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', 10485760))
+    # Fichiers CSV/XLSX d'import d'étudiants
+    MAX_IMPORT_SIZE = int(os.getenv('MAX_IMPORT_SIZE', 104857600))
+    
+    # Base locale (jobs de minting, index des diplômes...)
+    DATA_DB_PATH = os.getenv('DATA_DB_PATH', 'diplomes.db')
+    # Étudiants importés (CSV/XLSX) et BlockchainManager
+    STUDENTS_DB_PATH = os.getenv('STUDENTS_DB_PATH', 'students.db')
+    MINT_WORKERS = int(os.getenv('MINT_WORKERS', 4))
     
     # Blockchain
     CONTRACT_ADDRESS = os.getenv('CONTRACT_ADDRESS')
     OWNER_PRIVATE_KEY = os.getenv('OWNER_PRIVATE_KEY')
     RPC_URL = os.getenv('RPC_URL', 'https://rpc-amoy.polygon.technology/')
     CHAIN_ID = int(os.getenv('CHAIN_ID', 80002))
+    RPC_POOL_SIZE = int(os.getenv('RPC_POOL_SIZE', 10))
+    MAX_BULK_DIPLOMAS = int(os.getenv('MAX_BULK_DIPLOMAS', 1000))
+    DIPLOMA_CACHE_SIZE = int(os.getenv('DIPLOMA_CACHE_SIZE', 10000))
+    DIPLOMA_CACHE_TTL = int(os.getenv('DIPLOMA_CACHE_TTL', 300))
+    
+    # Pagination de /liste et /api/etudiants
+    LIST_PAGE_SIZE = int(os.getenv('LIST_PAGE_SIZE', 50))
+    LIST_MAX_PAGE_SIZE = int(os.getenv('LIST_MAX_PAGE_SIZE', 200))
+    
+    # Indexation des événements DiplomaMinted / DiplomaRevoked
+    INDEXER_ENABLED = os.getenv('INDEXER_ENABLED', 'true').lower() == 'true'
+    INDEXER_START_BLOCK = int(os.getenv('INDEXER_START_BLOCK')) if os.getenv('INDEXER_START_BLOCK') else None
+    INDEXER_CHUNK_SIZE = int(os.getenv('INDEXER_CHUNK_SIZE', 2000))
+    
+    # IPFS: backend de stockage (pinata, kubo ou filesystem)
+    IPFS_BACKEND = os.getenv('IPFS_BACKEND', 'pinata')
+    KUBO_API_URL = os.getenv('KUBO_API_URL', 'http://127.0.0.1:5001')
+    IPFS_STORE_DIR = os.getenv('IPFS_STORE_DIR', 'ipfs_store')
     
     # IPFS/Pinata
     PINATA_API_KEY = os.getenv('PINATA_API_KEY')
     PINATA_SECRET_KEY = os.getenv('PINATA_SECRET_KEY')
     PINATA_JWT = os.getenv('PINATA_JWT')
+    PINATA_POOL_SIZE = int(os.getenv('PINATA_POOL_SIZE', 10))
+    PINATA_MAX_RETRIES = int(os.getenv('PINATA_MAX_RETRIES', 3))
+    
+    # Cache disque des contenus IPFS servis sous /ipfs/<cid>
+    IPFS_GATEWAY_URL = os.getenv('IPFS_GATEWAY_URL', 'https://gateway.pinata.cloud/ipfs/')
+    IPFS_CACHE_DIR = os.getenv('IPFS_CACHE_DIR', 'ipfs_cache')
+    IPFS_CACHE_MAX_BYTES = int(os.getenv('IPFS_CACHE_MAX_BYTES', 1073741824))
@@ -0,0 +1,121 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class DiplomaCache:
+    """Cache LRU borné des lectures getDiplomaInfo et totalSupply"""
+
+    def __init__(self, max_entries=10000, ttl=300, live=None):
+        """
+        Args:
+            max_entries: Nombre maximal de diplômes gardés en mémoire
+            ttl: Durée de validité d'une entrée (secondes); borne l'obsolescence si
+                 une révocation n'a pas encore été vue par l'indexeur
+            live: Callable indiquant si l'indexeur tourne (seule source d'invalidation);
+                  sans indexeur actif, les infos des diplômes ne sont pas mises en cache
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.live = live
+        self._lock = threading.Lock()
+        self._infos = OrderedDict()
+        self._total_supply = None
+        self._counters = {
+            'info_hits': 0,
+            'info_misses': 0,
+            'supply_hits': 0,
+            'supply_misses': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+            'bypasses': 0
+        }
+
+    # -------------------------------------------------------------------
+    # getDiplomaInfo
+    # -------------------------------------------------------------------
+    def get_info(self, token_id):
+        """Retourne les infos en cache d'un diplôme (None si absent ou expiré)"""
+        if not self._invalidated():
+            with self._lock:
+                self._counters['bypasses'] += 1
+                # Entrées devenues invérifiables: ne pas les resservir au redémarrage de l'indexeur
+                self._infos.clear()
+            return None
+
+        with self._lock:
+            entry = self._infos.get(token_id)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._infos[token_id]
+                self._counters['expirations'] += 1
+                entry = None
+            if entry is None:
+                self._counters['info_misses'] += 1
+                return None
+            self._infos.move_to_end(token_id)
+            self._counters['info_hits'] += 1
+            return dict(entry[1])
+
+    def put_info(self, token_id, info):
+        if not self._invalidated():
+            return
+        with self._lock:
+            self._infos[token_id] = (time.monotonic() + self.ttl, dict(info))
+            self._infos.move_to_end(token_id)
+            while len(self._infos) > self.max_entries:
+                self._infos.popitem(last=False)
+                self._counters['evictions'] += 1
+
+    def _invalidated(self):
+        """Vrai si les révocations invalident le cache (indexeur en cours d'exécution)"""
+        return self.live is not None and self.live()
+
+    def invalidate(self, token_id):
+        with self._lock:
+            if self._infos.pop(token_id, None) is not None:
+                self._counters['invalidations'] += 1
+
+    # -------------------------------------------------------------------
+    # totalSupply (valable pour un numéro de bloc)
+    # -------------------------------------------------------------------
+    def get_total_supply(self, block_number):
+        with self._lock:
+            if self._total_supply and self._total_supply[0] == block_number:
+                self._counters['supply_hits'] += 1
+                return self._total_supply[1]
+            self._counters['supply_misses'] += 1
+            return None
+
+    def put_total_supply(self, block_number, value):
+        with self._lock:
+            self._total_supply = (block_number, value)
+
+    def invalidate_total_supply(self):
+        with self._lock:
+            self._total_supply = None
+
+    # -------------------------------------------------------------------
+    # Invalidation par les événements observés
+    # -------------------------------------------------------------------
+    def on_events(self, minted, revoked):
+        """Listener de l'indexeur: (minted, revoked) issus de DiplomaMinted / DiplomaRevoked"""
+        for event in minted:
+            self.invalidate(event['token_id'])
+        for token_id in revoked:
+            self.invalidate(token_id)
+        if minted:
+            self.invalidate_total_supply()
+
+    def stats(self):
+        """Compteurs de hits/misses pour dimensionner le cache"""
+        with self._lock:
+            lookups = self._counters['info_hits'] + self._counters['info_misses']
+            return {
+                **self._counters,
+                'entries': len(self._infos),
+                'max_entries': self.max_entries,
+                'ttl': self.ttl,
+                'live': self._invalidated(),
+                'info_hit_rate': round(self._counters['info_hits'] / lookups, 4) if lookups else 0.0
+            }
@@ -0,0 +1,391 @@
+import base64
+import json
+import re
+import sqlite3
+import threading
+
+# Clés de tri de la liste (expressions indexées, cf. _init_db)
+SORTS = {
+    'date': "COALESCE(date_ajout, '')",
+    'nom': "COALESCE(nom, student_name, '') COLLATE NOCASE",
+    'moyenne': 'COALESCE(moyenne, -1)'
+}
+
+# Filtres exacts acceptés par page()
+FILTERS = ('mention', 'institution', 'diplome')
+
+# Colonnes indexées en plein texte et poids bm25 (le nom compte plus que l'institution)
+SEARCH_COLUMNS = {
+    'nom': 10.0,
+    'prenom': 10.0,
+    'student_name': 10.0,
+    'email': 5.0,
+    'diplome': 2.0,
+    'specialite': 2.0,
+    'institution': 1.0
+}
+
+
+class DiplomaIndex:
+    """Index local (SQLite) des diplômes émis, alimenté par les jobs et la blockchain"""
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path: Chemin de la base SQLite
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.executescript('''
+            CREATE TABLE IF NOT EXISTS diplomes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                token_id INTEGER UNIQUE,
+                wallet_address TEXT,
+                student_name TEXT,
+                nom TEXT,
+                prenom TEXT,
+                email TEXT,
+                diplome TEXT,
+                specialite TEXT,
+                institution TEXT,
+                ipfs_url TEXT,
+                metadata_url TEXT,
+                tx_hash TEXT,
+                block_number INTEGER,
+                revoked INTEGER NOT NULL DEFAULT 0,
+                date_ajout TEXT,
+                moyenne REAL,
+                mention TEXT
+            );
+            CREATE TABLE IF NOT EXISTS indexer_state (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL
+            );
+        ''')
+        # Colonnes ajoutées après coup: migrer les bases existantes
+        columns = [row['name'] for row in conn.execute('PRAGMA table_info(diplomes)')]
+        for column, column_type in (('moyenne', 'REAL'), ('mention', 'TEXT')):
+            if column not in columns:
+                conn.execute(f'ALTER TABLE diplomes ADD COLUMN {column} {column_type}')
+
+        # Un index par clé de tri (id départage les égalités) et par filtre
+        for name, expression in SORTS.items():
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_diplomes_sort_{name} ON diplomes ({expression}, id)')
+        for name in FILTERS:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_diplomes_{name} ON diplomes ({name})')
+        self._init_search(conn)
+        conn.commit()
+        conn.close()
+
+    def _init_search(self, conn):
+        """Index plein texte FTS5 sur diplomes, tenu à jour par triggers"""
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'diplomes_fts'"
+        ).fetchone()
+        columns = ', '.join(SEARCH_COLUMNS)
+        new_values = ', '.join(f'new.{name}' for name in SEARCH_COLUMNS)
+        old_values = ', '.join(f'old.{name}' for name in SEARCH_COLUMNS)
+        # Table à contenu externe: seuls les index de recherche sont stockés en plus
+        conn.executescript(f'''
+            CREATE VIRTUAL TABLE IF NOT EXISTS diplomes_fts USING fts5(
+                {columns},
+                content='diplomes',
+                content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            );
+            CREATE TRIGGER IF NOT EXISTS diplomes_fts_insert AFTER INSERT ON diplomes BEGIN
+                INSERT INTO diplomes_fts (rowid, {columns}) VALUES (new.id, {new_values});
+            END;
+            CREATE TRIGGER IF NOT EXISTS diplomes_fts_delete AFTER DELETE ON diplomes BEGIN
+                INSERT INTO diplomes_fts (diplomes_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            END;
+            CREATE TRIGGER IF NOT EXISTS diplomes_fts_update AFTER UPDATE ON diplomes BEGIN
+                INSERT INTO diplomes_fts (diplomes_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO diplomes_fts (rowid, {columns}) VALUES (new.id, {new_values});
+            END;
+        ''')
+        # Classement par défaut (colonne rank): bm25 pondéré par colonne
+        weights = ', '.join(str(weight) for weight in SEARCH_COLUMNS.values())
+        conn.execute("INSERT INTO diplomes_fts (diplomes_fts, rank) VALUES ('rank', ?)", (f'bm25({weights})',))
+        if not exists:
+            # Base existante: indexer les diplômes déjà présents
+            conn.execute("INSERT INTO diplomes_fts (diplomes_fts) VALUES ('rebuild')")
+
+    # -------------------------------------------------------------------
+    # Écriture
+    # -------------------------------------------------------------------
+    def record_issued(self, etudiant):
+        """Enregistre un diplôme minté par l'application (données du formulaire)"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute('''
+                INSERT INTO diplomes (token_id, wallet_address, student_name, nom, prenom, email,
+                                      diplome, specialite, institution, ipfs_url, metadata_url,
+                                      tx_hash, date_ajout, moyenne, mention)
+                VALUES (:nft_token_id, :wallet_address, :student_name, :nom, :prenom, :email,
+                        :diplome, :specialite, :institution, :ipfs_url, :metadata_url,
+                        :tx_hash, :date_ajout, :moyenne, :mention)
+                ON CONFLICT(token_id) DO UPDATE SET
+                    nom = excluded.nom,
+                    prenom = excluded.prenom,
+                    email = excluded.email,
+                    diplome = excluded.diplome,
+                    specialite = excluded.specialite,
+                    institution = excluded.institution,
+                    ipfs_url = excluded.ipfs_url,
+                    metadata_url = excluded.metadata_url,
+                    date_ajout = excluded.date_ajout,
+                    moyenne = excluded.moyenne,
+                    mention = excluded.mention
+            ''', {
+                'moyenne': None,
+                'mention': None,
+                **etudiant,
+                'student_name': f"{etudiant['nom']} {etudiant['prenom']}"
+            })
+            conn.commit()
+            conn.close()
+
+    def apply_events(self, minted, revoked, last_block, checkpoint_name):
+        """
+        Applique un lot d'événements et avance le checkpoint dans la même transaction
+
+        Args:
+            minted: Liste de dicts (token_id, wallet_address, student_name, tx_hash, block_number)
+            revoked: Liste de token ids révoqués
+            last_block: Dernier bloc entièrement indexé
+            checkpoint_name: Nom du checkpoint (un par contrat)
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.executemany('''
+                    INSERT INTO diplomes (token_id, wallet_address, student_name, tx_hash, block_number)
+                    VALUES (:token_id, :wallet_address, :student_name, :tx_hash, :block_number)
+                    ON CONFLICT(token_id) DO UPDATE SET
+                        wallet_address = excluded.wallet_address,
+                        student_name = excluded.student_name,
+                        tx_hash = excluded.tx_hash,
+                        block_number = excluded.block_number
+                ''', minted)
+                conn.executemany(
+                    'UPDATE diplomes SET revoked = 1 WHERE token_id = ?',
+                    [(token_id,) for token_id in revoked]
+                )
+                conn.execute(
+                    'INSERT OR REPLACE INTO indexer_state (name, value) VALUES (?, ?)',
+                    (checkpoint_name, last_block)
+                )
+            conn.close()
+
+    # -------------------------------------------------------------------
+    # Lecture
+    # -------------------------------------------------------------------
+    def get_checkpoint(self, checkpoint_name):
+        """Dernier bloc indexé (None si l'indexation n'a jamais tourné)"""
+        conn = self._connect()
+        row = conn.execute('SELECT value FROM indexer_state WHERE name = ?', (checkpoint_name,)).fetchone()
+        conn.close()
+        return row['value'] if row else None
+
+    def list_all(self):
+        """Tous les diplômes, au format attendu par les templates et l'API"""
+        conn = self._connect()
+        rows = conn.execute(
+            'SELECT * FROM diplomes ORDER BY token_id IS NULL, token_id, id'
+        ).fetchall()
+        conn.close()
+        return [self._to_etudiant(row) for row in rows]
+
+    def page(self, sort='date', order='asc', after=None, limit=50, **filters):
+        """
+        Une page de diplômes, par pagination sur clé (keyset)
+
+        Args:
+            sort: Clé de tri (date, nom, moyenne)
+            order: asc ou desc
+            after: Curseur retourné par la page précédente (None: première page)
+            limit: Nombre de diplômes par page
+            **filters: Filtres exacts (mention, institution, diplome)
+
+        Returns:
+            tuple: (diplômes, curseur de la page suivante ou None)
+
+        Raises:
+            ValueError: Tri, ordre, filtre ou curseur invalide
+        """
+        if sort not in SORTS:
+            raise ValueError(f"Tri inconnu: {sort} (attendu: {', '.join(SORTS)})")
+        if order not in ('asc', 'desc'):
+            raise ValueError(f'Ordre inconnu: {order} (attendu: asc, desc)')
+        unknown = set(filters) - set(FILTERS)
+        if unknown:
+            raise ValueError(f"Filtre inconnu: {', '.join(sorted(unknown))}")
+
+        expression = SORTS[sort]
+        conditions = []
+        params = []
+        for name, value in filters.items():
+            if value:
+                conditions.append(f'{name} = ?')
+                params.append(value)
+
+        if after:
+            key, last_id = decode_cursor(after, sort, order)
+            # Reprise juste après le dernier diplôme vu, sans OFFSET. SQLite ne cherche
+            # dans l'index que sur la clé pour (clé, id) > (?, ?): d'abord la fin des
+            # diplômes à clé égale (clé = ? AND id > ?), puis les clés suivantes
+            op = '>' if order == 'asc' else '<'
+            # (à clé égale, trier sur id seul: sinon SQLite retrie toute la plage)
+            queries = [
+                (conditions + [f'{expression} = ?', f'id {op} ?'], params + [key, last_id], ['id']),
+                (conditions + [f'{expression} {op} ?'], params + [key], [expression, 'id'])
+            ]
+        else:
+            queries = [(conditions, params, [expression, 'id'])]
+
+        direction = order.upper()
+        rows = []
+        conn = self._connect()
+        for query_conditions, query_params, order_by in queries:
+            where = f"WHERE {' AND '.join(query_conditions)}" if query_conditions else ''
+            order_by = ', '.join(f'{column} {direction}' for column in order_by)
+            rows += conn.execute(
+                f'SELECT *, {expression} AS sort_key FROM diplomes {where} ORDER BY {order_by} LIMIT ?',
+                (*query_params, limit + 1 - len(rows))
+            ).fetchall()
+            if len(rows) > limit:
+                break
+        conn.close()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(sort, order, rows[-1]['sort_key'], rows[-1]['id'])
+        return [self._to_etudiant(row) for row in rows], next_cursor
+
+    def iter_all(self, sort='date', order='asc', batch_size=1000, **filters):
+        """
+        Tous les diplômes (filtrés), lus par pages successives pour l'export
+
+        La première page est lue immédiatement: un tri ou un filtre invalide
+        lève ValueError avant le début de l'export.
+
+        Returns:
+            iterator: Diplômes un par un, en mémoire constante (une page à la fois)
+        """
+        etudiants, cursor = self.page(sort, order, None, batch_size, **filters)
+
+        def rows(etudiants, cursor):
+            while True:
+                yield from etudiants
+                if not cursor:
+                    return
+                etudiants, cursor = self.page(sort, order, cursor, batch_size, **filters)
+
+        return rows(etudiants, cursor)
+
+    def search(self, query, limit=20):
+        """
+        Recherche plein texte (nom, prénom, email, diplôme, spécialité, institution)
+
+        Chaque mot est cherché comme préfixe ("dup" trouve "Dupont"), accents et
+        casse ignorés; les résultats sont classés par pertinence (bm25).
+
+        Returns:
+            list: Diplômes trouvés, les plus pertinents d'abord
+        """
+        terms = re.findall(r'\w+', query)
+        if not terms:
+            return []
+        # Mots entre guillemets: la syntaxe FTS5 de la saisie n'est pas interprétée
+        match = ' '.join(f'"{term}"*' for term in terms)
+
+        # Classement dans FTS5 d'abord: seules les lignes retenues sont lues dans diplomes
+        conn = self._connect()
+        rows = conn.execute('''
+            SELECT diplomes.* FROM (
+                SELECT rowid, rank FROM diplomes_fts WHERE diplomes_fts MATCH ? ORDER BY rank LIMIT ?
+            ) AS found
+            JOIN diplomes ON diplomes.id = found.rowid
+            ORDER BY found.rank
+        ''', (match, limit)).fetchall()
+        conn.close()
+        return [self._to_etudiant(row) for row in rows]
+
+    def summary(self):
+        """Nombre total de diplômes et répartition par type (index sur diplome)"""
+        conn = self._connect()
+        rows = conn.execute('SELECT diplome, COUNT(*) AS n FROM diplomes GROUP BY diplome').fetchall()
+        conn.close()
+        by_diplome = {row['diplome']: row['n'] for row in rows}
+        return {'total': sum(by_diplome.values()), 'par_diplome': by_diplome}
+
+    def ipfs_references(self):
+        """URLs IPFS (PDF et métadonnées) de tous les diplômes connus"""
+        conn = self._connect()
+        rows = conn.execute('SELECT ipfs_url, metadata_url FROM diplomes').fetchall()
+        conn.close()
+        return [url for row in rows for url in row if url]
+
+    def missing_ipfs_references(self):
+        """Token ids des diplômes indexés sans URL de PDF ou de métadonnées (mints vus on-chain)"""
+        conn = self._connect()
+        rows = conn.execute(
+            'SELECT token_id FROM diplomes WHERE token_id IS NOT NULL '
+            'AND (ipfs_url IS NULL OR metadata_url IS NULL) ORDER BY token_id'
+        ).fetchall()
+        conn.close()
+        return [row['token_id'] for row in rows]
+
+    def set_ipfs_urls(self, token_id, ipfs_url, metadata_url):
+        """Complète les URLs IPFS d'un diplôme indexé depuis ses événements"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'UPDATE diplomes SET ipfs_url = COALESCE(ipfs_url, ?), metadata_url = COALESCE(metadata_url, ?) '
+                'WHERE token_id = ?',
+                (ipfs_url, metadata_url, token_id)
+            )
+            conn.commit()
+            conn.close()
+
+    @staticmethod
+    def _to_etudiant(row):
+        etudiant = dict(row)
+        etudiant.pop('sort_key', None)
+        etudiant['nft_token_id'] = etudiant.pop('token_id')
+        etudiant['revoked'] = bool(etudiant['revoked'])
+        # Diplôme minté hors de l'application: seul le nom on-chain est connu
+        if etudiant['nom'] is None:
+            etudiant['nom'] = etudiant['student_name'] or ''
+            etudiant['prenom'] = ''
+        return etudiant
+
+
+def encode_cursor(sort, order, key, last_id):
+    """Curseur opaque: tri, ordre et position du dernier diplôme de la page"""
+    raw = json.dumps([sort, order, key, last_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, sort, order):
+    """Position (clé, id) d'un curseur; ValueError s'il est invalide ou d'un autre tri"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        cursor_sort, cursor_order, key, last_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Curseur invalide')
+    if (cursor_sort, cursor_order) != (sort, order) or not isinstance(last_id, int):
+        raise ValueError('Curseur invalide pour ce tri')
+    return key, last_id
@@ -0,0 +1,133 @@
+import threading
+import time
+
+
+class FeeOracle:
+    """Frais EIP-1559 calculés via eth_feeHistory et partagés par tous les mints"""
+
+    def __init__(self, w3, min_priority_fee_gwei=30, reward_percentile=50, block_count=10, ttl=2.0):
+        """
+        Args:
+            w3: Instance Web3
+            min_priority_fee_gwei: Pourboire minimal (Polygon Amoy exige >= 25 Gwei)
+            reward_percentile: Percentile des pourboires observés à suivre
+            block_count: Nombre de blocs analysés par eth_feeHistory
+            ttl: Durée de validité du calcul (≈ temps de bloc, en secondes)
+        """
+        self.w3 = w3
+        self.min_priority_fee = w3.to_wei(min_priority_fee_gwei, 'gwei')
+        self.reward_percentile = reward_percentile
+        self.block_count = block_count
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._fees = None
+        self._expires_at = 0
+
+    def fee_params(self):
+        """Retourne maxFeePerGas / maxPriorityFeePerGas pour une transaction"""
+        with self._lock:
+            if self._fees is None or time.monotonic() >= self._expires_at:
+                self._fees = self._compute()
+                self._expires_at = time.monotonic() + self.ttl
+            return dict(self._fees)
+
+    def _compute(self):
+        try:
+            history = self.w3.eth.fee_history(self.block_count, 'latest', [self.reward_percentile])
+            # Le dernier baseFeePerGas est celui du prochain bloc
+            next_base_fee = history['baseFeePerGas'][-1]
+            rewards = sorted(reward[0] for reward in history['reward'] if reward)
+            priority_fee = rewards[len(rewards) // 2] if rewards else 0
+        except Exception as e:
+            print(f"⚠️ eth_feeHistory indisponible, repli sur gas_price: {e}")
+            next_base_fee = self.w3.eth.gas_price
+            priority_fee = 0
+
+        priority_fee = max(priority_fee, self.min_priority_fee)
+        return {
+            # Marge de 2x le base fee: la transaction reste valide sur plusieurs blocs pleins
+            "maxFeePerGas": 2 * next_base_fee + priority_fee,
+            "maxPriorityFeePerGas": priority_fee
+        }
+
+
+class GasModel:
+    """Gas limit des mints, estimé une fois par taille de payload"""
+
+    def __init__(self, safety_margin=1.25, max_entries=1024):
+        """
+        Args:
+            safety_margin: Multiplicateur appliqué à l'estimation
+                           (nouveau détenteur, variations de calldata...)
+            max_entries: Nombre maximal de tailles mémorisées
+        """
+        self.safety_margin = safety_margin
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def gas_limit(self, call, strings, from_address):
+        """
+        Gas limit pour un appel de contrat
+
+        Args:
+            call: Appel de fonction du contrat (contract.functions.xxx(...))
+            strings: Chaînes passées à la fonction (leur taille fixe le coût de stockage)
+            from_address: Adresse émettrice
+        """
+        key = (call.fn_name, self._bucket(strings))
+        gas = self._cached(key)
+        if gas is None:
+            gas = self._store(key, call.estimate_gas({"from": from_address}))
+        return gas
+
+    async def gas_limit_async(self, call, strings, from_address):
+        """Variante de gas_limit pour un contrat AsyncWeb3 (même cache)"""
+        key = (call.fn_name, self._bucket(strings))
+        gas = self._cached(key)
+        if gas is None:
+            gas = self._store(key, await call.estimate_gas({"from": from_address}))
+        return gas
+
+    def _cached(self, key):
+        with self._lock:
+            return self._cache.get(key)
+
+    def _store(self, key, estimate):
+        gas = int(estimate * self.safety_margin)
+        with self._lock:
+            if len(self._cache) >= self.max_entries:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[key] = gas
+        return gas
+
+    @staticmethod
+    def _bucket(strings):
+        # Nombre de slots de stockage de 32 octets occupés par chaque chaîne
+        slots = []
+        for value in strings:
+            size = len(value.encode('utf-8'))
+            slots.append(1 if size < 32 else 1 + (size + 31) // 32)
+        return tuple(slots)
+
+
+_oracles = {}
+_gas_models = {}
+_registry_lock = threading.Lock()
+
+
+def get_fee_oracle(w3, chain_id):
+    """Retourne l'oracle de frais partagé du processus pour cette chaîne"""
+    with _registry_lock:
+        if chain_id not in _oracles:
+            _oracles[chain_id] = FeeOracle(w3)
+        return _oracles[chain_id]
+
+
+def get_gas_model(chain_id, contract_address):
+    """Retourne le modèle de gas partagé du processus pour ce contrat"""
+    key = (chain_id, contract_address.lower())
+    with _registry_lock:
+        if key not in _gas_models:
+            _gas_models[key] = GasModel()
+        return _gas_models[key]
@@ -0,0 +1,135 @@
+import threading
+import time
+
+from web3 import Web3
+
+
+class DiplomaIndexer:
+    """Suit les événements DiplomaMinted / DiplomaRevoked et alimente l'index local"""
+
+    def __init__(self, blockchain, index, start_block=None, chunk_size=2000,
+                 confirmations=5, poll_interval=10):
+        """
+        Args:
+            blockchain: Client BlockchainNFT partagé (SharedBlockchainNFT)
+            index: DiplomaIndex à alimenter
+            start_block: Bloc de départ si aucun checkpoint; par défaut, le bloc de
+                         déploiement du contrat (cf. find_deployment_block)
+            chunk_size: Nombre de blocs par appel eth_getLogs
+            confirmations: Profondeur à attendre avant d'indexer un bloc (réorganisations)
+            poll_interval: Attente entre deux passes (secondes)
+        """
+        self.blockchain = blockchain
+        self.index = index
+        self.start_block = start_block
+        self.chunk_size = chunk_size
+        self.confirmations = confirmations
+        self.poll_interval = poll_interval
+        self._thread = None
+        self._listeners = []
+
+    def add_listener(self, callback):
+        """Callback appelé avec (minted, revoked) après chaque lot indexé"""
+        self._listeners.append(callback)
+
+    def start(self):
+        """Démarre l'indexation en tâche de fond"""
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='diploma-indexer', daemon=True)
+            self._thread.start()
+
+    def is_running(self):
+        """Vrai si l'indexation tourne en tâche de fond"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"⚠️ Erreur de l'indexeur: {e}")
+            time.sleep(self.poll_interval)
+
+    def sync(self):
+        """Indexe tous les blocs confirmés depuis le dernier checkpoint"""
+        client = self.blockchain.get()
+        checkpoint_name = f"logs:{client.contract_address.lower()}"
+
+        safe_block = client.w3.eth.block_number - self.confirmations
+        checkpoint = self.index.get_checkpoint(checkpoint_name)
+        if checkpoint is None:
+            # Premier démarrage: tout l'historique du contrat, depuis son déploiement
+            start = self.start_block
+            if start is None:
+                start = find_deployment_block(client.w3, client.contract.address, safe_block)
+            print(f"📚 Indexation initiale des blocs {start}-{safe_block}")
+            checkpoint = start - 1
+
+        minted_event = client.contract.events.DiplomaMinted()
+        revoked_event = client.contract.events.DiplomaRevoked()
+        minted_topic = Web3.to_hex(Web3.keccak(text='DiplomaMinted(uint256,address,string)'))
+        revoked_topic = Web3.to_hex(Web3.keccak(text='DiplomaRevoked(uint256)'))
+
+        from_block = checkpoint + 1
+        chunk_size = self.chunk_size
+        while from_block <= safe_block:
+            to_block = min(from_block + chunk_size - 1, safe_block)
+            try:
+                logs = client.w3.eth.get_logs({
+                    'address': client.contract.address,
+                    'fromBlock': from_block,
+                    'toBlock': to_block,
+                    'topics': [[minted_topic, revoked_topic]]
+                })
+            except Exception as e:
+                # Plage trop large pour le nœud: réduire la taille des lots
+                if chunk_size > 1:
+                    chunk_size = max(1, chunk_size // 2)
+                    continue
+                raise
+
+            minted = []
+            revoked = []
+            for log in logs:
+                if Web3.to_hex(log['topics'][0]) == minted_topic:
+                    event = minted_event.process_log(log)
+                    minted.append({
+                        'token_id': event['args']['tokenId'],
+                        'wallet_address': event['args']['student'],
+                        'student_name': event['args']['studentName'],
+                        'tx_hash': Web3.to_hex(event['transactionHash']),
+                        'block_number': event['blockNumber']
+                    })
+                else:
+                    revoked.append(revoked_event.process_log(log)['args']['tokenId'])
+
+            self.index.apply_events(minted, revoked, to_block, checkpoint_name)
+            if minted or revoked:
+                print(f"📚 Blocs {from_block}-{to_block}: {len(minted)} mint(s), {len(revoked)} révocation(s)")
+                for listener in self._listeners:
+                    listener(minted, revoked)
+
+            from_block = to_block + 1
+
+
+def find_deployment_block(w3, address, latest_block):
+    """
+    Premier bloc où le contrat a du code (recherche dichotomique sur eth_getCode)
+
+    Environ log2(latest_block) appels. Un nœud sans historique (non archive) peut
+    refuser eth_getCode sur un ancien bloc: l'indexation part alors du bloc 0.
+    """
+    try:
+        if not w3.eth.get_code(address, latest_block):
+            return 0
+        low, high = 0, latest_block
+        while low < high:
+            middle = (low + high) // 2
+            if w3.eth.get_code(address, middle):
+                high = middle
+            else:
+                low = middle + 1
+        return low
+    except Exception as e:
+        print(f"⚠️ Bloc de déploiement introuvable ({e}): indexation depuis le bloc 0")
+        return 0
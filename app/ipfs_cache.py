@@ -0,0 +1,181 @@
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.cid import CIDBuilder
+
+# CIDv1 en base32 (seul format vérifiable localement, cf. app/cid.py)
+CIDV1_PATTERN = re.compile(r'^b[a-z2-7]{20,100}$')
+
+
+class IPFSCache:
+    """
+    Cache disque des contenus IPFS, adressé par CID.
+
+    Un contenu ne change jamais sous un même CID: une fois vérifié, un fichier
+    reste valable indéfiniment; seul l'espace disque limite le cache (LRU).
+    """
+
+    def __init__(self, directory, max_bytes, gateway_url, max_object_size, timeout=60, local_store=None):
+        """
+        Args:
+            directory: Dossier du cache
+            max_bytes: Taille totale maximale du cache (octets)
+            gateway_url: Passerelle IPFS interrogée en cas d'absence
+            max_object_size: Taille maximale d'un contenu téléchargé (octets)
+            timeout: Timeout des requêtes vers la passerelle (secondes)
+            local_store: Magasin local consulté avant la passerelle (FilesystemIPFSService)
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.gateway_url = gateway_url
+        self.max_object_size = max_object_size
+        self.timeout = timeout
+        self.local_store = local_store
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._lock = threading.Lock()
+        self._fetch_locks = {}
+        self._entries = OrderedDict()
+        self._size = 0
+        self._counters = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._load()
+
+    def _load(self):
+        """Reconstruit l'index LRU depuis le disque (dernier accès = mtime)"""
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                path = os.path.join(root, name)
+                if name.endswith('.part'):
+                    os.remove(path)
+                    continue
+                stat = os.stat(path)
+                found.append((stat.st_mtime, name, stat.st_size))
+        for _, cid, size in sorted(found):
+            self._entries[cid] = size
+            self._size += size
+
+    def path(self, cid):
+        return os.path.join(self.directory, cid[-2:], cid)
+
+    # -------------------------------------------------------------------
+    # Lecture
+    # -------------------------------------------------------------------
+    def get(self, cid):
+        """
+        Chemin local d'un contenu, téléchargé et vérifié si nécessaire
+
+        Raises:
+            ValueError: Contenu trop volumineux ou ne correspondant pas au CID
+            requests.RequestException: Passerelle injoignable ou en erreur
+        """
+        if self._touch(cid):
+            return self.path(cid)
+
+        # Un seul téléchargement par CID, même si plusieurs requêtes arrivent ensemble
+        with self._lock:
+            fetch_lock = self._fetch_locks.setdefault(cid, threading.Lock())
+        with fetch_lock:
+            try:
+                if self._touch(cid, count=False):
+                    return self.path(cid)
+                self._fetch(cid)
+                return self.path(cid)
+            finally:
+                with self._lock:
+                    self._fetch_locks.pop(cid, None)
+
+    def _touch(self, cid, count=True):
+        with self._lock:
+            if cid not in self._entries:
+                if count:
+                    self._counters['misses'] += 1
+                return False
+            self._entries.move_to_end(cid)
+            if count:
+                self._counters['hits'] += 1
+        try:
+            os.utime(self.path(cid))
+        except FileNotFoundError:
+            with self._lock:
+                self._size -= self._entries.pop(cid, 0)
+            return False
+        return True
+
+    def _blocks(self, cid):
+        """Contenu d'un CID par blocs: magasin local s'il le contient, sinon passerelle"""
+        if self.local_store is not None and os.path.exists(self.local_store.path(cid)):
+            with open(self.local_store.path(cid), 'rb') as f:
+                yield from iter(lambda: f.read(65536), b'')
+            return
+
+        print(f"📥 Récupération de {cid} depuis la passerelle IPFS")
+        with self.session.get(f'{self.gateway_url}{cid}', stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            yield from response.iter_content(65536)
+
+    def _fetch(self, cid):
+        os.makedirs(os.path.dirname(self.path(cid)), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path(cid)), suffix='.part')
+        try:
+            builder = CIDBuilder()
+            with os.fdopen(fd, 'wb') as f:
+                for block in self._blocks(cid):
+                    builder.update(block)
+                    if builder.size > self.max_object_size:
+                        raise ValueError('Contenu IPFS trop volumineux')
+                    f.write(block)
+
+            if builder.hexdigest() != cid:
+                raise ValueError('Le contenu reçu ne correspond pas au CID')
+            self.put(cid, tmp_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    # -------------------------------------------------------------------
+    # Écriture
+    # -------------------------------------------------------------------
+    def put(self, cid, file_path):
+        """Déplace dans le cache un fichier dont le CID est déjà vérifié"""
+        path = self.path(cid)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(file_path, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._size += size - self._entries.get(cid, 0)
+            self._entries[cid] = size
+            self._entries.move_to_end(cid)
+            evicted = []
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                old_cid, old_size = self._entries.popitem(last=False)
+                self._size -= old_size
+                self._counters['evictions'] += 1
+                evicted.append(old_cid)
+        for old_cid in evicted:
+            try:
+                os.remove(self.path(old_cid))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self._counters['hits'] + self._counters['misses']
+            return {
+                **self._counters,
+                'entries': len(self._entries),
+                'size': self._size,
+                'max_bytes': self.max_bytes,
+                'hit_rate': round(self._counters['hits'] / lookups, 4) if lookups else 0.0
+            }
@@ -1,10 +1,267 @@
 ﻿import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import json
+import os
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from app.cid import compute_cid, compute_file_cid, json_bytes
 
-class IPFSService:
+class MultipartFileBody:
+    """Corps multipart/form-data dont le fichier est envoyé par blocs depuis le disque"""
+    
+    def __init__(self, fields, file_field, file_name, file_path, block_size=65536):
+        """
+        Args:
+            fields: Champs texte du formulaire
+            file_field: Nom du champ fichier
+            file_name: Nom du fichier transmis
+            file_path: Chemin du fichier sur disque
+            block_size: Taille des blocs lus et envoyés
+        """
+        self.boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={self.boundary}'
+        self.file_path = file_path
+        self.block_size = block_size
+        
+        head = b''
+        for name, value in fields.items():
+            head += (
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+                f'{value}\r\n'
+            ).encode('utf-8')
+        safe_name = file_name.replace('"', '%22')
+        head += (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{file_field}"; filename="{safe_name}"\r\n'
+            f'Content-Type: application/octet-stream\r\n\r\n'
+        ).encode('utf-8')
+        self._head = head
+        self._tail = f'\r\n--{self.boundary}--\r\n'.encode('utf-8')
+    
+    def __len__(self):
+        # Longueur connue: requests envoie un Content-Length au lieu d'un corps chunked
+        return len(self._head) + os.path.getsize(self.file_path) + len(self._tail)
+    
+    def __iter__(self):
+        # Ré-itérable: chaque nouvelle tentative relit le fichier depuis le début
+        yield self._head
+        with open(self.file_path, 'rb') as f:
+            for block in iter(lambda: f.read(self.block_size), b''):
+                yield block
+        yield self._tail
+
+
+def pooled_session(pool_size=10, max_retries=3, backoff_factor=0.5):
+    """
+    Session HTTP keep-alive avec nouvelles tentatives (5xx, 429 avec Retry-After, erreurs réseau)
+    
+    Les POST sont rejoués eux aussi: épingler deux fois un même contenu donne le même CID.
+    """
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET', 'POST', 'DELETE']),
+        respect_retry_after_header=True,
+        raise_on_status=False
+    )
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class PinnedResultMixin:
+    """
+    Dicts de résultat et lecture de l'index des pins, partagés par les services
+    synchrones (BaseIPFSService) et asyncio (AsyncIPFSService)
+    
+    Attend les attributs gateway_url et pin_index.
+    """
+    
+    def _result(self, ipfs_hash, size, timestamp):
+        """Dict de résultat commun à tous les backends"""
+        return {
+            'success': True,
+            'ipfs_hash': ipfs_hash,
+            'url': f'{self.gateway_url}{ipfs_hash}',
+            'size': size,
+            'timestamp': timestamp
+        }
+    
+    def _find_pinned(self, local_cid):
+        """Résultat d'upload déjà connu pour ce CID (évite un nouvel upload)"""
+        if self.pin_index is None or local_cid is None:
+            return None
+        pin = self.pin_index.get(local_cid)
+        if pin is None:
+            return None
+        print(f"♻️ Contenu déjà épinglé: {pin['ipfs_hash']}")
+        return self._result(pin['ipfs_hash'], pin['size'], pin['timestamp'])
+
+
+class BaseIPFSService(PinnedResultMixin, ABC):
+    """
+    Socle commun des backends de stockage IPFS (Pinata, Kubo, système de fichiers)
+    
+    Les backends implémentent _pin_file, _pin_json et list_pins; la déduplication
+    par CID local et l'upload groupé d'un diplôme sont communs.
+    """
+    
+    # Nom du backend (journaux, configuration IPFS_BACKEND)
+    name = None
+    
+    def __init__(self, gateway_url, pin_index=None, max_workers=10):
+        """
+        Args:
+            gateway_url: Passerelle utilisée pour construire les URLs des contenus
+            pin_index: Index local des contenus déjà épinglés (PinIndex, optionnel)
+            max_workers: Nombre d'uploads menés en parallèle
+        """
+        self.gateway_url = gateway_url
+        self.pin_index = pin_index
+        
+        # Uploads menés en parallèle (métadonnées pendant le PDF)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f'ipfs-{self.name}')
+    
+    @abstractmethod
+    def _pin_file(self, file_path, file_name):
+        """Épingle un fichier et renvoie le résultat (_result)"""
+    
+    @abstractmethod
+    def _pin_json(self, metadata, name):
+        """Épingle des métadonnées JSON et renvoie le résultat (_result)"""
+    
+    @abstractmethod
+    def list_pins(self, page_size=1000):
+        """
+        Parcourt tous les contenus épinglés par pages
+
+        Yields:
+            dict: ipfs_hash, size, date_pinned (datetime UTC), name, kind
+        """
+    
+    def upload_file(self, file_path, file_name, cid=None):
+        """
+        Upload un fichier sur IPFS
+        
+        Args:
+            file_path: Chemin du fichier à uploader
+            file_name: Nom du fichier
+            cid: CID déjà calculé localement (évite une relecture du fichier)
+        
+        Returns:
+            dict: Résultat de l'upload
+        """
+        # Déduplication: même contenu => même CID, inutile de le renvoyer
+        local_cid = None
+        if self.pin_index is not None:
+            try:
+                local_cid = cid or compute_file_cid(file_path)
+            except Exception as e:
+                return {
+                    'success': False,
+                    'error': f'Erreur lors de l\'upload du fichier: {str(e)}'
+                }
+            pinned = self._find_pinned(local_cid)
+            if pinned:
+                return pinned
+        
+        upload_result = self._pin_file(file_path, file_name)
+        if upload_result['success'] and local_cid:
+            self.pin_index.add(local_cid, upload_result, file_name, 'diploma')
+        return upload_result
+    
+    def upload_metadata(self, metadata):
+        """
+        Upload des métadonnées JSON sur IPFS
+        
+        Args:
+            metadata: Dictionnaire de métadonnées
+        
+        Returns:
+            dict: Résultat de l'upload
+        """
+        name = f"metadata_{metadata.get('name', 'unknown')}"
+        
+        # Déduplication sur le CID du JSON tel que Pinata le sérialise
+        local_cid = None
+        if self.pin_index is not None:
+            local_cid = compute_cid(json_bytes(metadata))
+            pinned = self._find_pinned(local_cid)
+            if pinned:
+                return pinned
+        
+        upload_result = self._pin_json(metadata, name)
+        if upload_result['success'] and local_cid:
+            self.pin_index.add(local_cid, upload_result, name, 'diploma_metadata')
+        return upload_result
+    
+    def pin_diploma_bundle(self, pdf_path, pdf_name, metadata_template, pdf_cid=None):
+        """
+        Épingler le PDF d'un diplôme et ses métadonnées en parallèle
+        
+        Le CID du PDF est calculé localement: les métadonnées peuvent y faire
+        référence avant même que Pinata ait répondu pour le PDF.
+        
+        Args:
+            pdf_path: Chemin du PDF sur disque
+            pdf_name: Nom du fichier sur IPFS
+            metadata_template: Fonction construisant les métadonnées à partir de l'URL du PDF
+            pdf_cid: CID du PDF déjà calculé (optionnel)
+        
+        Returns:
+            dict: Résultats des deux uploads ('pdf' et 'metadata')
+        """
+        try:
+            local_cid = pdf_cid or compute_file_cid(pdf_path)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Échec de l\'upload IPFS: {str(e)}'
+            }
+        
+        metadata = metadata_template(f'{self.gateway_url}{local_cid}')
+        metadata_future = self._executor.submit(self.upload_metadata, metadata)
+        pdf_result = self.upload_file(pdf_path, pdf_name, cid=local_cid)
+        metadata_result = metadata_future.result()
+        
+        if not pdf_result['success']:
+            return {
+                'success': False,
+                'error': f"Échec de l'upload IPFS: {pdf_result.get('error', 'Erreur inconnue')}"
+            }
+        
+        if pdf_result['ipfs_hash'] != local_cid:
+            # Paramètres de découpage différents côté Pinata: les métadonnées pointent
+            # vers un CID inexistant, les renvoyer avec l'URL réelle du PDF
+            print(f"⚠️ CID inattendu pour {pdf_name}: {pdf_result['ipfs_hash']} (attendu {local_cid})")
+            metadata_result = self.upload_metadata(metadata_template(pdf_result['url']))
+        
+        if not metadata_result['success']:
+            return {
+                'success': False,
+                'error': f"Échec de l'upload des métadonnées: {metadata_result.get('error', 'Erreur inconnue')}"
+            }
+        
+        return {
+            'success': True,
+            'pdf': pdf_result,
+            'metadata': metadata_result
+        }
+
+
+class IPFSService(BaseIPFSService):
     """Service de gestion IPFS via Pinata"""
     
-    def __init__(self, api_key, secret_key, jwt):
+    name = 'pinata'
+    
+    def __init__(self, api_key, secret_key, jwt, pin_index=None, pool_size=10, max_retries=3, backoff_factor=0.5):
         """
         Initialiser le service IPFS
         
@@ -12,74 +269,64 @@ class IPFSService:
             api_key: Clé API Pinata
             secret_key: Clé secrète Pinata
             jwt: JWT Token Pinata
+            pin_index: Index local des contenus déjà épinglés (PinIndex, optionnel)
+            pool_size: Nombre de connexions keep-alive gardées vers Pinata
+            max_retries: Nombre maximal de nouvelles tentatives (5xx, 429, erreurs réseau)
+            backoff_factor: Base de l'attente exponentielle entre deux tentatives (secondes)
         """
+        super().__init__('https://gateway.pinata.cloud/ipfs/', pin_index, max_workers=pool_size)
         self.api_key = api_key
         self.secret_key = secret_key
         self.jwt = jwt
         self.pinata_api_url = 'https://api.pinata.cloud/pinning/pinFileToIPFS'
         self.pinata_json_url = 'https://api.pinata.cloud/pinning/pinJSONToIPFS'
-        self.gateway_url = 'https://gateway.pinata.cloud/ipfs/'
-    
-    def upload_file(self, file_path, file_name):
-        """
-        Upload un fichier sur IPFS via Pinata
-        
-        Args:
-            file_path: Chemin du fichier à uploader
-            file_name: Nom du fichier
         
-        Returns:
-            dict: Résultat de l'upload
-        """
+        # Session keep-alive partagée: une seule poignée de main TCP+TLS par connexion
+        self.session = pooled_session(pool_size, max_retries, backoff_factor)
+    
+    def _pin_file(self, file_path, file_name):
+        """Upload un fichier sur IPFS via Pinata"""
         try:
             # Préparer les headers
             headers = {
                 'Authorization': f'Bearer {self.jwt}'
             }
             
-            # Ouvrir et uploader le fichier
-            with open(file_path, 'rb') as f:
-                files = {
-                    'file': (file_name, f)
-                }
-                
-                # Métadonnées optionnelles
-                pinata_metadata = {
-                    'name': file_name,
-                    'keyvalues': {
-                        'type': 'diploma',
-                        'uploaded_at': str(int(__import__('time').time()))
-                    }
+            # Métadonnées optionnelles
+            pinata_metadata = {
+                'name': file_name,
+                'keyvalues': {
+                    'type': 'diploma',
+                    'uploaded_at': str(int(__import__('time').time()))
                 }
-                
-                data = {
+            }
+            
+            # Corps multipart lu par blocs depuis le disque (pas de copie en mémoire)
+            body = MultipartFileBody(
+                {
                     'pinataMetadata': json.dumps(pinata_metadata),
                     'pinataOptions': json.dumps({
                         'cidVersion': 1
                     })
-                }
-                
-                # Envoyer la requête
-                response = requests.post(
-                    self.pinata_api_url,
-                    files=files,
-                    data=data,
-                    headers=headers,
-                    timeout=120  # 2 minutes timeout
-                )
+                },
+                'file', file_name, file_path
+            )
+            headers['Content-Type'] = body.content_type
+            
+            # Envoyer la requête
+            response = self.session.post(
+                self.pinata_api_url,
+                data=body,
+                headers=headers,
+                timeout=120  # 2 minutes timeout
+            )
             
             # Vérifier la réponse
             if response.status_code == 200:
                 result = response.json()
                 ipfs_hash = result['IpfsHash']
                 
-                return {
-                    'success': True,
-                    'ipfs_hash': ipfs_hash,
-                    'url': f'{self.gateway_url}{ipfs_hash}',
-                    'size': result.get('PinSize', 0),
-                    'timestamp': result.get('Timestamp', '')
-                }
+                return self._result(ipfs_hash, result.get('PinSize', 0), result.get('Timestamp', ''))
             else:
                 error_message = response.text
                 try:
@@ -109,16 +356,8 @@ class IPFSService:
                 'error': f'Erreur lors de l\'upload du fichier: {str(e)}'
             }
     
-    def upload_metadata(self, metadata):
-        """
-        Upload des métadonnées JSON sur IPFS via Pinata
-        
-        Args:
-            metadata: Dictionnaire de métadonnées
-        
-        Returns:
-            dict: Résultat de l'upload
-        """
+    def _pin_json(self, metadata, name):
+        """Upload des métadonnées JSON sur IPFS via Pinata"""
         try:
             # Préparer les headers
             headers = {
@@ -130,7 +369,7 @@ class IPFSService:
             data = {
                 'pinataContent': metadata,
                 'pinataMetadata': {
-                    'name': f"metadata_{metadata.get('name', 'unknown')}",
+                    'name': name,
                     'keyvalues': {
                         'type': 'diploma_metadata',
                         'student': metadata.get('name', ''),
@@ -143,7 +382,7 @@ class IPFSService:
             }
             
             # Envoyer la requête
-            response = requests.post(
+            response = self.session.post(
                 self.pinata_json_url,
                 json=data,
                 headers=headers,
@@ -155,13 +394,7 @@ class IPFSService:
                 result = response.json()
                 ipfs_hash = result['IpfsHash']
                 
-                return {
-                    'success': True,
-                    'ipfs_hash': ipfs_hash,
-                    'url': f'{self.gateway_url}{ipfs_hash}',
-                    'size': result.get('PinSize', 0),
-                    'timestamp': result.get('Timestamp', '')
-                }
+                return self._result(ipfs_hash, result.get('PinSize', 0), result.get('Timestamp', ''))
             else:
                 error_message = response.text
                 try:
@@ -191,6 +424,41 @@ class IPFSService:
                 'error': f'Erreur lors de l\'upload des métadonnées: {str(e)}'
             }
     
+    def list_pins(self, page_size=1000):
+        """
+        Parcourt la liste des pins Pinata par pages (pageLimit/pageOffset)
+        
+        Yields:
+            dict: ipfs_hash, size, date_pinned (datetime UTC), name, kind
+        """
+        headers = {
+            'Authorization': f'Bearer {self.jwt}'
+        }
+        offset = 0
+        while True:
+            response = self.session.get(
+                'https://api.pinata.cloud/data/pinList',
+                params={'status': 'pinned', 'pageLimit': page_size, 'pageOffset': offset},
+                headers=headers,
+                timeout=60
+            )
+            if response.status_code != 200:
+                raise Exception(f'Erreur Pinata ({response.status_code}): {response.text}')
+            
+            rows = response.json().get('rows', [])
+            for pin in rows:
+                metadata = pin.get('metadata') or {}
+                yield {
+                    'ipfs_hash': pin['ipfs_pin_hash'],
+                    'size': pin.get('size', 0),
+                    'date_pinned': datetime.fromisoformat(pin['date_pinned'].replace('Z', '+00:00')),
+                    'name': metadata.get('name', ''),
+                    'kind': (metadata.get('keyvalues') or {}).get('type')
+                }
+            if len(rows) < page_size:
+                return
+            offset += len(rows)
+    
     def get_file_info(self, ipfs_hash):
         """
         Récupérer les informations d'un fichier sur IPFS
@@ -206,7 +474,7 @@ class IPFSService:
                 'Authorization': f'Bearer {self.jwt}'
             }
             
-            response = requests.get(
+            response = self.session.get(
                 f'https://api.pinata.cloud/data/pinList?hashContains={ipfs_hash}',
                 headers=headers,
                 timeout=30
@@ -255,13 +523,15 @@ class IPFSService:
                 'Authorization': f'Bearer {self.jwt}'
             }
             
-            response = requests.delete(
+            response = self.session.delete(
                 f'https://api.pinata.cloud/pinning/unpin/{ipfs_hash}',
                 headers=headers,
                 timeout=30
             )
             
             if response.status_code == 200:
+                if self.pin_index is not None:
+                    self.pin_index.remove(ipfs_hash)
                 return {
                     'success': True,
                     'message': f'Fichier {ipfs_hash} supprimé avec succès'
@@ -290,7 +560,7 @@ class IPFSService:
                 'Authorization': f'Bearer {self.jwt}'
             }
             
-            response = requests.get(
+            response = self.session.get(
                 'https://api.pinata.cloud/data/testAuthentication',
                 headers=headers,
                 timeout=10
@@ -329,7 +599,7 @@ class IPFSService:
                 'Authorization': f'Bearer {self.jwt}'
             }
             
-            response = requests.get(
+            response = self.session.get(
                 'https://api.pinata.cloud/data/userPinnedDataTotal',
                 headers=headers,
                 timeout=30
@@ -0,0 +1,357 @@
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+
+# Étapes successives d'un job de minting
+STAGES = ['stored', 'pdf_pinned', 'metadata_pinned', 'tx_sent', 'confirmed']
+
+# Attente maximale (secondes) avant de réattendre le receipt d'une transaction envoyée
+MAX_RECEIPT_RETRY_DELAY = 600
+
+
+class MintJobQueue:
+    """File de jobs de minting exécutés en arrière-plan"""
+
+    def __init__(self, ipfs_service, db_path, blockchain, max_workers=4, on_confirmed=None,
+                 ipfs_cache=None, receipt_retry_delay=30):
+        """
+        Initialiser la file de jobs
+
+        Args:
+            ipfs_service: Service IPFS partagé (IPFSService)
+            db_path: Chemin de la base SQLite des jobs
+            blockchain: Client BlockchainNFT partagé (SharedBlockchainNFT)
+            max_workers: Nombre de workers en parallèle
+            on_confirmed: Callback appelé avec l'étudiant une fois le NFT confirmé
+            ipfs_cache: Cache IPFS local à alimenter avec les PDF épinglés (optionnel)
+            receipt_retry_delay: Attente initiale (secondes, doublée à chaque essai) avant de
+                réattendre le receipt d'une transaction non minée dans le délai
+        """
+        self.ipfs_service = ipfs_service
+        self.db_path = db_path
+        self.blockchain = blockchain
+        self.on_confirmed = on_confirmed
+        self.ipfs_cache = ipfs_cache
+        self.receipt_retry_delay = receipt_retry_delay
+        self._receipt_retries = {}
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='mint-job')
+        self._lock = threading.Lock()
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS mint_jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                stage TEXT,
+                stages TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                pdf_path TEXT,
+                pdf_filename TEXT,
+                pdf_cid TEXT,
+                ipfs_url TEXT,
+                metadata_url TEXT,
+                tx_hash TEXT,
+                token_id INTEGER,
+                result TEXT,
+                error TEXT,
+                created_at TEXT NOT NULL,
+                updated_at TEXT NOT NULL
+            )
+        ''')
+        # Colonne ajoutée après coup: migrer les bases existantes
+        columns = [row['name'] for row in conn.execute('PRAGMA table_info(mint_jobs)')]
+        if 'pdf_cid' not in columns:
+            conn.execute('ALTER TABLE mint_jobs ADD COLUMN pdf_cid TEXT')
+        conn.commit()
+        conn.close()
+
+    # -------------------------------------------------------------------
+    # API publique
+    # -------------------------------------------------------------------
+    def submit(self, payload, pdf_path, pdf_filename, pdf_cid=None):
+        """
+        Persister une demande de minting et la confier aux workers
+
+        Args:
+            payload: Champs du formulaire (nom, prenom, email...)
+            pdf_path: Chemin du PDF déjà enregistré sur disque
+            pdf_filename: Nom du fichier à utiliser sur IPFS
+            pdf_cid: CID du PDF calculé pendant la réception (optionnel)
+
+        Returns:
+            str: Identifiant du job
+        """
+        job_id = uuid.uuid4().hex
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        conn = self._connect()
+        conn.execute(
+            '''INSERT INTO mint_jobs (id, status, stage, stages, payload, pdf_path, pdf_filename,
+                                      pdf_cid, created_at, updated_at)
+               VALUES (?, 'pending', 'stored', ?, ?, ?, ?, ?, ?, ?)''',
+            (job_id, json.dumps({'stored': now}), json.dumps(payload, ensure_ascii=False),
+             pdf_path, pdf_filename, pdf_cid, now, now)
+        )
+        conn.commit()
+        conn.close()
+
+        self.executor.submit(self._run, job_id)
+        return job_id
+
+    def get(self, job_id):
+        """Retourne l'état d'un job (ou None s'il n'existe pas)"""
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM mint_jobs WHERE id = ?', (job_id,)).fetchone()
+        conn.close()
+        if not row:
+            return None
+
+        done = json.loads(row['stages'])
+        return {
+            'id': row['id'],
+            'status': row['status'],
+            'stage': row['stage'],
+            'stages': [
+                {'name': name, 'done': name in done, 'at': done.get(name)}
+                for name in STAGES
+            ],
+            'ipfs_url': row['ipfs_url'],
+            'metadata_url': row['metadata_url'],
+            'tx_hash': row['tx_hash'],
+            'token_id': row['token_id'],
+            'data': json.loads(row['result']) if row['result'] else None,
+            'error': row['error'],
+            'created_at': row['created_at'],
+            'updated_at': row['updated_at']
+        }
+
+    def ipfs_references(self):
+        """CIDs et URLs IPFS des jobs non échoués (en cours ou terminés)"""
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT pdf_cid, ipfs_url, metadata_url FROM mint_jobs WHERE status != 'failed'"
+        ).fetchall()
+        conn.close()
+        return [value for row in rows for value in row if value]
+
+    def resume_pending(self):
+        """
+        Relance les jobs non terminés (après un redémarrage)
+
+        Les jobs dont la transaction a été envoyée (tx_hash connu) ne sont pas
+        mintés à nouveau: leur receipt est simplement attendu.
+        """
+        conn = self._connect()
+        rows = conn.execute(
+            "SELECT id FROM mint_jobs WHERE status IN ('pending', 'running') ORDER BY created_at"
+        ).fetchall()
+        conn.execute("UPDATE mint_jobs SET status = 'pending' WHERE status = 'running'")
+        conn.commit()
+        conn.close()
+
+        for row in rows:
+            self.executor.submit(self._run, row['id'])
+        return len(rows)
+
+    # -------------------------------------------------------------------
+    # Exécution d'un job
+    # -------------------------------------------------------------------
+    def _update(self, job_id, stage=None, **fields):
+        now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        with self._lock:
+            conn = self._connect()
+            if stage:
+                row = conn.execute('SELECT stages FROM mint_jobs WHERE id = ?', (job_id,)).fetchone()
+                stages = json.loads(row['stages'])
+                stages[stage] = now
+                fields['stage'] = stage
+                fields['stages'] = json.dumps(stages)
+            fields['updated_at'] = now
+            columns = ', '.join(f'{name} = ?' for name in fields)
+            conn.execute(f'UPDATE mint_jobs SET {columns} WHERE id = ?', (*fields.values(), job_id))
+            conn.commit()
+            conn.close()
+
+    def _claim(self, job_id):
+        """Marque le job comme en cours; False s'il est déjà pris ou terminé"""
+        with self._lock:
+            conn = self._connect()
+            cursor = conn.execute(
+                "UPDATE mint_jobs SET status = 'running' WHERE id = ? AND status = 'pending'",
+                (job_id,)
+            )
+            conn.commit()
+            row = conn.execute('SELECT * FROM mint_jobs WHERE id = ?', (job_id,)).fetchone()
+            conn.close()
+        return row if cursor.rowcount == 1 else None
+
+    def _run(self, job_id):
+        job = self._claim(job_id)
+        if job is None:
+            return
+
+        try:
+            result = self._process(job_id, job)
+        except Exception as e:
+            result = {'success': False, 'error': f'Erreur serveur: {str(e)}'}
+
+        with self._lock:
+            attempt = self._receipt_retries.pop(job_id, 0)
+
+        if result['success']:
+            self._update(job_id, status='done', error=None,
+                         result=json.dumps(result['data'], ensure_ascii=False))
+            if self.on_confirmed:
+                # Le NFT est minté: une erreur d'indexation locale ne fait pas échouer le job
+                try:
+                    self.on_confirmed(result['data'])
+                except Exception as e:
+                    print(f"⚠️ Job {job_id} confirmé mais non indexé: {e}")
+        elif result.get('tx_hash') and result.get('pending'):
+            # Transaction envoyée mais pas encore minée: le job reste à l'étape tx_sent
+            # et son receipt est de nouveau attendu un peu plus tard (sans nouveau mint)
+            self._update(job_id, status='pending', tx_hash=result['tx_hash'], error=result['error'])
+            self._retry_later(job_id, attempt)
+            return
+        else:
+            self._update(job_id, status='failed', error=result['error'])
+
+        # Le PDF épinglé sous son CID local alimente le cache IPFS; sinon il n'est plus utile
+        if job['pdf_path'] and os.path.exists(job['pdf_path']):
+            ipfs_url = result['data']['ipfs_url'] if result['success'] else None
+            if self.ipfs_cache and job['pdf_cid'] and ipfs_url and ipfs_url.endswith(f"/{job['pdf_cid']}"):
+                self.ipfs_cache.put(job['pdf_cid'], job['pdf_path'])
+            else:
+                os.remove(job['pdf_path'])
+
+    def _retry_later(self, job_id, attempt):
+        """Relance le job après une attente croissante (attempt: nombre d'essais précédents)"""
+        with self._lock:
+            self._receipt_retries[job_id] = attempt + 1
+        delay = min(self.receipt_retry_delay * 2 ** attempt, MAX_RECEIPT_RETRY_DELAY)
+        timer = threading.Timer(delay, self._resubmit, (job_id,))
+        timer.daemon = True
+        timer.start()
+
+    def _resubmit(self, job_id):
+        try:
+            self.executor.submit(self._run, job_id)
+        except RuntimeError:
+            # File arrêtée entre-temps: le job reste pending, repris par resume_pending
+            pass
+
+    def _process(self, job_id, job):
+        payload = json.loads(job['payload'])
+        nom = payload['nom']
+        prenom = payload['prenom']
+        diplome = payload['diplome']
+        specialite = payload['specialite']
+        institution = payload['institution']
+
+        blockchain = self.blockchain.get()
+
+        ipfs_url = job['ipfs_url']
+        metadata_url = job['metadata_url']
+
+        if job['tx_hash']:
+            # Transaction déjà envoyée avant un redémarrage: ne pas minter deux fois
+            mint_result = blockchain.wait_for_mint(job['tx_hash'])
+        else:
+            # 1-2. Upload du PDF et des métadonnées NFT en parallèle (CID du PDF calculé localement)
+            if not ipfs_url:
+                bundle = self.ipfs_service.pin_diploma_bundle(
+                    job['pdf_path'],
+                    job['pdf_filename'],
+                    lambda pdf_url: build_metadata(payload, pdf_url),
+                    pdf_cid=job['pdf_cid']
+                )
+                if not bundle['success']:
+                    return {'success': False, 'error': bundle['error']}
+                ipfs_url = bundle['pdf']['url']
+                metadata_url = bundle['metadata']['url']
+                self._update(job_id, stage='pdf_pinned', ipfs_url=ipfs_url)
+                self._update(job_id, stage='metadata_pinned', metadata_url=metadata_url)
+
+            # Reprise d'un job interrompu entre l'upload du PDF et celui des métadonnées
+            if not metadata_url:
+                metadata = build_metadata(payload, ipfs_url)
+                metadata_result = self.ipfs_service.upload_metadata(metadata)
+                if not metadata_result['success']:
+                    return {
+                        'success': False,
+                        'error': f"Échec de l'upload des métadonnées: {metadata_result.get('error', 'Erreur inconnue')}"
+                    }
+                metadata_url = metadata_result['url']
+                self._update(job_id, stage='metadata_pinned', metadata_url=metadata_url)
+
+            # 3. Minter le NFT sur la blockchain
+            mint_result = blockchain.mint_diploma(
+                payload['wallet_address'],
+                metadata_url,
+                f"{nom} {prenom}",
+                f"{diplome} - {specialite}",
+                institution,
+                on_tx_sent=lambda tx_hash: self._update(job_id, stage='tx_sent', tx_hash=tx_hash)
+            )
+
+        if not mint_result['success']:
+            return {
+                'success': False,
+                'error': mint_result.get('error', 'Erreur lors du minting'),
+                'tx_hash': mint_result.get('tx_hash'),
+                'pending': mint_result.get('pending', False)
+            }
+
+        self._update(job_id, stage='confirmed', token_id=mint_result['token_id'])
+
+        etudiant = {
+            'nom': nom,
+            'prenom': prenom,
+            'email': payload['email'],
+            'wallet_address': payload['wallet_address'],
+            'diplome': diplome,
+            'specialite': specialite,
+            'institution': institution,
+            'moyenne': payload.get('moyenne'),
+            'mention': payload.get('mention'),
+            'nft_token_id': mint_result['token_id'],
+            'tx_hash': mint_result['tx_hash'],
+            'ipfs_url': ipfs_url,
+            'metadata_url': metadata_url,
+            'date_ajout': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        }
+        return {'success': True, 'data': etudiant}
+
+
+def build_metadata(payload, pdf_url):
+    """Construit les métadonnées NFT d'un diplôme"""
+    nom = payload['nom']
+    prenom = payload['prenom']
+    diplome = payload['diplome']
+    specialite = payload['specialite']
+    return {
+        'name': f"Diplôme {diplome} - {nom} {prenom}",
+        'description': f"Diplôme de {diplome} en {specialite} délivré à {nom} {prenom}",
+        'image': pdf_url,
+        'attributes': [
+            {'trait_type': 'Nom', 'value': nom},
+            {'trait_type': 'Prénom', 'value': prenom},
+            {'trait_type': 'Email', 'value': payload['email']},
+            {'trait_type': 'Diplôme', 'value': diplome},
+            {'trait_type': 'Spécialité', 'value': specialite},
+            {'trait_type': 'Institution', 'value': payload['institution']},
+            {'trait_type': "Date d'émission", 'value': payload['date_emission']}
+        ],
+        'external_url': pdf_url
+    }
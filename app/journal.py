@@ -0,0 +1,236 @@
+import json
+import os
+import threading
+import time
+
+
+class StudentJournal:
+    """
+    Persistance des étudiants par journal d'opérations en ajout seul.
+
+    Chaque ajout/suppression écrit une ligne JSON à la fin du journal (coût
+    constant, quel que soit le nombre d'étudiants). Au chargement, le dernier
+    instantané est relu puis le journal rejoué. Au-delà de `compact_threshold`
+    opérations, le journal est replié en arrière-plan dans un nouvel instantané.
+
+    Fichiers (pour DATA_FILE = etudiants.json):
+        etudiants.json      instantané (liste JSON, même format qu'avant)
+        etudiants.json.log  opérations depuis l'instantané
+        etudiants.json.old  journal en cours de compaction
+        etudiants.json.tmp  instantané en cours d'écriture
+    """
+
+    def __init__(self, path, compact_threshold=1000, fsync_interval=0.05):
+        """
+        Args:
+            path: Chemin de l'instantané JSON
+            compact_threshold: Nombre d'opérations journalisées avant compaction
+            fsync_interval: Délai maximal (secondes) avant fsync des écritures en attente
+        """
+        self.path = path
+        self.log_path = f'{path}.log'
+        self.old_path = f'{path}.old'
+        self.tmp_path = f'{path}.tmp'
+        self.compact_threshold = compact_threshold
+        self.fsync_interval = fsync_interval
+
+        self.etudiants = []
+        self._lock = threading.Lock()
+        self._dirty = threading.Event()
+        self._log = None
+        self._log_count = 0
+        self._compacting = False
+        self._flusher = None
+
+    # -------------------------------------------------------------------
+    # Chargement et reprise après crash
+    # -------------------------------------------------------------------
+    def load(self):
+        """
+        Relit l'instantané puis rejoue le journal; retourne la liste des étudiants
+
+        Les étudiants en mémoire ne sont remplacés qu'une fois tout relu, et le
+        journal est rouvert même si la lecture échoue: les ajouts suivants restent
+        journalisés.
+        """
+        with self._lock:
+            self._close_log()
+            try:
+                # Compaction interrompue: l'instantané temporaire n'est complet que si
+                # l'ancien journal a déjà été supprimé (il est fsync avant)
+                if os.path.exists(self.tmp_path):
+                    if os.path.exists(self.old_path):
+                        os.remove(self.tmp_path)
+                    else:
+                        os.replace(self.tmp_path, self.path)
+
+                etudiants = []
+                if os.path.exists(self.path):
+                    with open(self.path, 'r', encoding='utf-8') as f:
+                        etudiants = json.load(f)
+
+                # Ancien journal encore présent: terminer la compaction interrompue
+                if os.path.exists(self.old_path):
+                    self._replay(self.old_path, etudiants)
+                    self._write_snapshot(etudiants)
+
+                replayed = self._replay(self.log_path, etudiants)
+                self.etudiants[:] = etudiants
+                self._log_count = replayed
+            finally:
+                self._log = open(self.log_path, 'a', encoding='utf-8')
+
+        if replayed:
+            print(f"✓ {replayed} opérations rejouées depuis le journal")
+        if replayed >= self.compact_threshold:
+            self.compact()
+        self._start_flusher()
+        return self.etudiants
+
+    def _replay(self, path, etudiants):
+        if not os.path.exists(path):
+            return 0
+
+        count = 0
+        valid_size = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Dernière ligne tronquée par un crash en cours d'écriture
+                    break
+                self._apply(record, etudiants)
+                valid_size += len(line)
+                count += 1
+
+        if valid_size < os.path.getsize(path):
+            print(f"⚠️ Fin de journal incomplète ignorée: {path}")
+            with open(path, 'r+b') as f:
+                f.truncate(valid_size)
+        return count
+
+    @staticmethod
+    def _apply(record, etudiants):
+        op = record['op']
+        if op == 'add':
+            etudiants.append(record['etudiant'])
+        elif op == 'delete':
+            etudiants.pop(record['index'])
+        elif op == 'reset':
+            etudiants.clear()
+
+    # -------------------------------------------------------------------
+    # Opérations
+    # -------------------------------------------------------------------
+    def add(self, etudiant):
+        """Ajoute un étudiant"""
+        self._write({'op': 'add', 'etudiant': etudiant})
+
+    def delete(self, index):
+        """Supprime l'étudiant à la position `index` et le retourne"""
+        return self._write({'op': 'delete', 'index': index})
+
+    def reset(self):
+        """Supprime tous les étudiants"""
+        self._write({'op': 'reset'})
+
+    def _write(self, record):
+        result = None
+        with self._lock:
+            # Valider l'opération en mémoire avant de la journaliser
+            if record['op'] == 'delete':
+                result = self.etudiants[record['index']]
+            line = json.dumps(record, ensure_ascii=False) + '\n'
+            self._log.write(line)
+            self._log.flush()
+            self._apply(record, self.etudiants)
+            self._log_count += 1
+            compact = self._log_count >= self.compact_threshold and not self._compacting
+        self._dirty.set()
+
+        if compact:
+            threading.Thread(target=self.compact, name='journal-compaction', daemon=True).start()
+        return result
+
+    # -------------------------------------------------------------------
+    # Durabilité
+    # -------------------------------------------------------------------
+    def _start_flusher(self):
+        if self._flusher is None:
+            self._flusher = threading.Thread(target=self._flush_loop, name='journal-fsync', daemon=True)
+            self._flusher.start()
+
+    def _flush_loop(self):
+        # Un seul fsync pour toutes les écritures arrivées pendant l'intervalle
+        while True:
+            self._dirty.wait()
+            time.sleep(self.fsync_interval)
+            self.sync()
+
+    def sync(self):
+        """Force l'écriture sur disque des opérations journalisées"""
+        with self._lock:
+            self._dirty.clear()
+            if self._log is not None and not self._log.closed:
+                os.fsync(self._log.fileno())
+
+    def close(self):
+        with self._lock:
+            self._close_log()
+
+    def _close_log(self):
+        if self._log is not None and not self._log.closed:
+            self._log.flush()
+            os.fsync(self._log.fileno())
+            self._log.close()
+
+    # -------------------------------------------------------------------
+    # Compaction
+    # -------------------------------------------------------------------
+    def compact(self):
+        """Replie le journal dans un nouvel instantané"""
+        with self._lock:
+            # Compaction précédente en échec: elle sera terminée au prochain chargement
+            if self._compacting or os.path.exists(self.old_path):
+                return
+            self._compacting = True
+            # Le journal courant devient l'ancien; les opérations suivantes partent
+            # dans un journal vide pendant l'écriture de l'instantané
+            self._close_log()
+            os.replace(self.log_path, self.old_path)
+            self._log = open(self.log_path, 'a', encoding='utf-8')
+            self._log_count = 0
+            snapshot = list(self.etudiants)
+
+        try:
+            self._write_snapshot(snapshot)
+            print(f"✓ Journal compacté: {len(snapshot)} étudiants")
+        except Exception as e:
+            print(f"Erreur compaction: {e}")
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def _write_snapshot(self, etudiants):
+        """
+        Écrit l'instantané couvrant l'ancien journal, puis supprime celui-ci.
+
+        Ordre garantissant la reprise (cf. load): instantané temporaire écrit et
+        fsync, ancien journal supprimé, puis instantané temporaire renommé.
+        """
+        with open(self.tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(etudiants, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.remove(self.old_path)
+        os.replace(self.tmp_path, self.path)
+        self._sync_directory()
+
+    def _sync_directory(self):
+        if hasattr(os, 'O_DIRECTORY'):
+            fd = os.open(os.path.dirname(os.path.abspath(self.path)), os.O_DIRECTORY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
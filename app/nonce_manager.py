@@ -0,0 +1,102 @@
+import heapq
+import threading
+
+# Erreurs RPC indiquant que le nonce local n'est plus aligné sur la chaîne
+NONCE_ERRORS = ('nonce too low', 'replacement transaction underpriced')
+
+# Erreurs RPC indiquant que le nœud a déjà reçu cette même transaction signée:
+# elle est diffusée, ce n'est pas un conflit de nonce
+ALREADY_KNOWN_ERRORS = ('already known', 'known transaction')
+
+
+class NonceManager:
+    """
+    Allocation locale des nonces d'un compte (plusieurs transactions en vol)
+
+    Le compteur est propre au processus: plusieurs processus qui signent avec le
+    même compte (workers gunicorn, CLI) ne se coordonnent pas. Leurs collisions
+    se soldent par une erreur "nonce too low" suivie d'une resynchronisation sur
+    la chaîne (cf. _send_transaction); pour un débit soutenu, un seul processus
+    doit signer (MINT_WORKERS threads dans un worker unique).
+    """
+
+    def __init__(self, w3, address):
+        """
+        Args:
+            w3: Instance Web3 utilisée pour se resynchroniser avec la chaîne
+            address: Adresse du compte qui signe les transactions
+        """
+        self.w3 = w3
+        self.address = address
+        self._lock = threading.Lock()
+        self._next = None
+        self._released = []
+        self._in_flight = set()
+
+    def allocate(self):
+        """Réserve le prochain nonce disponible"""
+        with self._lock:
+            # Réutiliser d'abord les nonces libérés pour ne pas laisser de trou
+            if self._released:
+                nonce = heapq.heappop(self._released)
+            else:
+                if self._next is None:
+                    self._sync()
+                nonce = self._next
+                self._next += 1
+            self._in_flight.add(nonce)
+            return nonce
+
+    def done(self, nonce):
+        """Signale qu'une transaction diffusée n'est plus en attente de notre côté"""
+        with self._lock:
+            self._in_flight.discard(nonce)
+
+    def release(self, nonce):
+        """Rend un nonce dont la transaction n'a jamais été diffusée"""
+        with self._lock:
+            self._in_flight.discard(nonce)
+            if self._next is not None and nonce == self._next - 1:
+                self._next = nonce
+            elif nonce not in self._released:
+                heapq.heappush(self._released, nonce)
+
+    def resync(self):
+        """Réaligne le compteur local sur le nombre de transactions de la chaîne"""
+        with self._lock:
+            self._sync()
+
+    def _sync(self):
+        chain_nonce = self.w3.eth.get_transaction_count(self.address, 'pending')
+        # Ne jamais redescendre sous un nonce encore en vol; sans transaction
+        # en vol, la chaîne fait foi (comble les trous laissés par un drop)
+        floor = max(self._in_flight) + 1 if self._in_flight else 0
+        self._next = max(chain_nonce, floor)
+        self._released = [n for n in self._released if chain_nonce <= n < self._next]
+        heapq.heapify(self._released)
+        print(f"🔢 Nonce resynchronisé: {self._next}")
+
+
+_managers = {}
+_managers_lock = threading.Lock()
+
+
+def get_nonce_manager(w3, chain_id, address):
+    """Retourne le gestionnaire de nonces partagé du processus pour ce compte"""
+    key = (chain_id, address.lower())
+    with _managers_lock:
+        if key not in _managers:
+            _managers[key] = NonceManager(w3, address)
+        return _managers[key]
+
+
+def is_nonce_error(error):
+    """Indique si une erreur RPC est due à un nonce désynchronisé"""
+    message = str(error).lower()
+    return any(pattern in message for pattern in NONCE_ERRORS)
+
+
+def is_already_known(error):
+    """Indique si le nœud connaît déjà la transaction envoyée (elle est diffusée)"""
+    message = str(error).lower()
+    return any(pattern in message for pattern in ALREADY_KNOWN_ERRORS)
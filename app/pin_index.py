@@ -0,0 +1,70 @@
+import sqlite3
+import threading
+
+
+class PinIndex:
+    """Index local des contenus déjà épinglés, par CID calculé localement"""
+
+    def __init__(self, db_path):
+        """
+        Args:
+            db_path: Chemin de la base SQLite
+        """
+        self.db_path = db_path
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS pins (
+                local_cid TEXT PRIMARY KEY,
+                ipfs_hash TEXT NOT NULL,
+                size INTEGER,
+                timestamp TEXT,
+                name TEXT,
+                kind TEXT
+            )
+        ''')
+        conn.commit()
+        conn.close()
+
+    def get(self, local_cid):
+        """Résultat d'upload mémorisé pour ce contenu (None si jamais épinglé)"""
+        conn = self._connect()
+        row = conn.execute('SELECT * FROM pins WHERE local_cid = ?', (local_cid,)).fetchone()
+        conn.close()
+        return dict(row) if row else None
+
+    def add(self, local_cid, result, name, kind):
+        """Mémorise le résultat d'un upload réussi"""
+        conn = self._connect()
+        conn.execute(
+            'INSERT OR REPLACE INTO pins (local_cid, ipfs_hash, size, timestamp, name, kind) VALUES (?, ?, ?, ?, ?, ?)',
+            (local_cid, result['ipfs_hash'], result.get('size', 0), result.get('timestamp', ''), name, kind)
+        )
+        conn.commit()
+        conn.close()
+
+    def remove(self, ipfs_hash):
+        """Oublie un contenu (après un unpin)"""
+        conn = self._connect()
+        conn.execute('DELETE FROM pins WHERE ipfs_hash = ? OR local_cid = ?', (ipfs_hash, ipfs_hash))
+        conn.commit()
+        conn.close()
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_pin_index(db_path):
+    """Retourne l'index de pins partagé du processus pour cette base"""
+    with _indexes_lock:
+        if db_path not in _indexes:
+            _indexes[db_path] = PinIndex(db_path)
+        return _indexes[db_path]
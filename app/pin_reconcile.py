@@ -0,0 +1,159 @@
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+# Types de pins créés par l'application (keyvalues.type côté Pinata)
+APP_PIN_KINDS = ('diploma', 'diploma_metadata')
+
+
+def cid_from_reference(reference):
+    """CID d'une URL de passerelle (.../ipfs/<cid>), d'une URI ipfs://<cid> ou d'un CID brut"""
+    if reference.startswith('ipfs://'):
+        reference = reference[len('ipfs://'):]
+    return reference.rsplit('/ipfs/', 1)[-1].split('?')[0].strip('/')
+
+
+def _token_references(blockchain, ipfs_cache, token_id):
+    """(URL du PDF, URI des métadonnées) d'un diplôme, relues on-chain puis sur IPFS"""
+    uri = blockchain.get_token_uri(token_id)
+    if not uri['success']:
+        raise ValueError(uri['error'])
+    try:
+        with open(ipfs_cache.get(cid_from_reference(uri['token_uri'])), 'rb') as f:
+            metadata = json.load(f)
+    except Exception as e:
+        raise ValueError(f'Métadonnées illisibles: {e}')
+    pdf_url = metadata.get('image') or metadata.get('external_url')
+    if not pdf_url:
+        raise ValueError('Métadonnées sans PDF (image/external_url)')
+    return pdf_url, uri['token_uri']
+
+
+def onchain_references(blockchain, ipfs_cache, diploma_index=None, max_workers=8):
+    """
+    URLs IPFS (PDF et métadonnées) de tous les diplômes mintés, relues sur la blockchain
+
+    L'index ne couvre pas forcément les mints antérieurs à son premier bloc: seul le
+    contrat donne la liste complète. Chaque token 0..totalSupply()-1 est relu (tokenURI,
+    puis champ image ou external_url des métadonnées). Les URLs des diplômes indexés par
+    leurs seuls événements sont au passage complétées dans l'index.
+
+    Args:
+        blockchain: Client du contrat (get_total_supply, get_token_uri)
+        ipfs_cache: Cache des contenus IPFS (get)
+        diploma_index: Index des diplômes à compléter (missing_ipfs_references, set_ipfs_urls)
+        max_workers: Nombre de diplômes relus en parallèle
+
+    Returns:
+        tuple: (références, erreurs {'token_id', 'error'} des diplômes illisibles)
+    """
+    total = blockchain.get_total_supply()
+    if not total['success']:
+        return [], [{'token_id': None, 'error': f"totalSupply illisible: {total['error']}"}]
+
+    def read(token_id):
+        try:
+            return token_id, _token_references(blockchain, ipfs_cache, token_id), None
+        except ValueError as e:
+            return token_id, None, str(e)
+
+    missing = set(diploma_index.missing_ipfs_references()) if diploma_index is not None else set()
+    references = []
+    errors = []
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='token-uri') as executor:
+        for token_id, urls, error in executor.map(read, range(total['total_supply'])):
+            if error:
+                errors.append({'token_id': token_id, 'error': error})
+                continue
+            references.extend(urls)
+            if token_id in missing:
+                diploma_index.set_ipfs_urls(token_id, *urls)
+    return references, errors
+
+
+def find_orphans(ipfs_service, references, min_age_hours=24, page_size=1000):
+    """
+    Pins de l'application qu'aucun diplôme ni job en cours ne référence
+
+    Args:
+        ipfs_service: Service IPFS (list_pins)
+        references: CIDs ou URLs IPFS encore utilisés
+        min_age_hours: Âge minimal d'un pin pour être supprimé (jobs en vol)
+        page_size: Taille des pages de la liste des pins
+
+    Returns:
+        tuple: (pins parcourus, liste des orphelins)
+    """
+    referenced = {cid_from_reference(reference) for reference in references}
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=min_age_hours)
+
+    scanned = 0
+    orphans = []
+    for pin in ipfs_service.list_pins(page_size=page_size):
+        scanned += 1
+        if pin['kind'] not in APP_PIN_KINDS:
+            continue
+        if pin['ipfs_hash'] in referenced or pin['date_pinned'] > cutoff:
+            continue
+        orphans.append(pin)
+    return scanned, orphans
+
+
+def reconcile_pins(ipfs_service, references, min_age_hours=24, batch_size=10, rate=2.0,
+                   dry_run=True, page_size=1000):
+    """
+    Supprime (unpin) les contenus épinglés pour des mints qui n'ont jamais abouti
+
+    La liste complète des pins est parcourue par pages puis comparée en une fois
+    aux diplômes connus: aucune requête par CID.
+
+    Args:
+        ipfs_service: Service IPFS (list_pins, unpin_file)
+        references: CIDs ou URLs IPFS encore utilisés (tous les diplômes mintés, jobs non échoués)
+        min_age_hours: Âge minimal d'un pin pour être supprimé
+        batch_size: Nombre d'unpins envoyés en parallèle
+        rate: Nombre maximal d'unpins par seconde (limite de l'API)
+        dry_run: Lister les orphelins sans rien supprimer (par défaut)
+        page_size: Taille des pages de la liste des pins
+
+    Returns:
+        dict: Bilan (pins parcourus, orphelins, supprimés, échecs, octets récupérés)
+    """
+    scanned, orphans = find_orphans(ipfs_service, references, min_age_hours, page_size)
+    report = {
+        'success': True,
+        'scanned': scanned,
+        'orphans': len(orphans),
+        'orphan_bytes': sum(pin['size'] for pin in orphans),
+        'unpinned': 0,
+        'failed': 0,
+        'bytes_reclaimed': 0,
+        'errors': [],
+        'dry_run': dry_run
+    }
+    if dry_run:
+        return report
+
+    with ThreadPoolExecutor(max_workers=batch_size, thread_name_prefix='unpin') as executor:
+        for start in range(0, len(orphans), batch_size):
+            batch = orphans[start:start + batch_size]
+            started = time.monotonic()
+            results = executor.map(lambda pin: ipfs_service.unpin_file(pin['ipfs_hash']), batch)
+            for pin, result in zip(batch, results):
+                if result['success']:
+                    report['unpinned'] += 1
+                    report['bytes_reclaimed'] += pin['size']
+                else:
+                    report['failed'] += 1
+                    report['errors'].append({'ipfs_hash': pin['ipfs_hash'], 'error': result.get('error')})
+
+            print(f"🧹 {report['unpinned'] + report['failed']}/{len(orphans)} orphelins traités")
+
+            # Lots espacés pour rester sous la limite de requêtes de l'API
+            elapsed = time.monotonic() - started
+            if start + batch_size < len(orphans) and elapsed < len(batch) / rate:
+                time.sleep(len(batch) / rate - elapsed)
+
+    report['success'] = report['failed'] == 0
+    return report
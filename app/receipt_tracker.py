@@ -0,0 +1,148 @@
+import threading
+import time
+
+import requests
+from hexbytes import HexBytes
+from web3 import Web3
+from web3._utils.method_formatters import receipt_formatter
+from web3.datastructures import AttributeDict
+
+from app.rpc import batch_request
+
+
+class _PendingReceipt:
+    """Transaction suivie par le tracker"""
+
+    def __init__(self, deadline):
+        self.deadline = deadline
+        self.receipt = None
+        self.done = threading.Event()
+        self.callbacks = []
+
+
+class ReceiptTracker:
+    """Suivi groupé des receipts: un seul appel batch JSON-RPC par nouveau bloc"""
+
+    def __init__(self, rpc_url, session=None, poll_interval=2.0):
+        """
+        Args:
+            rpc_url: URL du nœud RPC
+            session: Session requests (une nouvelle session par défaut)
+            poll_interval: Intervalle de vérification du numéro de bloc (secondes)
+        """
+        self.rpc_url = rpc_url
+        self.session = session or requests.Session()
+        self.poll_interval = poll_interval
+        self._pending = {}
+        self._fresh = set()
+        self._last_block = None
+        self._cond = threading.Condition()
+        self._thread = None
+
+    # -------------------------------------------------------------------
+    # API publique
+    # -------------------------------------------------------------------
+    def track(self, tx_hash, callback=None, timeout=300):
+        """
+        Suivre une transaction; le callback reçoit le receipt (ou None au timeout)
+
+        Returns:
+            _PendingReceipt: Entrée de suivi (attribut done = threading.Event)
+        """
+        tx_hash = Web3.to_hex(HexBytes(tx_hash))
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            entry = self._pending.get(tx_hash)
+            if entry is None:
+                entry = _PendingReceipt(deadline)
+                self._pending[tx_hash] = entry
+                self._fresh.add(tx_hash)
+            else:
+                entry.deadline = max(entry.deadline, deadline)
+            if callback:
+                entry.callbacks.append(callback)
+            self._ensure_thread()
+            self._cond.notify()
+        return entry
+
+    def wait(self, tx_hash, timeout=300):
+        """Bloque jusqu'au receipt de la transaction; None si timeout"""
+        entry = self.track(tx_hash, timeout=timeout)
+        entry.done.wait(timeout)
+        return entry.receipt
+
+    def pending_count(self):
+        with self._cond:
+            return len(self._pending)
+
+    # -------------------------------------------------------------------
+    # Boucle de polling
+    # -------------------------------------------------------------------
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name='receipt-tracker', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            try:
+                self._poll()
+            except Exception as e:
+                print(f"⚠️ Erreur du tracker de receipts: {e}")
+            time.sleep(self.poll_interval)
+
+    def _poll(self):
+        block_number = int(batch_request(self.session, self.rpc_url, [('eth_blockNumber', [])])[0][0], 16)
+
+        with self._cond:
+            if block_number != self._last_block:
+                # Nouveau bloc: vérifier toutes les transactions en attente
+                hashes = list(self._pending)
+            else:
+                # Même bloc: seulement les transactions ajoutées depuis le dernier poll
+                hashes = list(self._fresh)
+            self._fresh.clear()
+            self._last_block = block_number
+
+        if hashes:
+            calls = [('eth_getTransactionReceipt', [tx_hash]) for tx_hash in hashes]
+            for tx_hash, (raw_receipt, error) in zip(hashes, batch_request(self.session, self.rpc_url, calls)):
+                if raw_receipt:
+                    self._resolve(tx_hash, AttributeDict.recursive(receipt_formatter(raw_receipt)))
+
+        # Abandonner les transactions dont plus personne n'attend le receipt
+        now = time.monotonic()
+        with self._cond:
+            expired = [tx_hash for tx_hash, entry in self._pending.items() if entry.deadline < now]
+        for tx_hash in expired:
+            self._resolve(tx_hash, None)
+
+    def _resolve(self, tx_hash, receipt):
+        with self._cond:
+            entry = self._pending.pop(tx_hash, None)
+            self._fresh.discard(tx_hash)
+        if entry is None:
+            return
+
+        entry.receipt = receipt
+        entry.done.set()
+        for callback in entry.callbacks:
+            try:
+                callback(receipt)
+            except Exception as e:
+                print(f"⚠️ Erreur dans un callback de receipt: {e}")
+
+
+_trackers = {}
+_trackers_lock = threading.Lock()
+
+
+def get_receipt_tracker(rpc_url, session=None):
+    """Retourne le tracker de receipts partagé du processus pour ce nœud RPC"""
+    with _trackers_lock:
+        if rpc_url not in _trackers:
+            _trackers[rpc_url] = ReceiptTracker(rpc_url, session=session)
+        return _trackers[rpc_url]
@@ -1,14 +1,25 @@
-﻿from flask import Blueprint, render_template, request, jsonify, current_app
+﻿from flask import Blueprint, render_template, request, jsonify, current_app, send_file, redirect, url_for, Response
 from werkzeug.utils import secure_filename
+from werkzeug.exceptions import RequestEntityTooLarge
+from app.uploads import StreamedUpload
+from app.ipfs_cache import CIDV1_PATTERN
+from app.diploma_index import FILTERS
+from app.grading import get_mention
+from app.student_import import IMPORT_FORMATS, read_rows, import_students
+import requests
+import csv
+import io
+import json
 import os
-from app.blockchain_nft import BlockchainNFT
-from app.ipfs_service import IPFSService
+import tempfile
+import uuid
 from datetime import datetime
 
 bp = Blueprint('main', __name__)
 
-# Liste des étudiants en mémoire (temporaire)
-etudiants = []
+def get_blockchain():
+    """Client blockchain partagé par toute l'application"""
+    return current_app.extensions['blockchain_nft'].get()
 
 def allowed_file(filename):
     """Vérifie si le fichier est un PDF"""
@@ -32,6 +43,7 @@ def ajouter():
             diplome = request.form.get('diplome')
             specialite = request.form.get('specialite')
             institution = request.form.get('institution', 'Université')
+            moyenne = request.form.get('moyenne', '').strip()
             
             # Validation des champs requis
             if not all([nom, prenom, email, wallet_address, diplome, specialite]):
@@ -40,6 +52,22 @@ def ajouter():
                     'error': 'Tous les champs sont requis'
                 }), 400
             
+            # Moyenne facultative (sur 20): la mention en est déduite
+            mention = None
+            if moyenne:
+                try:
+                    moyenne = float(moyenne)
+                except ValueError:
+                    moyenne = -1
+                if not 0 <= moyenne <= 20:
+                    return jsonify({
+                        'success': False,
+                        'error': 'La moyenne doit être un nombre entre 0 et 20'
+                    }), 400
+                mention = get_mention(moyenne)
+            else:
+                moyenne = None
+            
             # Vérifier le fichier PDF
             if 'diplome_pdf' not in request.files:
                 return jsonify({
@@ -60,100 +88,44 @@ def ajouter():
                     'error': 'Seuls les fichiers PDF sont acceptés'
                 }), 400
             
-            # Sauvegarder le fichier temporairement
+            # Sauvegarder le fichier jusqu'au traitement du job
             filename = secure_filename(f"{nom}_{prenom}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf")
-            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            
-            # 1. Upload du PDF sur IPFS via Pinata
-            ipfs_service = IPFSService(
-                current_app.config['PINATA_API_KEY'],
-                current_app.config['PINATA_SECRET_KEY'],
-                current_app.config['PINATA_JWT']
-            )
-            
-            pdf_result = ipfs_service.upload_file(filepath, filename)
-            if not pdf_result['success']:
-                os.remove(filepath)
-                return jsonify({
-                    'success': False,
-                    'error': f"Échec de l'upload IPFS: {pdf_result.get('error', 'Erreur inconnue')}"
-                }), 500
-            
-            # 2. Créer les métadonnées NFT
-            metadata = {
-                'name': f"Diplôme {diplome} - {nom} {prenom}",
-                'description': f"Diplôme de {diplome} en {specialite} délivré à {nom} {prenom}",
-                'image': pdf_result['url'],
-                'attributes': [
-                    {'trait_type': 'Nom', 'value': nom},
-                    {'trait_type': 'Prénom', 'value': prenom},
-                    {'trait_type': 'Email', 'value': email},
-                    {'trait_type': 'Diplôme', 'value': diplome},
-                    {'trait_type': 'Spécialité', 'value': specialite},
-                    {'trait_type': 'Institution', 'value': institution},
-                    {'trait_type': "Date d'émission", 'value': datetime.now().strftime('%Y-%m-%d')}
-                ],
-                'external_url': pdf_result['url']
-            }
-            
-            # 3. Upload des métadonnées sur IPFS
-            metadata_result = ipfs_service.upload_metadata(metadata)
-            if not metadata_result['success']:
-                os.remove(filepath)
-                return jsonify({
-                    'success': False,
-                    'error': f"Échec de l'upload des métadonnées: {metadata_result.get('error', 'Erreur inconnue')}"
-                }), 500
-            
-            # 4. Minter le NFT sur la blockchain
-            blockchain = BlockchainNFT({
-                'RPC_URL': current_app.config['RPC_URL'],
-                'CONTRACT_ADDRESS': current_app.config['CONTRACT_ADDRESS'],
-                'OWNER_PRIVATE_KEY': current_app.config['OWNER_PRIVATE_KEY'],
-                'CHAIN_ID': current_app.config['CHAIN_ID']
-            })
-            
-            mint_result = blockchain.mint_diploma(
-                wallet_address,
-                metadata_result['url'],
-                f"{nom} {prenom}",
-                f"{diplome} - {specialite}",
-                institution
-            )
+            filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}_{filename}")
+            pdf_cid = None
+            if isinstance(file.stream, StreamedUpload):
+                # Déjà écrit (et haché) sur disque pendant la réception: un simple renommage
+                file.stream.keep(filepath)
+                pdf_cid = file.stream.cid
+            else:
+                file.save(filepath)
             
-            # Nettoyer le fichier temporaire
-            if os.path.exists(filepath):
-                os.remove(filepath)
+            # Confier l'upload IPFS et le minting aux workers
+            job_id = current_app.extensions['mint_jobs'].submit({
+                'nom': nom,
+                'prenom': prenom,
+                'email': email,
+                'wallet_address': wallet_address,
+                'diplome': diplome,
+                'specialite': specialite,
+                'institution': institution,
+                'moyenne': moyenne,
+                'mention': mention,
+                'date_emission': datetime.now().strftime('%Y-%m-%d')
+            }, filepath, filename, pdf_cid)
             
-            if mint_result['success']:
-                # Ajouter l'étudiant à la liste
-                etudiant = {
-                    'nom': nom,
-                    'prenom': prenom,
-                    'email': email,
-                    'wallet_address': wallet_address,
-                    'diplome': diplome,
-                    'specialite': specialite,
-                    'institution': institution,
-                    'nft_token_id': mint_result['token_id'],
-                    'tx_hash': mint_result['tx_hash'],
-                    'ipfs_url': pdf_result['url'],
-                    'metadata_url': metadata_result['url'],
-                    'date_ajout': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                }
-                etudiants.append(etudiant)
-                
-                return jsonify({
-                    'success': True,
-                    'message': 'NFT créé et envoyé avec succès!',
-                    'data': etudiant
-                }), 200
-            else:
-                return jsonify({
-                    'success': False,
-                    'error': mint_result.get('error', 'Erreur lors du minting')
-                }), 500
+            return jsonify({
+                'success': True,
+                'message': 'Demande enregistrée, création du NFT en cours...',
+                'job_id': job_id,
+                'status_url': f'/api/jobs/{job_id}'
+            }), 202
+        
+        except RequestEntityTooLarge:
+            max_mb = current_app.config['MAX_FILE_SIZE'] // (1024 * 1024)
+            return jsonify({
+                'success': False,
+                'error': f'Fichier trop volumineux (max {max_mb} MB)'
+            }), 413
         
         except Exception as e:
             # Nettoyer le fichier en cas d'erreur
@@ -168,29 +140,224 @@ def ajouter():
     # GET request
     return render_template('ajouter.html')
 
+def _list_page():
+    """Page de diplômes demandée par ?sort=&order=&after=&limit= et les filtres"""
+    limit = request.args.get('limit', current_app.config['LIST_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['LIST_MAX_PAGE_SIZE']))
+    params = {
+        'sort': request.args.get('sort', 'date'),
+        'order': request.args.get('order', 'asc'),
+        'limit': limit,
+        **{name: request.args.get(name) or None for name in FILTERS}
+    }
+    etudiants, next_cursor = current_app.extensions['diploma_index'].page(
+        after=request.args.get('after') or None, **params
+    )
+    next_url = url_for(request.endpoint, after=next_cursor, **params) if next_cursor else None
+    return etudiants, next_cursor, next_url, params
+
 @bp.route('/liste')
 def liste():
-    """Page de liste des diplômes"""
-    return render_template('liste.html', etudiants=etudiants)
+    """Page de liste des diplômes (une page à la fois)"""
+    try:
+        etudiants, _, next_url, params = _list_page()
+    except ValueError as e:
+        return render_template('liste.html', etudiants=[], summary=None, params=request.args,
+                               next_url=None, error=str(e)), 400
+    summary = current_app.extensions['diploma_index'].summary()
+    return render_template('liste.html', etudiants=etudiants, summary=summary, params=params,
+                           next_url=next_url, error=None)
 
 @bp.route('/api/etudiants')
 def get_etudiants():
-    """API pour récupérer la liste des étudiants"""
+    """API pour récupérer une page d'étudiants (?after=<next_cursor> pour la suivante)"""
+    try:
+        etudiants, next_cursor, next_url, _ = _list_page()
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
     return jsonify({
         'success': True,
+        'count': len(etudiants),
+        'etudiants': etudiants,
+        'next_cursor': next_cursor,
+        'next_url': next_url
+    })
+
+# Colonnes de l'export CSV (l'export NDJSON contient tous les champs)
+EXPORT_COLUMNS = [
+    'nft_token_id', 'nom', 'prenom', 'email', 'wallet_address', 'diplome', 'specialite',
+    'institution', 'moyenne', 'mention', 'date_ajout', 'revoked', 'tx_hash', 'block_number',
+    'ipfs_url', 'metadata_url'
+]
+
+@bp.route('/api/etudiants/export')
+def export_etudiants():
+    """Export complet du registre (?format=csv|ndjson), envoyé au fil de l'eau"""
+    fmt = request.args.get('format', 'csv')
+    if fmt not in ('csv', 'ndjson'):
+        return jsonify({
+            'success': False,
+            'error': 'Format inconnu (attendu: csv, ndjson)'
+        }), 400
+    
+    try:
+        etudiants = current_app.extensions['diploma_index'].iter_all(
+            sort=request.args.get('sort', 'date'),
+            order=request.args.get('order', 'asc'),
+            **{name: request.args.get(name) or None for name in FILTERS}
+        )
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400
+    
+    if fmt == 'ndjson':
+        body = (json.dumps(etudiant, ensure_ascii=False) + '\n' for etudiant in etudiants)
+        mimetype = 'application/x-ndjson'
+    else:
+        body = _csv_lines(etudiants)
+        mimetype = 'text/csv'
+    
+    return Response(body, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=etudiants.{fmt}'
+    })
+
+def _csv_lines(etudiants):
+    """Lignes CSV générées une par une (BOM pour l'ouverture directe dans Excel)"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction='ignore')
+    buffer.write('\ufeff')
+    writer.writeheader()
+    for etudiant in etudiants:
+        writer.writerow(etudiant)
+        if buffer.tell() >= 65536:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+@bp.route('/api/search')
+def search_etudiants():
+    """Recherche plein texte des diplômes (?q=dupont master&limit=20)"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({
+            'success': False,
+            'error': 'Paramètre q requis'
+        }), 400
+    
+    limit = request.args.get('limit', 20, type=int)
+    limit = max(1, min(limit, current_app.config['LIST_MAX_PAGE_SIZE']))
+    etudiants = current_app.extensions['diploma_index'].search(query, limit)
+    return jsonify({
+        'success': True,
+        'query': query,
+        'count': len(etudiants),
         'etudiants': etudiants
     })
 
+@bp.route('/api/students/import', methods=['POST'])
+def import_students_file():
+    """Import CSV/XLSX d'étudiants; erreurs et bilan renvoyés en NDJSON une fois l'import validé"""
+    try:
+        file = request.files.get('fichier')
+    except RequestEntityTooLarge:
+        max_mb = current_app.config['MAX_IMPORT_SIZE'] // (1024 * 1024)
+        return jsonify({
+            'success': False,
+            'error': f'Fichier trop volumineux (max {max_mb} MB)'
+        }), 413
+    if file is None or file.filename == '':
+        return jsonify({
+            'success': False,
+            'error': 'Aucun fichier fourni'
+        }), 400
+    
+    fmt = file.filename.rsplit('.', 1)[-1].lower() if '.' in file.filename else ''
+    if fmt not in IMPORT_FORMATS:
+        return jsonify({
+            'success': False,
+            'error': 'Seuls les fichiers CSV et XLSX sont acceptés'
+        }), 400
+    
+    # Le fichier reste sur disque le temps de l'import (lu ligne par ligne)
+    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], f"import_{uuid.uuid4().hex}.{fmt}")
+    if isinstance(file.stream, StreamedUpload):
+        file.stream.keep(filepath)
+    else:
+        file.save(filepath)
+    
+    try:
+        records = read_rows(filepath, fmt)
+    except Exception as e:
+        os.remove(filepath)
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 400 if isinstance(e, ValueError) else 500
+    
+    # Import validé (commit) avant l'envoi du bilan: un client qui se déconnecte
+    # pendant la réponse n'annule plus l'import. Les lignes rejetées attendent
+    # dans un fichier temporaire, pas en mémoire.
+    report = tempfile.TemporaryFile('w+', encoding='utf-8')
+    try:
+        for event in import_students(records, db_path=current_app.extensions['students'].db_path):
+            report.write(json.dumps(event, ensure_ascii=False) + '\n')
+    except Exception as e:
+        report.close()
+        return jsonify({
+            'success': False,
+            'error': f'Import annulé: {str(e)}'
+        }), 400 if isinstance(e, ValueError) else 500
+    finally:
+        records.close()
+        os.remove(filepath)
+    
+    report.seek(0)
+    response = Response(report, mimetype='application/x-ndjson')
+    response.call_on_close(report.close)
+    return response
+
+@bp.route('/api/students')
+def get_students():
+    """API des étudiants de students.db (import CSV/XLSX), par adresse (?after=<next_after>)"""
+    limit = request.args.get('limit', current_app.config['LIST_PAGE_SIZE'], type=int)
+    limit = max(1, min(limit, current_app.config['LIST_MAX_PAGE_SIZE']))
+    students, next_after = current_app.extensions['students'].page_students(
+        request.args.get('after') or None, limit
+    )
+    return jsonify({
+        'success': True,
+        'count': len(students),
+        'students': students,
+        'next_after': next_after,
+        'next_url': url_for('main.get_students', after=next_after, limit=limit) if next_after else None
+    })
+
+@bp.route('/api/jobs/<job_id>')
+def get_job(job_id):
+    """API pour suivre l'avancement d'un job de minting"""
+    job = current_app.extensions['mint_jobs'].get(job_id)
+    if job is None:
+        return jsonify({
+            'success': False,
+            'error': 'Job introuvable'
+        }), 404
+    
+    return jsonify({
+        'success': True,
+        'job': job
+    })
+
 @bp.route('/api/contract-info')
 def contract_info():
     """API pour récupérer les informations du contrat"""
     try:
-        blockchain = BlockchainNFT({
-            'RPC_URL': current_app.config['RPC_URL'],
-            'CONTRACT_ADDRESS': current_app.config['CONTRACT_ADDRESS'],
-            'OWNER_PRIVATE_KEY': current_app.config['OWNER_PRIVATE_KEY'],
-            'CHAIN_ID': current_app.config['CHAIN_ID']
-        })
+        blockchain = get_blockchain()
         
         total = blockchain.total_supply()
         
@@ -211,12 +378,7 @@ def contract_info():
 def get_diploma_info(token_id):
     """API pour récupérer les informations d'un diplôme spécifique"""
     try:
-        blockchain = BlockchainNFT({
-            'RPC_URL': current_app.config['RPC_URL'],
-            'CONTRACT_ADDRESS': current_app.config['CONTRACT_ADDRESS'],
-            'OWNER_PRIVATE_KEY': current_app.config['OWNER_PRIVATE_KEY'],
-            'CHAIN_ID': current_app.config['CHAIN_ID']
-        })
+        blockchain = get_blockchain()
         
         info = blockchain.get_diploma_info(token_id)
         
@@ -236,6 +398,59 @@ def get_diploma_info(token_id):
             'error': str(e)
         }), 500
 
+@bp.route('/api/diplomas')
+def get_diplomas_info():
+    """API pour récupérer plusieurs diplômes (?ids=1,2,3 ou ?start=0&end=99)"""
+    try:
+        if request.args.get('ids'):
+            token_ids = [int(token_id) for token_id in request.args['ids'].split(',') if token_id.strip()]
+        elif request.args.get('start') is not None and request.args.get('end') is not None:
+            token_ids = list(range(int(request.args['start']), int(request.args['end']) + 1))
+        else:
+            return jsonify({
+                'success': False,
+                'error': 'Paramètre ids ou start/end requis'
+            }), 400
+    except ValueError:
+        return jsonify({
+            'success': False,
+            'error': 'Token IDs invalides'
+        }), 400
+    
+    max_ids = current_app.config['MAX_BULK_DIPLOMAS']
+    if not token_ids or len(token_ids) > max_ids or min(token_ids) < 0:
+        return jsonify({
+            'success': False,
+            'error': f'Entre 1 et {max_ids} Token IDs positifs par requête'
+        }), 400
+    
+    try:
+        diplomas = get_blockchain().get_diplomas_info(token_ids)
+        return jsonify({
+            'success': True,
+            'count': len(diplomas),
+            'diplomas': diplomas
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
+@bp.route('/api/cache/stats')
+def cache_stats():
+    """API pour suivre l'efficacité du cache des lectures blockchain"""
+    try:
+        return jsonify({
+            'success': True,
+            'cache': get_blockchain().cache.stats()
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 500
+
 @bp.route('/health')
 def health():
     """Endpoint de santé pour vérifier que l'API fonctionne"""
@@ -243,3 +458,59 @@ def health():
         'status': 'ok',
         'message': 'API Diplômes NFT opérationnelle'
     })
+
+@bp.app_template_filter('ipfs_local')
+def ipfs_local(url):
+    """Remplace une URL de passerelle IPFS par la route locale /ipfs/<cid>"""
+    if url and '/ipfs/' in url:
+        return url_for('main.ipfs_content', cid=url.rsplit('/ipfs/', 1)[1])
+    return url
+
+def _guess_mimetype(path):
+    with open(path, 'rb') as f:
+        head = f.read(5)
+    if head.startswith(b'%PDF'):
+        return 'application/pdf'
+    if head.startswith(b'{'):
+        return 'application/json'
+    return 'application/octet-stream'
+
+@bp.route('/ipfs/<cid>')
+def ipfs_content(cid):
+    """Contenu IPFS (PDF, métadonnées) servi depuis le cache disque local"""
+    cache = current_app.extensions['ipfs_cache']
+    if not CIDV1_PATTERN.match(cid):
+        # CID non vérifiable localement (CIDv0...): laisser faire la passerelle
+        return redirect(f'{cache.gateway_url}{cid}')
+    
+    try:
+        path = cache.get(cid)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'error': str(e)
+        }), 502
+    except requests.exceptions.HTTPError as e:
+        status = e.response.status_code if e.response is not None else 502
+        return jsonify({
+            'success': False,
+            'error': f'Passerelle IPFS: {str(e)}'
+        }), 404 if status == 404 else 502
+    except requests.exceptions.RequestException as e:
+        return jsonify({
+            'success': False,
+            'error': f'Passerelle IPFS injoignable: {str(e)}'
+        }), 504
+    
+    # Contenu immuable sous son CID: cache navigateur/proxy illimité, Range géré par send_file
+    response = send_file(path, mimetype=_guess_mimetype(path), conditional=True, etag=cid, max_age=31536000)
+    response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    return response
+
+@bp.route('/api/ipfs-cache/stats')
+def ipfs_cache_stats():
+    """API pour suivre l'efficacité du cache des contenus IPFS"""
+    return jsonify({
+        'success': True,
+        'cache': current_app.extensions['ipfs_cache'].stats()
+    })
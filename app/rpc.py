@@ -0,0 +1,47 @@
+import requests
+
+
+def batch_request(session, rpc_url, calls, timeout=30, max_batch_size=100):
+    """
+    Envoyer plusieurs appels JSON-RPC dans une seule requête HTTP (batch)
+
+    Args:
+        session: Session requests à utiliser
+        rpc_url: URL du nœud RPC
+        calls: Liste de tuples (méthode, paramètres)
+        timeout: Timeout HTTP en secondes
+        max_batch_size: Nombre maximal d'appels par requête (limite des nœuds publics)
+
+    Returns:
+        list: Tuples (résultat, erreur) dans l'ordre des appels
+    """
+    results = []
+    for start in range(0, len(calls), max_batch_size):
+        chunk = calls[start:start + max_batch_size]
+        payload = [
+            {'jsonrpc': '2.0', 'id': i, 'method': method, 'params': params}
+            for i, (method, params) in enumerate(chunk)
+        ]
+
+        response = session.post(rpc_url, json=payload, timeout=timeout)
+        response.raise_for_status()
+        body = response.json()
+
+        # Certains nœuds répondent par une erreur unique pour tout le batch
+        if isinstance(body, dict):
+            error = body.get('error') or {}
+            raise requests.exceptions.RequestException(
+                f"Batch JSON-RPC refusé: {error.get('message', body)}"
+            )
+
+        by_id = {item.get('id'): item for item in body}
+        for i in range(len(chunk)):
+            item = by_id.get(i)
+            if item is None:
+                results.append((None, 'Réponse manquante dans le batch'))
+            elif item.get('error'):
+                results.append((None, item['error'].get('message', str(item['error']))))
+            else:
+                results.append((item.get('result'), None))
+
+    return results
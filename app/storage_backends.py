@@ -0,0 +1,330 @@
+import json
+import os
+import tempfile
+from datetime import datetime, timezone
+
+import requests
+
+from app.cid import CIDBuilder, json_bytes
+from app.ipfs_service import BaseIPFSService, IPFSService, MultipartFileBody, pooled_session
+
+# Paramètres d'ajout alignés sur app/cid.py et sur Pinata (cidVersion=1):
+# les trois backends produisent le même CID pour un même contenu
+KUBO_ADD_PARAMS = {
+    'cid-version': 1,
+    'raw-leaves': 'true',
+    'chunker': 'size-262144',
+    'hash': 'sha2-256',
+    'pin': 'true'
+}
+
+
+class KuboIPFSService(BaseIPFSService):
+    """Service IPFS sur l'API HTTP d'un nœud Kubo (go-ipfs)"""
+
+    name = 'kubo'
+
+    def __init__(self, api_url, gateway_url, pin_index=None, pool_size=10, max_retries=3, backoff_factor=0.5):
+        """
+        Args:
+            api_url: URL de l'API Kubo (ex: http://127.0.0.1:5001)
+            gateway_url: Passerelle utilisée pour construire les URLs des contenus
+            pin_index: Index local des contenus déjà épinglés (PinIndex, optionnel)
+            pool_size: Nombre de connexions keep-alive gardées vers le nœud
+            max_retries: Nombre maximal de nouvelles tentatives
+            backoff_factor: Base de l'attente exponentielle entre deux tentatives (secondes)
+        """
+        super().__init__(gateway_url, pin_index, max_workers=pool_size)
+        self.api_url = api_url.rstrip('/')
+        self.session = pooled_session(pool_size, max_retries, backoff_factor)
+
+    def _add(self, body, content_type, timeout):
+        response = self.session.post(
+            f'{self.api_url}/api/v0/add',
+            params=KUBO_ADD_PARAMS,
+            data=body,
+            headers={'Content-Type': content_type},
+            timeout=timeout
+        )
+        if response.status_code != 200:
+            return {
+                'success': False,
+                'error': f'Erreur Kubo ({response.status_code}): {response.text}'
+            }
+        # Une ligne JSON par fichier ajouté
+        result = json.loads(response.text.strip().splitlines()[-1])
+        return self._result(result['Hash'], int(result.get('Size', 0)),
+                            datetime.now(timezone.utc).isoformat())
+
+    def _pin_file(self, file_path, file_name):
+        try:
+            body = MultipartFileBody({}, 'file', file_name, file_path)
+            return self._add(body, body.content_type, timeout=120)
+        except requests.exceptions.Timeout:
+            return {
+                'success': False,
+                'error': 'Timeout lors de l\'upload sur IPFS. Le fichier est peut-être trop volumineux.'
+            }
+        except requests.exceptions.RequestException as e:
+            return {
+                'success': False,
+                'error': f'Erreur de connexion au nœud IPFS: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Erreur lors de l\'upload du fichier: {str(e)}'
+            }
+
+    def _pin_json(self, metadata, name):
+        try:
+            # Même sérialisation que pinJSONToIPFS: même CID que chez Pinata
+            fd, tmp_path = tempfile.mkstemp(suffix='.json')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(json_bytes(metadata))
+                body = MultipartFileBody({}, 'file', f'{name}.json', tmp_path)
+                return self._add(body, body.content_type, timeout=60)
+            finally:
+                os.remove(tmp_path)
+        except requests.exceptions.Timeout:
+            return {
+                'success': False,
+                'error': 'Timeout lors de l\'upload des métadonnées sur IPFS.'
+            }
+        except requests.exceptions.RequestException as e:
+            return {
+                'success': False,
+                'error': f'Erreur de connexion au nœud IPFS: {str(e)}'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Erreur lors de l\'upload des métadonnées: {str(e)}'
+            }
+
+    def list_pins(self, page_size=1000):
+        """
+        Parcourt les pins récursifs du nœud (/api/v0/pin/ls en flux NDJSON)
+
+        Kubo ne pagine pas: page_size est ignoré. Le nœud ne connaît ni le nom, ni le type,
+        ni la date d'un pin: ils viennent de l'index local, et un pin absent de l'index
+        n'a pas de type (jamais considéré comme appartenant à l'application).
+        """
+        with self.session.post(
+            f'{self.api_url}/api/v0/pin/ls',
+            params={'type': 'recursive', 'stream': 'true'},
+            stream=True,
+            timeout=60
+        ) as response:
+            if response.status_code != 200:
+                raise Exception(f'Erreur Kubo ({response.status_code}): {response.text}')
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                cid = json.loads(line)['Cid']
+                pin = self.pin_index.get(cid) if self.pin_index is not None else None
+                if pin and pin['timestamp']:
+                    date_pinned = datetime.fromisoformat(pin['timestamp'].replace('Z', '+00:00'))
+                else:
+                    # Date inconnue: le pin est traité comme récent, donc jamais supprimé
+                    date_pinned = datetime.now(timezone.utc)
+                yield {
+                    'ipfs_hash': cid,
+                    'size': (pin['size'] or 0) if pin else 0,
+                    'date_pinned': date_pinned,
+                    'name': pin['name'] if pin else '',
+                    'kind': pin['kind'] if pin else None
+                }
+
+    def unpin_file(self, ipfs_hash):
+        try:
+            response = self.session.post(
+                f'{self.api_url}/api/v0/pin/rm',
+                params={'arg': ipfs_hash},
+                timeout=30
+            )
+            if response.status_code == 200:
+                if self.pin_index is not None:
+                    self.pin_index.remove(ipfs_hash)
+                return {
+                    'success': True,
+                    'message': f'Fichier {ipfs_hash} supprimé avec succès'
+                }
+            return {
+                'success': False,
+                'error': f'Erreur lors de la suppression: {response.status_code}'
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': str(e)
+            }
+
+    def test_connection(self):
+        try:
+            response = self.session.post(f'{self.api_url}/api/v0/version', timeout=10)
+            if response.status_code == 200:
+                return {
+                    'success': True,
+                    'message': f"Kubo {response.json().get('Version', '')}",
+                    'authenticated': True
+                }
+            return {
+                'success': False,
+                'error': f'Nœud IPFS indisponible ({response.status_code})',
+                'authenticated': False
+            }
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Erreur de connexion: {str(e)}',
+                'authenticated': False
+            }
+
+
+class FilesystemIPFSService(BaseIPFSService):
+    """
+    Stockage adressé par contenu sur disque local, sans réseau ni quota.
+
+    Les CIDs sont calculés localement (app/cid.py): mêmes CIDs et mêmes dicts
+    de résultat que Pinata, pour les tests de charge et la CI.
+    """
+
+    name = 'filesystem'
+
+    def __init__(self, directory, gateway_url, pin_index=None, max_workers=10):
+        """
+        Args:
+            directory: Dossier du magasin de contenus
+            gateway_url: Passerelle utilisée pour construire les URLs des contenus
+            pin_index: Index local des contenus déjà épinglés (PinIndex, optionnel)
+            max_workers: Nombre d'uploads menés en parallèle
+        """
+        super().__init__(gateway_url, pin_index, max_workers=max_workers)
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path(self, cid):
+        return os.path.join(self.directory, cid[-2:], cid)
+
+    def _store(self, write, name):
+        """Écrit un contenu via write(f, builder) puis le range sous son CID"""
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.part')
+        try:
+            builder = CIDBuilder()
+            with os.fdopen(fd, 'wb') as f:
+                write(f, builder)
+            cid = builder.hexdigest()
+            os.makedirs(os.path.dirname(self.path(cid)), exist_ok=True)
+            os.replace(tmp_path, self.path(cid))
+            print(f"💾 {name} stocké localement: {cid}")
+            return self._result(cid, builder.size, datetime.now(timezone.utc).isoformat())
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _pin_file(self, file_path, file_name):
+        def write(f, builder):
+            with open(file_path, 'rb') as source:
+                for block in iter(lambda: source.read(65536), b''):
+                    builder.update(block)
+                    f.write(block)
+
+        try:
+            return self._store(write, file_name)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Erreur lors de l\'upload du fichier: {str(e)}'
+            }
+
+    def _pin_json(self, metadata, name):
+        def write(f, builder):
+            data = json_bytes(metadata)
+            builder.update(data)
+            f.write(data)
+
+        try:
+            return self._store(write, name)
+        except Exception as e:
+            return {
+                'success': False,
+                'error': f'Erreur lors de l\'upload des métadonnées: {str(e)}'
+            }
+
+    def list_pins(self, page_size=1000):
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.part'):
+                    continue
+                stat = os.stat(os.path.join(root, name))
+                # Seuls les contenus enregistrés par l'application ont un type connu
+                pin = self.pin_index.get(name) if self.pin_index is not None else None
+                yield {
+                    'ipfs_hash': name,
+                    'size': stat.st_size,
+                    'date_pinned': datetime.fromtimestamp(stat.st_mtime, timezone.utc),
+                    'name': pin['name'] if pin else '',
+                    'kind': pin['kind'] if pin else None
+                }
+
+    def unpin_file(self, ipfs_hash):
+        try:
+            os.remove(self.path(ipfs_hash))
+        except FileNotFoundError:
+            return {
+                'success': False,
+                'error': f'Fichier {ipfs_hash} introuvable'
+            }
+        if self.pin_index is not None:
+            self.pin_index.remove(ipfs_hash)
+        return {
+            'success': True,
+            'message': f'Fichier {ipfs_hash} supprimé avec succès'
+        }
+
+    def test_connection(self):
+        return {
+            'success': True,
+            'message': f'Stockage local: {os.path.abspath(self.directory)}',
+            'authenticated': True
+        }
+
+
+BACKENDS = ('pinata', 'kubo', 'filesystem')
+
+
+def create_ipfs_service(config, pin_index=None):
+    """
+    Construit le service IPFS choisi par IPFS_BACKEND (pinata, kubo, filesystem)
+
+    Args:
+        config: Configuration de l'application
+        pin_index: Index local des contenus déjà épinglés (PinIndex, optionnel)
+    """
+    backend = config.get('IPFS_BACKEND', 'pinata')
+    if backend == 'pinata':
+        return IPFSService(
+            config['PINATA_API_KEY'],
+            config['PINATA_SECRET_KEY'],
+            config['PINATA_JWT'],
+            pin_index=pin_index,
+            pool_size=config['PINATA_POOL_SIZE'],
+            max_retries=config['PINATA_MAX_RETRIES']
+        )
+    if backend == 'kubo':
+        return KuboIPFSService(
+            config['KUBO_API_URL'],
+            config['IPFS_GATEWAY_URL'],
+            pin_index=pin_index,
+            pool_size=config['PINATA_POOL_SIZE'],
+            max_retries=config['PINATA_MAX_RETRIES']
+        )
+    if backend == 'filesystem':
+        return FilesystemIPFSService(
+            config['IPFS_STORE_DIR'],
+            config['IPFS_GATEWAY_URL'],
+            pin_index=pin_index
+        )
+    raise ValueError(f"IPFS_BACKEND inconnu: {backend} (attendu: {', '.join(BACKENDS)})")
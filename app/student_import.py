@@ -0,0 +1,219 @@
+import csv
+import json
+import zipfile
+from datetime import date, datetime
+
+from app.blockchain import get_connection, IMPORT_STUDENT
+from app.grading import get_mention
+from app.utils import valider_adresse_ethereum, valider_email
+
+IMPORT_FORMATS = ('csv', 'xlsx')
+
+# En-têtes acceptés (minuscules) -> champ de la table students
+COLUMNS = {
+    'adresse': 'adresse',
+    'wallet_address': 'adresse',
+    'wallet': 'adresse',
+    'nom': 'nom',
+    'prenom': 'prenom',
+    'prénom': 'prenom',
+    'email': 'email',
+    'datenaissance': 'dateNaissance',
+    'date_naissance': 'dateNaissance',
+    'moyenne': 'moyenne'
+}
+REQUIRED = ('adresse', 'nom', 'prenom', 'email', 'moyenne')
+
+
+# -------------------------------------------------------------------
+# Lecture du fichier, ligne par ligne
+# -------------------------------------------------------------------
+def read_rows(path, fmt):
+    """
+    Lignes d'un fichier CSV ou XLSX, lues au fil de l'eau
+
+    Args:
+        path: Chemin du fichier
+        fmt: csv ou xlsx
+
+    Returns:
+        iterator: (numéro de ligne, dict des champs reconnus)
+
+    Raises:
+        ValueError: Format inconnu, fichier illisible ou colonnes obligatoires absentes
+            (fichier illisible: aussi pendant le parcours des lignes)
+    """
+    if fmt == 'csv':
+        rows = _readable(_csv_rows(path))
+    elif fmt == 'xlsx':
+        rows = _readable(_xlsx_rows(path))
+    else:
+        raise ValueError(f"Format inconnu: {fmt} (attendu: {', '.join(IMPORT_FORMATS)})")
+
+    header = next(rows, None)
+    if header is None:
+        raise ValueError('Fichier vide')
+    fields = [COLUMNS.get(str(name or '').strip().lower()) for name in header]
+    missing = [name for name in REQUIRED if name not in fields]
+    if missing:
+        rows.close()
+        raise ValueError(f"Colonnes manquantes: {', '.join(missing)}")
+    return _records(fields, rows)
+
+
+def _readable(rows):
+    """Erreurs de lecture d'un fichier corrompu (zip, CSV, encodage) converties en ValueError"""
+    try:
+        yield from rows
+    except (zipfile.BadZipFile, csv.Error, UnicodeDecodeError) as e:
+        raise ValueError(f'Fichier illisible: {e}')
+
+
+def _records(fields, rows):
+    for line, row in enumerate(rows, start=2):
+        if not any(value not in (None, '') for value in row):
+            continue
+        yield line, {field: value for field, value in zip(fields, row) if field}
+
+
+def _csv_rows(path):
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        # Séparateur d'Excel en français: point-virgule
+        try:
+            dialect = csv.Sniffer().sniff(f.read(4096), delimiters=',;\t')
+        except csv.Error:
+            dialect = csv.excel
+        f.seek(0)
+        yield from csv.reader(f, dialect)
+
+
+def _xlsx_rows(path):
+    try:
+        import openpyxl
+    except ImportError:
+        raise RuntimeError("L'import XLSX nécessite openpyxl (pip install openpyxl)")
+
+    # read_only: les lignes sont lues à la demande, sans charger tout le classeur
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+# -------------------------------------------------------------------
+# Validation
+# -------------------------------------------------------------------
+def validate(record):
+    """
+    Valide une ligne et calcule sa mention
+
+    Returns:
+        tuple: (étudiant, None) si la ligne est valide, sinon (None, message d'erreur)
+    """
+    # Adresses comparées en minuscules: la même adresse en checksum est un doublon
+    adresse = str(record.get('adresse') or '').strip().lower()
+    email = str(record.get('email') or '').strip()
+    nom = str(record.get('nom') or '').strip()
+    prenom = str(record.get('prenom') or '').strip()
+    date_naissance = record.get('dateNaissance')
+    if isinstance(date_naissance, (datetime, date)):
+        date_naissance = date_naissance.strftime('%Y-%m-%d')
+
+    if not nom or not prenom:
+        return None, 'Le nom et le prénom sont obligatoires'
+    if not valider_adresse_ethereum(adresse):
+        return None, f'Adresse Ethereum invalide: {adresse}'
+    if not valider_email(email):
+        return None, f'Email invalide: {email}'
+    try:
+        moyenne = float(str(record.get('moyenne')).strip().replace(',', '.'))
+    except ValueError:
+        return None, f"Moyenne invalide: {record.get('moyenne')}"
+    if not 0 <= moyenne <= 20:
+        return None, 'La moyenne doit être entre 0 et 20'
+
+    return {
+        'adresse': adresse,
+        'nom': nom,
+        'prenom': prenom,
+        'dateNaissance': str(date_naissance or '').strip(),
+        'moyenne': moyenne,
+        'mention': get_mention(moyenne),
+        'email': email
+    }, None
+
+
+# -------------------------------------------------------------------
+# Chargement
+# -------------------------------------------------------------------
+def import_students(records, batch_size=5000, db_path=None):
+    """
+    Importe des lignes dans la table students, en une seule transaction
+
+    Les lignes valides sont insérées par lots (executemany); les lignes
+    rejetées sont signalées au fur et à mesure. Si l'import est interrompu,
+    rien n'est écrit.
+
+    Args:
+        records: (numéro de ligne, dict) tels que retournés par read_rows
+        batch_size: Nombre de lignes par executemany
+        db_path: Base des étudiants (BlockchainManager.db_path; par défaut STUDENTS_DB_PATH)
+
+    Yields:
+        dict: {'line', 'error'} par ligne rejetée, puis le bilan {'done': True, ...}
+    """
+    conn = get_connection(db_path)
+    seen = set()
+    batch = []
+    imported = 0
+    rejected = 0
+
+    with conn:
+        for line, record in records:
+            student, error = validate(record)
+            if student and student['adresse'] in seen:
+                error = f"Adresse en double dans le fichier: {student['adresse']}"
+            if error:
+                rejected += 1
+                yield {'line': line, 'error': error}
+                continue
+
+            seen.add(student['adresse'])
+            batch.append((line, student))
+            if len(batch) >= batch_size:
+                inserted, errors = _insert_batch(conn, IMPORT_STUDENT, batch)
+                imported += inserted
+                rejected += len(errors)
+                yield from errors
+                batch = []
+
+        inserted, errors = _insert_batch(conn, IMPORT_STUDENT, batch)
+        imported += inserted
+        rejected += len(errors)
+        yield from errors
+
+    print(f"📥 Import terminé: {imported} étudiants ajoutés, {rejected} lignes rejetées")
+    yield {'done': True, 'success': True, 'imported': imported, 'rejected': rejected}
+
+
+def _insert_batch(conn, statement, batch):
+    """Insère un lot; les adresses déjà en base, quelle que soit leur casse, sont rejetées (une requête par lot)"""
+    if not batch:
+        return 0, []
+    existing = {
+        row[0] for row in conn.execute(
+            'SELECT lower(adresse) FROM students WHERE lower(adresse) IN (SELECT value FROM json_each(?))',
+            (json.dumps([student['adresse'] for _, student in batch]),)
+        )
+    }
+    rows = [
+        (s['adresse'], s['nom'], s['prenom'], s['dateNaissance'], s['moyenne'], s['mention'], s['email'])
+        for _, s in batch if s['adresse'] not in existing
+    ]
+    conn.executemany(statement, rows)
+    errors = [
+        {'line': line, 'error': f"Cette adresse existe déjà: {student['adresse']}"}
+        for line, student in batch if student['adresse'] in existing
+    ]
+    return len(rows), errors
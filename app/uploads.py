@@ -0,0 +1,96 @@
+import os
+import tempfile
+
+from flask import Request, current_app
+from werkzeug.exceptions import RequestEntityTooLarge
+
+from app.cid import CIDBuilder
+
+
+class StreamedUpload:
+    """
+    Fichier uploadé écrit une seule fois sur disque pendant la réception:
+    le CID et la taille sont calculés au fil de l'eau
+    """
+
+    def __init__(self, directory, max_size):
+        """
+        Args:
+            directory: Dossier où écrire le fichier (UPLOAD_FOLDER)
+            max_size: Taille maximale acceptée en octets
+        """
+        fd, self.path = tempfile.mkstemp(dir=directory, suffix='.part')
+        self._file = os.fdopen(fd, 'w+b')
+        self._cid_builder = CIDBuilder()
+        self._cid = None
+        self.max_size = max_size
+        self.size = 0
+        self.kept = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.size > self.max_size:
+            # Le parseur abandonne sans fermer le flux: supprimer le fichier partiel ici
+            self.close()
+            raise RequestEntityTooLarge()
+        self._cid_builder.update(data)
+        return self._file.write(data)
+
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def readline(self, *args):
+        return self._file.readline(*args)
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+    def flush(self):
+        return self._file.flush()
+
+    @property
+    def cid(self):
+        """CIDv1 du contenu reçu"""
+        if self._cid is None:
+            self._cid = self._cid_builder.hexdigest()
+        return self._cid
+
+    def keep(self, path):
+        """Conserve le fichier sous son nom définitif (sinon supprimé à la fin de la requête)"""
+        self._file.flush()
+        os.replace(self.path, path)
+        self.path = path
+        self.kept = True
+
+    def close(self):
+        self._file.close()
+        if not self.kept and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class DiplomaRequest(Request):
+    """
+    Requête Flask dont les PDF de diplômes sont des StreamedUpload
+
+    Les autres uploads (import CSV/XLSX) gardent le parseur de Werkzeug: ni CID,
+    ni plafond MAX_FILE_SIZE des diplômes, mais la limite MAX_IMPORT_SIZE.
+    """
+
+    # Endpoints dont les fichiers sont écrits et hachés pendant la réception
+    streamed_endpoints = ('main.ajouter',)
+    # Endpoints d'import de fichiers (taille bornée par MAX_IMPORT_SIZE)
+    import_endpoints = ('main.import_students_file',)
+
+    @property
+    def max_content_length(self):
+        if self.endpoint in self.import_endpoints:
+            return current_app.config['MAX_IMPORT_SIZE']
+        return super().max_content_length
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if self.endpoint not in self.streamed_endpoints:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        return StreamedUpload(current_app.config['UPLOAD_FOLDER'], current_app.config['MAX_FILE_SIZE'])
@@ -32,6 +32,47 @@ contract DiplomaNFT is ERC721, ERC721URIStorage, Ownable {
         string memory degreeType,
         string memory institution
     ) public onlyOwner returns (uint256) {
+        return _mintDiploma(studentAddress, tokenURI, studentName, degreeType, institution);
+    }
+    
+    function batchMintDiploma(
+        address[] calldata studentAddresses,
+        string[] calldata tokenURIs,
+        string[] calldata studentNames,
+        string[] calldata degreeTypes,
+        string[] calldata institutions
+    ) public onlyOwner returns (uint256[] memory) {
+        uint256 count = studentAddresses.length;
+        require(count > 0, "Lot vide");
+        require(
+            tokenURIs.length == count &&
+            studentNames.length == count &&
+            degreeTypes.length == count &&
+            institutions.length == count,
+            "Tailles de tableaux incoherentes"
+        );
+        
+        uint256[] memory tokenIds = new uint256[](count);
+        for (uint256 i = 0; i < count; i++) {
+            tokenIds[i] = _mintDiploma(
+                studentAddresses[i],
+                tokenURIs[i],
+                studentNames[i],
+                degreeTypes[i],
+                institutions[i]
+            );
+        }
+        
+        return tokenIds;
+    }
+    
+    function _mintDiploma(
+        address studentAddress,
+        string memory tokenURI,
+        string memory studentName,
+        string memory degreeType,
+        string memory institution
+    ) internal returns (uint256) {
         require(studentAddress != address(0), "Adresse invalide");
         require(bytes(tokenURI).length > 0, "URI vide");
         
@@ -0,0 +1,41 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# Les tests importent le paquet app depuis la racine du dépôt
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Aucune donnée du dépôt (diplomes.db, students.db, uploads...) ne doit être touchée:
+# pytest importe le __init__.py de la racine, qui appelle create_app()
+_data_dir = tempfile.mkdtemp(prefix='diplomes-tests-')
+os.environ.update({
+    'DATA_DB_PATH': os.path.join(_data_dir, 'diplomes.db'),
+    'STUDENTS_DB_PATH': os.path.join(_data_dir, 'students.db'),
+    'UPLOAD_FOLDER': os.path.join(_data_dir, 'uploads'),
+    'IPFS_BACKEND': 'filesystem',
+    'IPFS_STORE_DIR': os.path.join(_data_dir, 'ipfs_store'),
+    'IPFS_CACHE_DIR': os.path.join(_data_dir, 'ipfs_cache'),
+    'INDEXER_ENABLED': 'false'
+})
+
+
+@pytest.fixture
+def flask_app(tmp_path, monkeypatch):
+    """Application complète, avec ses bases et dossiers dans tmp_path"""
+    from app import create_app
+    from app.config import Config
+
+    for name, value in {
+        'DATA_DB_PATH': str(tmp_path / 'diplomes.db'),
+        'STUDENTS_DB_PATH': str(tmp_path / 'students.db'),
+        'UPLOAD_FOLDER': str(tmp_path / 'uploads'),
+        'IPFS_STORE_DIR': str(tmp_path / 'ipfs_store'),
+        'IPFS_CACHE_DIR': str(tmp_path / 'ipfs_cache')
+    }.items():
+        monkeypatch.setattr(Config, name, value)
+    app = create_app()
+    app.config['TESTING'] = True
+    return app
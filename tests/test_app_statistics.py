@@ -0,0 +1,95 @@
+import importlib.util
+import os
+
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app')
+
+
+@pytest.fixture
+def gestion(tmp_path, monkeypatch):
+    """Application app/app.py (imports grading/journal à plat), avec son journal dans tmp_path"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(APP_DIR)
+    spec = importlib.util.spec_from_file_location('gestion_etudiants', os.path.join(APP_DIR, 'app.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    yield module
+    module.journal.close()
+
+
+def _recomputed(etudiants):
+    moyennes = [etu['moyenne'] for etu in etudiants]
+    mentions = {}
+    for etu in etudiants:
+        mentions[etu['mention']] = mentions.get(etu['mention'], 0) + 1
+    return {
+        'total': len(moyennes),
+        'moyenne_classe': sum(moyennes) / len(moyennes) if moyennes else 0,
+        'reussis': sum(m >= 10 for m in moyennes),
+        'excellents': sum(m >= 16 for m in moyennes),
+        'mentions': mentions
+    }
+
+
+def _assert_matches(stats, etudiants):
+    expected = _recomputed(etudiants)
+    assert stats.pop('moyenne_classe') == pytest.approx(expected.pop('moyenne_classe'))
+    assert stats == expected
+
+
+def _ajouter(client, i, moyenne):
+    response = client.post('/ajouter', data={'adresse': f'0x{i:040x}', 'nom': f'Nom {i}', 'prenom': 'P',
+                                             'date_naissance': '2000-01-01', 'moyenne': str(moyenne)})
+    assert response.status_code == 302
+
+
+def test_running_totals_follow_adds_and_deletes(gestion):
+    client = gestion.app.test_client()
+    for i, moyenne in enumerate([8, 10, 12.5, 14, 16, 19.5]):
+        _ajouter(client, i, moyenne)
+    _assert_matches(gestion.calculer_statistiques(), gestion.etudiants)
+
+    client.get('/supprimer/4')
+    client.get('/supprimer/0')
+    stats = gestion.calculer_statistiques()
+    assert stats['total'] == 4 and stats['excellents'] == 1
+    _assert_matches(stats, gestion.etudiants)
+
+    client.get('/reinitialiser')
+    assert gestion.calculer_statistiques() == _recomputed([])
+
+
+def test_totals_rebuilt_from_journal_on_load(gestion):
+    client = gestion.app.test_client()
+    for i, moyenne in enumerate([9, 11, 17]):
+        _ajouter(client, i, moyenne)
+    expected = gestion.calculer_statistiques()
+
+    gestion.stats_courantes.reinitialiser()
+    gestion.charger_donnees()
+
+    assert gestion.calculer_statistiques() == expected
+    assert expected['total'] == 3
+
+
+def test_add_still_journaled_after_failed_load(gestion, tmp_path):
+    (tmp_path / 'etudiants.json').write_text('pas du json', encoding='utf-8')
+    gestion.charger_donnees()
+    client = gestion.app.test_client()
+
+    _ajouter(client, 1, 12)
+
+    assert [etu['nom'] for etu in gestion.etudiants] == ['Nom 1']
+    assert 'Nom 1' in (tmp_path / 'etudiants.json.log').read_text(encoding='utf-8')
+
+
+def test_journal_error_not_reported_as_invalid_average(gestion, monkeypatch):
+    messages = []
+    monkeypatch.setattr(gestion, 'flash', lambda message, category: messages.append(message))
+    monkeypatch.setattr(gestion, 'render_template', lambda template, **context: '')
+    gestion.journal.close()
+
+    gestion.app.test_client().post('/ajouter', data={'nom': 'Nom', 'prenom': 'P', 'moyenne': '12'})
+
+    assert len(messages) == 1 and messages[0].startswith("Erreur d'enregistrement")
@@ -0,0 +1,126 @@
+import asyncio
+from types import SimpleNamespace
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+from app.async_blockchain_nft import AsyncBlockchainNFT
+from app.nonce_manager import NonceManager
+from app.receipt_tracker import ReceiptTracker
+
+MINTS = 20
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class FakeNode:
+    """Nœud JSON-RPC synchrone interrogé par le tracker de receipts"""
+
+    def __init__(self):
+        self.mined = {}
+        self.receipt_batches = []
+
+    def post(self, url, json, timeout):
+        if json[0]['method'] == 'eth_getTransactionReceipt':
+            self.receipt_batches.append(len(json))
+        results = []
+        for call in json:
+            if call['method'] == 'eth_blockNumber':
+                result = hex(100 + len(self.mined))
+            else:
+                result = self.mined.get(call['params'][0])
+            results.append({'id': call['id'], 'result': result})
+        return FakeResponse(results)
+
+    def mine(self, tx_hashes):
+        for tx_hash in tx_hashes:
+            self.mined[tx_hash] = {'transactionHash': tx_hash, 'blockNumber': '0x64', 'status': '0x1',
+                                   'gasUsed': '0x5208', 'logs': []}
+
+
+class FakeCall:
+    async def build_transaction(self, params):
+        return dict(params)
+
+
+def _client(node):
+    client = object.__new__(AsyncBlockchainNFT)
+    client.chain_id = 80002
+    client.w3 = SimpleNamespace(is_address=lambda address: True)
+    client.owner_account = SimpleNamespace(address='0x' + '2' * 40)
+    client.nonce_manager = NonceManager(SimpleNamespace(eth=SimpleNamespace(
+        get_transaction_count=lambda address, block: 0)), client.owner_account.address)
+    client.fee_oracle = SimpleNamespace(fee_params=lambda: {})
+
+    async def gas_limit_async(call, strings, sender):
+        return 200000
+    client.gas_model = SimpleNamespace(gas_limit_async=gas_limit_async)
+
+    def process_receipt(receipt):
+        return [{'args': {'tokenId': client.tokens[Web3.to_hex(receipt['transactionHash'])]}}]
+    client.contract = SimpleNamespace(
+        functions=SimpleNamespace(mintDiploma=lambda *args: FakeCall()),
+        events=SimpleNamespace(DiplomaMinted=lambda: SimpleNamespace(process_receipt=process_receipt))
+    )
+    client.tokens = {}
+
+    async def send_transaction(tx):
+        nonce = client.nonce_manager.allocate()
+        tx_hash = HexBytes(nonce.to_bytes(32, 'big'))
+        client.tokens[Web3.to_hex(tx_hash)] = nonce
+        return tx_hash, nonce
+    client._send_transaction = send_transaction
+
+    client.receipt_tracker = ReceiptTracker('http://node', session=node, poll_interval=0.01)
+    client._semaphore = asyncio.Semaphore(2)
+    return client
+
+
+def test_mints_release_slot_once_sent_and_share_receipt_polling():
+    node = FakeNode()
+
+    async def scenario():
+        client = _client(node)
+        mints = [
+            asyncio.create_task(client.mint_diploma(f'0x{i:040x}', f'ipfs://{i}', 'Nom', 'Master', 'Université'))
+            for i in range(MINTS)
+        ]
+
+        # Deux places seulement: tous les mints ne partent que si l'attente n'en occupe aucune
+        async def all_sent():
+            while len(client.tokens) < MINTS:
+                await asyncio.sleep(0.01)
+        await asyncio.wait_for(all_sent(), 5)
+
+        node.mine(list(client.tokens))
+        return client, await asyncio.wait_for(asyncio.gather(*mints), 5)
+
+    client, results = asyncio.run(scenario())
+
+    assert all(result['success'] for result in results)
+    assert sorted(result['token_id'] for result in results) == list(range(MINTS))
+    assert client.nonce_manager._in_flight == set()
+    # Receipts demandés par batch, pas un polling par transaction
+    assert max(node.receipt_batches) > 1
+    assert sum(node.receipt_batches) < MINTS * 3
+
+
+def test_receipt_timeout_reports_pending():
+    node = FakeNode()
+
+    async def scenario():
+        client = _client(node)
+        return await client.wait_for_mint('0x' + 'ab' * 32, timeout=0.2)
+
+    result = asyncio.run(scenario())
+    assert result['success'] is False
+    assert result['pending'] is True
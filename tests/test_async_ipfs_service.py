@@ -0,0 +1,54 @@
+import asyncio
+import json
+
+from app.async_ipfs_service import AsyncIPFSService
+from app.cid import compute_cid, compute_file_cid, json_bytes
+from app.ipfs_service import IPFSService
+from app.pin_index import PinIndex
+
+
+def _service(cls, tmp_path):
+    return cls(None, None, 'jwt', pin_index=PinIndex(str(tmp_path / 'pins.db')))
+
+
+def test_async_upload_reuses_pinned_content(tmp_path):
+    path = tmp_path / 'diplome.pdf'
+    path.write_bytes(b'%PDF-1.4 diplome')
+    cid = compute_file_cid(str(path))
+    metadata = {'name': 'Diplôme Master - Dupont Marie', 'image': f'ipfs://{cid}'}
+    posts = []
+
+    async def post(url, timeout, build_body):
+        posts.append(url)
+        ipfs_hash = cid if url.endswith('pinFileToIPFS') else compute_cid(json_bytes(metadata))
+        return 200, json.dumps({'IpfsHash': ipfs_hash, 'PinSize': 16, 'Timestamp': 'now'})
+
+    async def scenario():
+        service = _service(AsyncIPFSService, tmp_path)
+        service._post = post
+        first = [await service.upload_file(str(path), 'diplome.pdf'), await service.upload_metadata(metadata)]
+        again = [await service.upload_file(str(path), 'copie.pdf'), await service.upload_metadata(metadata)]
+        return first, again
+
+    first, again = asyncio.run(scenario())
+
+    assert len(posts) == 2
+    assert all(result['success'] for result in first + again)
+    assert again[0] == first[0]
+    assert again[1]['url'] == first[1]['url']
+
+
+def test_sync_and_async_services_share_the_pin_index(tmp_path):
+    path = tmp_path / 'diplome.pdf'
+    path.write_bytes(b'%PDF-1.4 diplome')
+    cid = compute_file_cid(str(path))
+    index = PinIndex(str(tmp_path / 'pins.db'))
+    index.add(cid, {'ipfs_hash': cid, 'size': 16, 'timestamp': 'now'}, 'diplome.pdf', 'diploma')
+
+    sync_result = IPFSService(None, None, 'jwt', pin_index=index).upload_file(str(path), 'diplome.pdf')
+    async_result = asyncio.run(
+        AsyncIPFSService(None, None, 'jwt', pin_index=index).upload_file(str(path), 'diplome.pdf')
+    )
+
+    assert sync_result == async_result
+    assert async_result['url'] == f'https://gateway.pinata.cloud/ipfs/{cid}'
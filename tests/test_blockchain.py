@@ -0,0 +1,106 @@
+import threading
+
+import pytest
+
+from app import blockchain
+
+
+@pytest.fixture
+def manager(tmp_path):
+    return blockchain.BlockchainManager(str(tmp_path / 'students.db'))
+
+
+def _in_thread(target):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(target()))
+    thread.start()
+    thread.join(5)
+    return result[0]
+
+
+def test_connection_reused_per_thread_in_wal_mode(manager):
+    conn = blockchain.get_connection(manager.db_path)
+
+    assert blockchain.get_connection(manager.db_path) is conn
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    assert _in_thread(lambda: blockchain.get_connection(manager.db_path)) is not conn
+
+
+def test_readers_not_blocked_by_open_write_transaction(manager):
+    manager.add_student('0x' + '1' * 40, 'Dupont', 'Marie', '2000-01-01', 12)
+    conn = blockchain.get_connection(manager.db_path)
+    conn.execute('BEGIN IMMEDIATE')
+    conn.execute(blockchain.INSERT_STUDENT, ('0x' + '2' * 40, 'Martin', 'Paul', '2000-01-01', 8))
+    try:
+        # Lecture depuis un autre thread pendant l'écriture: voit l'état validé
+        students = _in_thread(manager.get_all_students)
+    finally:
+        conn.rollback()
+
+    assert [student['nom'] for student in students] == ['Dupont']
+
+
+
+def _recomputed(manager):
+    """Statistiques recalculées depuis la table complète"""
+    moyennes = [student['moyenneGenerale'] for student in manager.get_all_students()]
+    return {
+        'total': len(moyennes),
+        'moyenne_generale': round(sum(moyennes) / len(moyennes), 2) if moyennes else 0.0,
+        'reussis': sum(m >= 10 for m in moyennes),
+        'excellents': sum(m >= 16 for m in moyennes),
+        'mentions': {
+            'Passable': sum(m < 10 for m in moyennes),
+            'AssezBien': sum(10 <= m < 12 for m in moyennes),
+            'Bien': sum(12 <= m < 14 for m in moyennes),
+            'TresBien': sum(14 <= m < 16 for m in moyennes),
+            'Excellent': sum(m >= 16 for m in moyennes)
+        }
+    }
+
+
+def test_statistics_follow_inserts_updates_and_deletes(manager):
+    assert manager.get_statistics() == _recomputed(manager)
+
+    manager.add_students([
+        {'adresse': f'0x{i:040x}', 'nom': f'Nom {i}', 'prenom': 'P', 'dateNaissance': '2000-01-01', 'moyenne': m}
+        for i, m in enumerate([8, 10, 11.5, 12, 14, 15.99, 16, 19])
+    ])
+    assert manager.get_statistics() == _recomputed(manager)
+
+    conn = blockchain.get_connection(manager.db_path)
+    with conn:
+        conn.execute('UPDATE students SET moyenne = 17 WHERE adresse = ?', (f'0x{0:040x}',))
+        conn.execute('DELETE FROM students WHERE adresse = ?', (f'0x{6:040x}',))
+    stats = manager.get_statistics()
+    assert stats == _recomputed(manager)
+    assert stats['mentions']['Passable'] == 0
+    assert stats['excellents'] == 2
+
+
+def test_statistics_initialised_from_existing_rows(tmp_path):
+    # Base antérieure aux triggers: la synthèse est calculée à la création
+    db_path = str(tmp_path / 'students.db')
+    conn = blockchain.get_connection(db_path)
+    conn.execute('CREATE TABLE students (adresse TEXT PRIMARY KEY, nom TEXT, prenom TEXT, '
+                 'dateNaissance TEXT, moyenne REAL)')
+    with conn:
+        conn.executemany('INSERT INTO students VALUES (?, ?, ?, ?, ?)',
+                         [(f'0x{i:040x}', 'Nom', 'P', '2000-01-01', m) for i, m in enumerate([9, 13, 18])])
+
+    manager = blockchain.BlockchainManager(db_path)
+
+    assert manager.get_statistics() == _recomputed(manager)
+    assert manager.get_statistics()['total'] == 3
+
+
+def test_managers_on_different_files_stay_independent(tmp_path):
+    first = blockchain.BlockchainManager(str(tmp_path / 'a.db'))
+    second = blockchain.BlockchainManager(str(tmp_path / 'b.db'))
+
+    first.add_student('0x' + '1' * 40, 'Dupont', 'Marie', '2000-01-01', 12)
+    second.add_student('0x' + '2' * 40, 'Martin', 'Paul', '2000-01-01', 8)
+
+    assert [s['nom'] for s in first.get_all_students()] == ['Dupont']
+    assert [s['nom'] for s in second.get_all_students()] == ['Martin']
+    assert first.get_statistics()['total'] == second.get_statistics()['total'] == 1
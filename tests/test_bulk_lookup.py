@@ -0,0 +1,73 @@
+from types import SimpleNamespace
+
+from eth_abi import encode
+from web3 import Web3
+
+from app.blockchain_nft import BlockchainNFT
+from app.diploma_cache import DiplomaCache
+
+CONTRACT = '0x' + 'c' * 40
+INFO_TYPES = ['string', 'string', 'string', 'uint256', 'bool']
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class FakeNode:
+    """eth_call de getDiplomaInfo: les tokens inconnus renvoient un revert"""
+
+    def __init__(self, contract, tokens):
+        self.contract = contract
+        self.tokens = tokens
+        self.batches = []
+
+    def post(self, url, json, timeout):
+        self.batches.append(len(json))
+        results = []
+        for call in json:
+            data = call['params'][0]['data']
+            token_id = self.contract.decode_function_input(data)[1]['tokenId']
+            if token_id in self.tokens:
+                info = (f'Etudiant {token_id}', 'Master', 'Université', 1700000000, True)
+                results.append({'id': call['id'], 'result': Web3.to_hex(encode(INFO_TYPES, info))})
+            else:
+                results.append({'id': call['id'], 'error': {'message': 'execution reverted: Token inexistant'}})
+        return FakeResponse(results)
+
+
+def _client():
+    client = object.__new__(BlockchainNFT)
+    client.w3 = Web3()
+    client.rpc_url = 'http://node'
+    client.contract = client.w3.eth.contract(address=Web3.to_checksum_address(CONTRACT),
+                                             abi=client._get_minimal_abi())
+    client.session = FakeNode(client.contract, tokens={1, 2, 3, 4})
+    client._multicall_available = False
+    client.cache = DiplomaCache(100, live=lambda: True)
+    return client
+
+
+def test_bulk_lookup_batches_only_uncached_tokens():
+    client = _client()
+
+    results = client.get_diplomas_info([1, 2, 99, 3], chunk_size=2)
+    assert client.session.batches == [2, 2]
+    assert [r['token_id'] for r in results] == [1, 2, 99, 3]
+    assert results[0]['student_name'] == 'Etudiant 1'
+    assert results[3]['is_valid'] is True
+    assert results[2]['success'] is False
+    assert 'Token inexistant' in results[2]['error']
+
+    # Les diplômes déjà lus viennent du cache: un seul appel pour 4 et 99
+    client.session.batches.clear()
+    results = client.get_diplomas_info([3, 4, 1, 99], chunk_size=200)
+    assert client.session.batches == [2]
+    assert [r['success'] for r in results] == [True, True, True, False]
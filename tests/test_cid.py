@@ -0,0 +1,67 @@
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from app.cid import CHUNK_SIZE, MAX_LINKS, CIDBuilder, compute_cid, compute_file_cid
+
+# CID publié du fichier vide (feuille raw vide, CIDv1)
+EMPTY_CID = 'bafkreihdwdcefgh4dqkjv67uzcmw7ojee6xedzdetojuzjevtenxquvyku'
+
+# Tailles comparées à `ipfs add` (kubo): les CIDs attendus viennent de kubo lui-même
+KUBO_CASES = {
+    # Un seul chunk partiel: la feuille raw est la racine
+    'small': 1000,
+    # Exactement un chunk: toujours une seule feuille, sans nœud dag-pb
+    'one_chunk': CHUNK_SIZE,
+    # Un octet de plus: deux feuilles sous un nœud dag-pb
+    'one_chunk_plus_one': CHUNK_SIZE + 1,
+    # Plus de 174 chunks: arbre équilibré à deux niveaux, dernier chunk partiel
+    'two_levels': (MAX_LINKS + 1) * CHUNK_SIZE + 1000,
+}
+
+# CI (workflow tests.yml): kubo est installé et la comparaison ne doit pas être sautée
+REQUIRE_KUBO = os.getenv('REQUIRE_KUBO', '').lower() in ('1', 'true')
+
+
+def _content(size):
+    pattern = bytes(i % 251 for i in range(251 * 1024))
+    return (pattern * (size // len(pattern) + 1))[:size]
+
+
+def test_empty_file_cid():
+    assert compute_cid(b'') == EMPTY_CID
+
+
+@pytest.mark.parametrize('name', KUBO_CASES)
+def test_file_cid_is_independent_of_read_size(name, tmp_path):
+    data = _content(KUBO_CASES[name])
+    path = tmp_path / name
+    path.write_bytes(data)
+    expected = compute_cid(data)
+    assert compute_file_cid(str(path), block_size=65536) == expected
+    assert compute_file_cid(str(path), block_size=100003) == expected
+
+
+def test_streamed_updates_match_single_update():
+    data = _content(3 * CHUNK_SIZE + 17)
+    builder = CIDBuilder()
+    for start in range(0, len(data), 7919):
+        builder.update(data[start:start + 7919])
+    assert builder.hexdigest() == compute_cid(data)
+    assert builder.size == len(data)
+
+
+@pytest.mark.skipif(shutil.which('ipfs') is None and not REQUIRE_KUBO, reason='kubo (ipfs) non installé')
+@pytest.mark.parametrize('name', ['empty', *KUBO_CASES])
+def test_cid_matches_kubo(name, tmp_path):
+    data = _content(KUBO_CASES.get(name, 0))
+    path = tmp_path / name
+    path.write_bytes(data)
+    output = subprocess.run(
+        ['ipfs', 'add', '--only-hash', '--cid-version=1', '--raw-leaves', '--chunker=size-262144',
+         '-Q', str(path)],
+        check=True, capture_output=True, text=True
+    ).stdout.strip()
+    assert compute_cid(data) == output
@@ -0,0 +1,46 @@
+from app.diploma_cache import DiplomaCache
+
+INFO = {'success': True, 'student_name': 'Marie Dupont', 'is_valid': True}
+
+
+def test_entries_expire_after_ttl():
+    cache = DiplomaCache(10, ttl=0, live=lambda: True)
+    cache.put_info(1, INFO)
+    assert cache.get_info(1) is None
+    assert cache.stats()['expirations'] == 1
+
+    cache.ttl = 300
+    cache.put_info(1, INFO)
+    assert cache.get_info(1) == INFO
+
+
+def test_revocation_event_invalidates_entry():
+    cache = DiplomaCache(10, live=lambda: True)
+    cache.put_info(1, INFO)
+    cache.put_info(2, INFO)
+    cache.on_events([], [1])
+    assert cache.get_info(1) is None
+    assert cache.get_info(2) == INFO
+
+
+def test_cache_bypassed_while_indexer_is_stopped():
+    running = [True]
+    cache = DiplomaCache(10, live=lambda: running[0])
+    cache.put_info(1, INFO)
+
+    # Indexeur arrêté: une révocation passerait inaperçue, le contrat fait foi
+    running[0] = False
+    assert cache.get_info(1) is None
+    cache.put_info(2, INFO)
+    assert cache.stats()['entries'] == 0
+
+    # Au redémarrage, les entrées d'avant l'arrêt ne sont pas resservies
+    running[0] = True
+    assert cache.get_info(1) is None
+
+
+def test_cache_disabled_without_indexer():
+    cache = DiplomaCache(10)
+    cache.put_info(1, INFO)
+    assert cache.get_info(1) is None
+    assert cache.stats()['live'] is False
@@ -0,0 +1,147 @@
+import pytest
+
+from app.diploma_index import DiplomaIndex, encode_cursor
+
+NOMS = ['Dupont', 'martin', 'Durand', 'dupont', 'Bernard']
+DIPLOMES = ['Master', 'Licence']
+
+
+def _etudiant(i, **fields):
+    return {
+        'nft_token_id': i, 'wallet_address': f'0x{i:040x}', 'nom': NOMS[i % len(NOMS)], 'prenom': f'P{i}',
+        'email': f'etudiant{i}@univ.fr', 'diplome': DIPLOMES[i % 2], 'specialite': 'Informatique',
+        'institution': 'Université de Lyon', 'ipfs_url': None, 'metadata_url': None, 'tx_hash': None,
+        # Beaucoup d'égalités sur chaque clé de tri, et des moyennes absentes
+        'date_ajout': f'2024-01-0{i % 3 + 1}', 'moyenne': [12.0, 15.5, None][i % 3], 'mention': None,
+        **fields
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DiplomaIndex(str(tmp_path / 'diplomes.db'))
+    for i in range(23):
+        index.record_issued(_etudiant(i))
+    return index
+
+
+def _walk(index, sort, order, limit, **filters):
+    ids = []
+    cursor = None
+    while True:
+        etudiants, cursor = index.page(sort, order, cursor, limit, **filters)
+        assert len(etudiants) <= limit
+        ids += [etudiant['id'] for etudiant in etudiants]
+        if cursor is None:
+            return ids
+
+
+def _expected(index, sort, order, **filters):
+    keys = {
+        'date': lambda e: e['date_ajout'] or '',
+        'nom': lambda e: e['nom'].lower(),
+        'moyenne': lambda e: -1 if e['moyenne'] is None else e['moyenne']
+    }
+    rows = [e for e in index.list_all() if all(e[name] == value for name, value in filters.items())]
+    rows.sort(key=lambda e: (keys[sort](e), e['id']), reverse=order == 'desc')
+    return [e['id'] for e in rows]
+
+
+@pytest.mark.parametrize('sort', ['date', 'nom', 'moyenne'])
+@pytest.mark.parametrize('order', ['asc', 'desc'])
+@pytest.mark.parametrize('limit', [1, 4, 7, 23, 50])
+def test_pages_cover_every_diploma_once_in_order(index, sort, order, limit):
+    assert _walk(index, sort, order, limit) == _expected(index, sort, order)
+
+
+def test_pages_with_filter(index):
+    assert _walk(index, 'moyenne', 'desc', 3, diplome='Master') == _expected(index, 'moyenne', 'desc', diplome='Master')
+
+
+def test_rows_added_between_pages_are_not_repeated(index):
+    first, cursor = index.page('date', 'asc', None, 10)
+    index.record_issued(_etudiant(100, date_ajout='2024-01-01'))
+
+    rest = _walk_from(index, cursor)
+
+    seen = [e['id'] for e in first] + rest
+    assert len(seen) == len(set(seen))
+
+
+def _walk_from(index, cursor):
+    ids = []
+    while cursor:
+        etudiants, cursor = index.page('date', 'asc', cursor, 10)
+        ids += [etudiant['id'] for etudiant in etudiants]
+    return ids
+
+
+@pytest.mark.parametrize('cursor', [
+    'pas-un-curseur',
+    encode_cursor('nom', 'asc', 'dupont', 3),
+    encode_cursor('date', 'desc', '2024-01-01', 3),
+    encode_cursor('date', 'asc', '2024-01-01', '3'),
+])
+def test_invalid_cursor_rejected(index, cursor):
+    with pytest.raises(ValueError):
+        index.page('date', 'asc', cursor, 10)
+
+
+def test_api_reports_invalid_parameters(flask_app):
+    client = flask_app.test_client()
+
+    assert client.get('/api/etudiants?after=pas-un-curseur').status_code == 400
+    assert client.get('/api/etudiants?sort=wallet').status_code == 400
+    assert client.get('/api/etudiants?order=up').status_code == 400
+
+
+@pytest.fixture
+def search_index(tmp_path):
+    index = DiplomaIndex(str(tmp_path / 'recherche.db'))
+    for i, (nom, prenom, institution) in enumerate([
+        ('Dupont', 'Hélène', 'Université de Lyon'),
+        ('Lefèvre', 'Marie', 'École Polytechnique'),
+        ('Martin', 'Dupontel', 'Université de Lyon'),
+        ('Bernard', 'Paul', 'Université Dupont'),
+    ]):
+        index.record_issued(_etudiant(i, nom=nom, prenom=prenom, institution=institution))
+    return index
+
+
+def _noms(etudiants):
+    return [etudiant['nom'] for etudiant in etudiants]
+
+
+def test_search_matches_prefixes_ignoring_accents_and_case(search_index):
+    assert _noms(search_index.search('lefevre')) == ['Lefèvre']
+    assert _noms(search_index.search('HEL')) == ['Dupont']
+    assert _noms(search_index.search('ecole poly')) == ['Lefèvre']
+
+
+def test_search_ranks_name_above_institution(search_index):
+    # "dupont": nom exact d'abord, prénom en préfixe ensuite, institution en dernier
+    assert _noms(search_index.search('dupont'))[-1] == 'Bernard'
+    assert set(_noms(search_index.search('dupont'))[:2]) == {'Dupont', 'Martin'}
+
+
+@pytest.mark.parametrize('query', ['dupont"', 'dup*', '(dupont', '^dupont', '-dupont', 'dupont)', "'dupont'"])
+def test_search_punctuation_ignored(search_index, query):
+    assert search_index.search(query) == search_index.search('dupont')
+
+
+@pytest.mark.parametrize('query', ['"', '+', '*', '()', 'NOT dupont', 'dupont OR', 'dupont AND', 'nom:dupont',
+                                   'NEAR(dupont lyon)'])
+def test_search_operators_taken_as_plain_words(search_index, query):
+    # Opérateurs FTS5 cherchés comme des mots: aucun diplôme ne les contient, pas d'erreur de syntaxe
+    assert search_index.search(query) == []
+
+
+def test_search_api_with_operator_characters(flask_app):
+    flask_app.extensions['diploma_index'].record_issued(_etudiant(1, nom='Dupont'))
+    client = flask_app.test_client()
+
+    response = client.get('/api/search', query_string={'q': '"dupont*'})
+    assert response.status_code == 200
+    assert _noms(response.get_json()['etudiants']) == ['Dupont']
+    assert client.get('/api/search', query_string={'q': 'dupont" OR *'}).status_code == 200
+    assert client.get('/api/search?q=').status_code == 400
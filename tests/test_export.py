@@ -0,0 +1,55 @@
+import csv
+import io
+import json
+
+import pytest
+
+TOTAL = 2345
+
+
+@pytest.fixture
+def client(flask_app):
+    # Plus de diplômes qu'une page de lecture de l'export (1000)
+    conn = flask_app.extensions['diploma_index']._connect()
+    with conn:
+        conn.executemany(
+            'INSERT INTO diplomes (token_id, nom, prenom, diplome, moyenne, date_ajout) VALUES (?, ?, ?, ?, ?, ?)',
+            [(i, f'Nom {i}', 'Prénom', ['Master', 'Licence'][i % 2], i % 20, f'2024-01-{i % 28 + 1:02d}')
+             for i in range(TOTAL)]
+        )
+    conn.close()
+    return flask_app.test_client()
+
+
+def test_csv_export_streams_every_diploma_once(client):
+    response = client.get('/api/etudiants/export?format=csv&sort=moyenne&order=desc')
+
+    assert response.is_streamed
+    assert response.mimetype == 'text/csv'
+    body = response.get_data(as_text=True)
+    assert body.startswith('\ufeff')
+    rows = list(csv.DictReader(io.StringIO(body[1:])))
+    assert len(rows) == TOTAL
+    assert sorted(int(row['nft_token_id']) for row in rows) == list(range(TOTAL))
+    moyennes = [float(row['moyenne']) for row in rows]
+    assert moyennes == sorted(moyennes, reverse=True)
+    assert rows[0]['nom'] and rows[0]['prenom'] == 'Prénom'
+
+
+def test_ndjson_export_with_filter(client):
+    response = client.get('/api/etudiants/export?format=ndjson&diplome=Licence')
+
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == TOTAL // 2
+    assert {line['diplome'] for line in lines} == {'Licence'}
+    assert len({line['nft_token_id'] for line in lines}) == len(lines)
+    assert [line['date_ajout'] for line in lines] == sorted(line['date_ajout'] for line in lines)
+
+
+@pytest.mark.parametrize('query', ['format=xml', 'sort=wallet', 'order=up', 'format=ndjson&sort=wallet'])
+def test_invalid_export_rejected_before_streaming(client, query):
+    response = client.get(f'/api/etudiants/export?{query}')
+
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
@@ -0,0 +1,54 @@
+from types import SimpleNamespace
+
+from web3 import Web3
+
+from app.fee_oracle import FeeOracle, GasModel
+
+GWEI = 10 ** 9
+
+
+class FakeEth:
+    def __init__(self):
+        self.calls = 0
+
+    def fee_history(self, block_count, newest, percentiles):
+        self.calls += 1
+        return {
+            'baseFeePerGas': [10 * GWEI, 20 * GWEI],
+            'reward': [[40 * GWEI], [50 * GWEI], [35 * GWEI], []]
+        }
+
+
+def test_fee_params_are_shared_until_ttl_expires():
+    w3 = SimpleNamespace(eth=FakeEth(), to_wei=Web3.to_wei)
+    oracle = FeeOracle(w3, ttl=60)
+
+    fees = oracle.fee_params()
+    # Pourboire médian observé, base fee du prochain bloc doublé
+    assert fees == {'maxFeePerGas': 2 * 20 * GWEI + 40 * GWEI, 'maxPriorityFeePerGas': 40 * GWEI}
+    assert oracle.fee_params() == fees
+    assert w3.eth.calls == 1
+
+    oracle._expires_at = 0
+    oracle.fee_params()
+    assert w3.eth.calls == 2
+
+
+def test_gas_limit_estimated_once_per_payload_size():
+    estimates = []
+
+    def call(strings):
+        def estimate_gas(params):
+            estimates.append(strings)
+            return 100000
+        return SimpleNamespace(fn_name='mintDiploma', estimate_gas=estimate_gas)
+
+    model = GasModel(safety_margin=1.25)
+    short = ['ipfs://a', 'Marie Dupont', 'Master', 'Université']
+    same_size = ['ipfs://b', 'Jean Martin', 'Licence', 'Université']
+    longer = ['ipfs://' + 'c' * 60, 'Marie Dupont', 'Master', 'Université']
+
+    assert model.gas_limit(call(short), short, '0x0') == 125000
+    assert model.gas_limit(call(same_size), same_size, '0x0') == 125000
+    model.gas_limit(call(longer), longer, '0x0')
+    assert estimates == [short, longer]
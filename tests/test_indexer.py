@@ -0,0 +1,122 @@
+from types import SimpleNamespace
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+from app.diploma_index import DiplomaIndex
+from app.indexer import DiplomaIndexer, find_deployment_block
+
+MINTED = Web3.keccak(text='DiplomaMinted(uint256,address,string)')
+REVOKED = Web3.keccak(text='DiplomaRevoked(uint256)')
+CONTRACT = '0x' + 'c' * 40
+
+
+class FakeEth:
+    """Journal d'événements du contrat; refuse les plages de plus de max_range blocs"""
+
+    def __init__(self, block_number, logs, max_range, deployed_at=0, archive=True):
+        self.block_number = block_number
+        self.logs = logs
+        self.max_range = max_range
+        self.deployed_at = deployed_at
+        self.archive = archive
+        self.ranges = []
+
+    def get_code(self, address, block):
+        if not self.archive and block < self.block_number - 128:
+            raise ValueError('missing trie node')
+        return b'\x60\x80' if block >= self.deployed_at else b''
+
+    def get_logs(self, params):
+        if params['toBlock'] - params['fromBlock'] + 1 > self.max_range:
+            raise ValueError('query returned more than 10000 results')
+        self.ranges.append((params['fromBlock'], params['toBlock']))
+        return [log for log in self.logs if params['fromBlock'] <= log['blockNumber'] <= params['toBlock']]
+
+
+def _minted(token_id, block):
+    return {'topics': [MINTED], 'blockNumber': block, 'token_id': token_id}
+
+
+def _revoked(token_id, block):
+    return {'topics': [REVOKED], 'blockNumber': block, 'token_id': token_id}
+
+
+def _process_minted(log):
+    return {
+        'args': {'tokenId': log['token_id'], 'student': f"0x{log['token_id']:040x}",
+                 'studentName': f"Etudiant {log['token_id']}"},
+        'transactionHash': HexBytes(bytes([log['token_id']]) * 32),
+        'blockNumber': log['blockNumber']
+    }
+
+
+def _client(eth):
+    events = SimpleNamespace(
+        DiplomaMinted=lambda: SimpleNamespace(process_log=_process_minted),
+        DiplomaRevoked=lambda: SimpleNamespace(process_log=lambda log: {'args': {'tokenId': log['token_id']}})
+    )
+    client = SimpleNamespace(
+        contract_address=CONTRACT,
+        contract=SimpleNamespace(address=CONTRACT, events=events),
+        w3=SimpleNamespace(eth=eth)
+    )
+    return SimpleNamespace(get=lambda: client)
+
+
+def test_sync_indexes_confirmed_blocks_and_checkpoints(tmp_path):
+    index = DiplomaIndex(str(tmp_path / 'diplomes.db'))
+    index.record_issued({
+        'nft_token_id': 1, 'wallet_address': '0x1', 'nom': 'Dupont', 'prenom': 'Marie',
+        'email': 'marie@example.com', 'diplome': 'Master', 'specialite': 'Informatique',
+        'institution': 'Université', 'ipfs_url': 'ipfs://pdf', 'metadata_url': 'ipfs://meta',
+        'tx_hash': '0x01', 'date_ajout': '2024-06-30 10:00:00'
+    })
+    eth = FakeEth(
+        block_number=125,
+        logs=[_minted(1, 101), _minted(2, 110), _revoked(2, 118), _minted(3, 121)],
+        max_range=8
+    )
+    indexer = DiplomaIndexer(_client(eth), index, start_block=100, chunk_size=32, confirmations=5)
+    notified = []
+    indexer.add_listener(lambda minted, revoked: notified.append(([m['token_id'] for m in minted], revoked)))
+
+    indexer.sync()
+
+    # Plage trop large pour le nœud: lots réduits de moitié jusqu'à 8 blocs
+    assert eth.ranges == [(100, 107), (108, 115), (116, 120)]
+    assert index.get_checkpoint(f'logs:{CONTRACT}') == 120
+    assert notified == [([1], []), ([2], []), ([], [2])]
+
+    etudiants = {e['nft_token_id']: e for e in index.list_all()}
+    assert sorted(etudiants) == [1, 2]
+    # Les données du formulaire ne sont pas écrasées par l'événement
+    assert etudiants[1]['nom'] == 'Dupont'
+    assert etudiants[1]['block_number'] == 101
+    assert etudiants[2]['revoked'] is True
+    assert etudiants[2]['nom'] == 'Etudiant 2'
+
+    # Reprise au checkpoint: seuls les nouveaux blocs confirmés sont lus
+    eth.block_number = 130
+    eth.ranges.clear()
+    indexer.sync()
+    assert eth.ranges == [(121, 125)]
+    assert 3 in {e['nft_token_id'] for e in index.list_all()}
+
+
+def test_first_sync_starts_at_deployment_block(tmp_path):
+    index = DiplomaIndex(str(tmp_path / 'diplomes.db'))
+    eth = FakeEth(block_number=100000, logs=[_minted(1, 77777), _minted(2, 99990)], max_range=100000,
+                  deployed_at=77777)
+
+    DiplomaIndexer(_client(eth), index, chunk_size=100000).sync()
+
+    # Diplômes mintés avant le premier démarrage compris
+    assert eth.ranges == [(77777, 99995)]
+    assert sorted(e['nft_token_id'] for e in index.list_all()) == [1, 2]
+
+
+def test_deployment_block_falls_back_to_genesis_without_archive():
+    eth = FakeEth(block_number=100000, logs=[], max_range=1, deployed_at=77777, archive=False)
+
+    assert find_deployment_block(SimpleNamespace(eth=eth), CONTRACT, 99995) == 0
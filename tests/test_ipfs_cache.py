@@ -0,0 +1,86 @@
+import contextlib
+import os
+
+import pytest
+
+from app.cid import compute_cid
+from app.ipfs_cache import IPFSCache
+
+
+class FakeGateway:
+    def __init__(self, contents):
+        self.contents = contents
+        self.requests = []
+
+    @contextlib.contextmanager
+    def get(self, url, stream, timeout):
+        cid = url.rsplit('/', 1)[1]
+        self.requests.append(cid)
+        body = self.contents[cid]
+        response = type('Response', (), {
+            'raise_for_status': lambda self: None,
+            'iter_content': lambda self, size: (body[i:i + size] for i in range(0, len(body), size))
+        })()
+        yield response
+
+
+def _cache(tmp_path, contents, max_bytes=10 ** 6):
+    cache = IPFSCache(str(tmp_path / 'cache'), max_bytes, 'https://gateway/ipfs/', max_object_size=10 ** 6)
+    cache.session = FakeGateway(contents)
+    return cache
+
+
+def test_content_fetched_once_then_served_from_disk(tmp_path):
+    content = b'%PDF-1.4 ' + os.urandom(1000)
+    cid = compute_cid(content)
+    cache = _cache(tmp_path, {cid: content})
+
+    for _ in range(3):
+        with open(cache.get(cid), 'rb') as f:
+            assert f.read() == content
+    assert cache.session.requests == [cid]
+    assert cache.stats()['hits'] == 2
+
+
+def test_content_not_matching_cid_is_rejected(tmp_path):
+    cid = compute_cid(b'original')
+    cache = _cache(tmp_path, {cid: b'falsifie'})
+
+    with pytest.raises(ValueError):
+        cache.get(cid)
+    assert cache.stats()['entries'] == 0
+    assert not os.path.exists(cache.path(cid))
+
+
+def test_least_recently_used_entries_evicted(tmp_path):
+    contents = {compute_cid(bytes([i]) * 400): bytes([i]) * 400 for i in range(3)}
+    first, second, third = contents
+    cache = _cache(tmp_path, contents, max_bytes=1000)
+
+    cache.get(first)
+    cache.get(second)
+    cache.get(first)
+    cache.get(third)
+
+    assert not os.path.exists(cache.path(second))
+    assert os.path.exists(cache.path(first)) and os.path.exists(cache.path(third))
+    assert cache.stats()['size'] == 800
+
+
+def test_route_serves_ranges_and_revalidates(flask_app, tmp_path):
+    content = b'%PDF-1.4 ' + bytes(range(256)) * 8
+    cid = compute_cid(content)
+    path = tmp_path / 'diplome.pdf'
+    path.write_bytes(content)
+    flask_app.extensions['ipfs_cache'].put(cid, str(path))
+    client = flask_app.test_client()
+
+    response = client.get(f'/ipfs/{cid}', headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.data == content[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(content)}'
+    assert response.mimetype == 'application/pdf'
+    assert 'immutable' in response.headers['Cache-Control']
+
+    response = client.get(f'/ipfs/{cid}', headers={'If-None-Match': f'"{cid}"'})
+    assert response.status_code == 304
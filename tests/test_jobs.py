@@ -0,0 +1,114 @@
+import time
+
+from app.jobs import MintJobQueue
+
+PAYLOAD = {
+    'nom': 'Dupont',
+    'prenom': 'Marie',
+    'email': 'marie@example.com',
+    'wallet_address': '0x' + '1' * 40,
+    'diplome': 'Master',
+    'specialite': 'Informatique',
+    'institution': 'Université',
+    'date_emission': '2024-06-30'
+}
+
+
+class FakeIPFS:
+    def pin_diploma_bundle(self, pdf_path, pdf_filename, build_metadata, pdf_cid=None):
+        return {
+            'success': True,
+            'pdf': {'url': 'https://gateway/ipfs/bafypdf'},
+            'metadata': {'url': 'https://gateway/ipfs/bafymeta'}
+        }
+
+
+class FakeBlockchain:
+    """Client dont le premier receipt n'arrive pas avant le timeout"""
+
+    def __init__(self, receipts):
+        self.receipts = list(receipts)
+        self.minted = 0
+        self.waited = []
+
+    def get(self):
+        return self
+
+    def mint_diploma(self, *args, on_tx_sent=None):
+        self.minted += 1
+        on_tx_sent('0xabc')
+        return self.wait_for_mint('0xabc')
+
+    def wait_for_mint(self, tx_hash):
+        self.waited.append(tx_hash)
+        if self.receipts.pop(0):
+            return {'success': True, 'tx_hash': tx_hash, 'token_id': 7}
+        return {'success': False, 'error': 'Transaction envoyée mais pas encore confirmée',
+                'tx_hash': tx_hash, 'pending': True}
+
+
+def _run_all(queue):
+    queue.executor.shutdown(wait=True)
+
+
+def test_receipt_timeout_is_resumed_without_minting_again(tmp_path):
+    db_path = str(tmp_path / 'jobs.db')
+    blockchain = FakeBlockchain([False, True])
+
+    # Relance dans le processus trop lointaine pour ce test: seule la reprise joue
+    queue = MintJobQueue(FakeIPFS(), db_path, blockchain, max_workers=1, receipt_retry_delay=60)
+    job_id = queue.submit(PAYLOAD, None, 'diplome.pdf')
+    _run_all(queue)
+
+    job = queue.get(job_id)
+    assert job['status'] == 'pending'
+    assert job['stage'] == 'tx_sent'
+    assert job['tx_hash'] == '0xabc'
+
+    # Redémarrage: le receipt est de nouveau attendu, sans second mint
+    queue = MintJobQueue(FakeIPFS(), db_path, blockchain, max_workers=1)
+    assert queue.resume_pending() == 1
+    _run_all(queue)
+
+    job = queue.get(job_id)
+    assert job['status'] == 'done'
+    assert job['token_id'] == 7
+    assert job['error'] is None
+    assert blockchain.minted == 1
+    assert blockchain.waited == ['0xabc', '0xabc']
+
+
+def test_receipt_timeout_retried_without_restart(tmp_path):
+    blockchain = FakeBlockchain([False, False, True])
+    recorded = []
+    queue = MintJobQueue(FakeIPFS(), str(tmp_path / 'jobs.db'), blockchain, max_workers=1,
+                         on_confirmed=recorded.append, receipt_retry_delay=0.01)
+
+    job_id = queue.submit(PAYLOAD, None, 'diplome.pdf')
+    deadline = time.monotonic() + 5
+    while not recorded and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert queue.get(job_id)['status'] == 'done'
+    assert [etudiant['nft_token_id'] for etudiant in recorded] == [7]
+    assert blockchain.minted == 1
+    assert blockchain.waited == ['0xabc'] * 3
+    assert queue._receipt_retries == {}
+
+
+def test_confirmed_job_survives_on_confirmed_error(tmp_path):
+    def on_confirmed(etudiant):
+        raise RuntimeError('database is locked')
+
+    pdf_path = tmp_path / 'diplome.pdf'
+    pdf_path.write_bytes(b'%PDF-1.4')
+    queue = MintJobQueue(FakeIPFS(), str(tmp_path / 'jobs.db'), FakeBlockchain([True]),
+                         max_workers=1, on_confirmed=on_confirmed)
+    job_id = queue.submit(PAYLOAD, str(pdf_path), 'diplome.pdf')
+    _run_all(queue)
+
+    job = queue.get(job_id)
+    assert job['status'] == 'done'
+    assert job['data']['nft_token_id'] == 7
+    # Le job s'est terminé normalement: le PDF temporaire a été supprimé
+    assert not pdf_path.exists()
@@ -0,0 +1,117 @@
+import json
+import os
+
+from app.journal import StudentJournal
+
+
+def _etudiant(i):
+    return {'nom': f'Etudiant {i}', 'wallet_address': f'0x{i:040x}'}
+
+
+def _reload(path, **kwargs):
+    journal = StudentJournal(str(path), **kwargs)
+    journal.load()
+    return journal
+
+
+def _write_lines(path, records):
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+
+
+def test_operations_replayed_after_restart(tmp_path):
+    path = tmp_path / 'etudiants.json'
+    journal = _reload(path)
+    for i in range(3):
+        journal.add(_etudiant(i))
+    assert journal.delete(1) == _etudiant(1)
+    journal.close()
+
+    assert _reload(path).etudiants == [_etudiant(0), _etudiant(2)]
+
+
+def test_compaction_folds_log_into_snapshot(tmp_path):
+    path = tmp_path / 'etudiants.json'
+    journal = _reload(path, compact_threshold=10 ** 6)
+    for i in range(5):
+        journal.add(_etudiant(i))
+
+    journal.compact()
+    journal.add(_etudiant(5))
+    journal.close()
+
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == [_etudiant(i) for i in range(5)]
+    assert not os.path.exists(f'{path}.old')
+    assert not os.path.exists(f'{path}.tmp')
+    # Seule l'opération postérieure à la compaction reste dans le journal
+    with open(f'{path}.log', encoding='utf-8') as f:
+        assert [json.loads(line) for line in f] == [{'op': 'add', 'etudiant': _etudiant(5)}]
+    assert _reload(path).etudiants == [_etudiant(i) for i in range(6)]
+
+
+def test_torn_last_line_ignored_and_truncated(tmp_path):
+    path = tmp_path / 'etudiants.json'
+    _write_lines(f'{path}.log', [{'op': 'add', 'etudiant': _etudiant(0)}])
+    with open(f'{path}.log', 'a', encoding='utf-8') as f:
+        f.write('{"op": "add", "etudiant": {"nom": "Etu')
+
+    journal = _reload(path)
+    journal.add(_etudiant(1))
+    journal.close()
+
+    assert _reload(path).etudiants == [_etudiant(0), _etudiant(1)]
+
+
+def test_recovery_when_crash_before_old_log_removed(tmp_path):
+    # Instantané temporaire peut-être incomplet: ignoré, l'ancien journal est rejoué
+    path = tmp_path / 'etudiants.json'
+    path.write_text(json.dumps([_etudiant(0)]), encoding='utf-8')
+    _write_lines(f'{path}.old', [{'op': 'add', 'etudiant': _etudiant(1)}])
+    with open(f'{path}.tmp', 'w', encoding='utf-8') as f:
+        f.write('[{"nom": "Etu')
+    _write_lines(f'{path}.log', [{'op': 'add', 'etudiant': _etudiant(2)}])
+
+    journal = _reload(path)
+    journal.close()
+
+    assert journal.etudiants == [_etudiant(0), _etudiant(1), _etudiant(2)]
+    assert not os.path.exists(f'{path}.old')
+    assert not os.path.exists(f'{path}.tmp')
+    with open(path, encoding='utf-8') as f:
+        assert json.load(f) == [_etudiant(0), _etudiant(1)]
+
+
+def test_recovery_when_crash_before_snapshot_renamed(tmp_path):
+    # Ancien journal déjà supprimé: l'instantané temporaire est complet
+    path = tmp_path / 'etudiants.json'
+    path.write_text(json.dumps([_etudiant(0)]), encoding='utf-8')
+    (tmp_path / 'etudiants.json.tmp').write_text(json.dumps([_etudiant(0), _etudiant(1)]), encoding='utf-8')
+    _write_lines(f'{path}.log', [{'op': 'delete', 'index': 0}])
+
+    journal = _reload(path)
+    journal.close()
+
+    assert journal.etudiants == [_etudiant(1)]
+    assert not os.path.exists(f'{path}.tmp')
+
+
+def test_failed_load_keeps_log_open_and_state_unchanged(tmp_path):
+    path = tmp_path / 'etudiants.json'
+    journal = _reload(path)
+    journal.add(_etudiant(0))
+    path.write_text('[{"nom": ', encoding='utf-8')
+
+    try:
+        journal.load()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError('instantané corrompu accepté')
+
+    assert journal.etudiants == [_etudiant(0)]
+    journal.add(_etudiant(1))
+    journal.close()
+    with open(f'{path}.log', encoding='utf-8') as f:
+        assert [json.loads(line)['etudiant'] for line in f] == [_etudiant(0), _etudiant(1)]
@@ -0,0 +1,101 @@
+import threading
+from types import SimpleNamespace
+
+from hexbytes import HexBytes
+
+from app.blockchain_nft import BlockchainNFT
+from app.nonce_manager import NonceManager
+
+GAS_PER_DIPLOMA = 100000
+
+
+class FakeCall:
+    def __init__(self, count):
+        self.count = count
+
+    def estimate_gas(self, params):
+        return GAS_PER_DIPLOMA * self.count
+
+    def build_transaction(self, params):
+        return dict(params, count=self.count)
+
+
+class FakeChain:
+    """Mine chaque lot envoyé et émet un DiplomaMinted par diplôme"""
+
+    def __init__(self):
+        self.next_token = 0
+        self.batches = []
+        self.receipts = {}
+
+    def send(self, tx):
+        tx_hash = HexBytes(bytes([len(self.batches) + 1]) * 32)
+        self.batches.append(tx['count'])
+        tokens = list(range(self.next_token, self.next_token + tx['count']))
+        self.next_token += tx['count']
+        self.receipts[tx_hash] = {'status': 1, 'gasUsed': tx['gas'], 'blockNumber': 10, 'tokens': tokens}
+        return tx_hash
+
+    def track(self, tx_hash):
+        done = threading.Event()
+        done.set()
+        return SimpleNamespace(done=done, receipt=self.receipts[tx_hash])
+
+    def process_receipt(self, receipt, errors=None):
+        return [{'args': {'tokenId': token}} for token in receipt['tokens']]
+
+
+def _client(chain):
+    w3 = SimpleNamespace(
+        is_address=lambda address: address.startswith('0x') and len(address) == 42,
+        eth=SimpleNamespace(get_block=lambda block: {'gasLimit': 1000000},
+                            get_transaction_count=lambda address, block: 0)
+    )
+    client = object.__new__(BlockchainNFT)
+    client.w3 = w3
+    client.chain_id = 80002
+    client.owner_account = SimpleNamespace(address='0x' + '2' * 40)
+    client.nonce_manager = NonceManager(w3, client.owner_account.address)
+    client.contract = SimpleNamespace(
+        functions=SimpleNamespace(batchMintDiploma=lambda addresses, *fields: FakeCall(len(addresses))),
+        events=SimpleNamespace(DiplomaMinted=lambda: SimpleNamespace(process_receipt=chain.process_receipt))
+    )
+    client.receipt_tracker = SimpleNamespace(track=chain.track)
+    client.cache = SimpleNamespace(invalidate_total_supply=lambda: None)
+    client._fee_params = lambda: {}
+
+    def send_transaction(tx):
+        return chain.send(tx), client.nonce_manager.allocate()
+    client._send_transaction = send_transaction
+    return client
+
+
+def _diploma(i):
+    return {
+        'student_address': f'0x{i:040x}',
+        'ipfs_uri': f'ipfs://meta{i}',
+        'student_name': f'Etudiant {i}',
+        'degree_type': 'Master',
+        'institution': 'Université'
+    }
+
+
+def test_mint_batch_splits_chunks_to_fit_block_gas_budget():
+    chain = FakeChain()
+    client = _client(chain)
+    diplomas = [_diploma(i) for i in range(1, 12)]
+    diplomas.insert(3, dict(_diploma(99), student_address='invalide'))
+
+    result = client.mint_batch(diplomas, max_per_tx=10, block_gas_fraction=0.5)
+
+    # 10 diplômes dépassent 50% du bloc: lots de 5 (le dernier avec le reste)
+    assert chain.batches == [5, 5, 1]
+    assert result['transactions'] == 3
+    assert result['minted'] == 11
+    assert result['success'] is False
+    assert result['results'][3] == {'success': False, 'error': 'Adresse étudiante invalide.'}
+
+    # Chaque token revient au diplôme qui l'a produit, dans l'ordre de la promotion
+    tokens = [r['token_id'] for r in result['results'] if r['success']]
+    assert tokens == list(range(11))
+    assert client.nonce_manager._in_flight == set()
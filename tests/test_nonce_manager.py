@@ -0,0 +1,113 @@
+from types import SimpleNamespace
+
+from hexbytes import HexBytes
+
+from app.blockchain_nft import BlockchainNFT
+from app.nonce_manager import NonceManager
+
+
+class FakeEth:
+    def __init__(self, chain_nonce=5):
+        self.chain_nonce = chain_nonce
+        self.errors = []
+        self.sent = []
+        self.account = SimpleNamespace(
+            sign_transaction=lambda tx, key: SimpleNamespace(raw_transaction=tx['nonce'],
+                                                             hash=bytes([tx['nonce']]) * 32)
+        )
+
+    def get_transaction_count(self, address, block):
+        return self.chain_nonce
+
+    def send_raw_transaction(self, raw_tx):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(raw_tx)
+        return HexBytes(bytes([raw_tx]) * 32)
+
+
+class FakeW3:
+    def __init__(self, chain_nonce=5):
+        self.eth = FakeEth(chain_nonce)
+
+    def is_address(self, address):
+        return True
+
+
+def _client(w3):
+    client = object.__new__(BlockchainNFT)
+    client.w3 = w3
+    client.owner_private_key = '0x' + '1' * 64
+    client.owner_account = SimpleNamespace(address='0x' + '2' * 40)
+    client.chain_id = 80002
+    client.nonce_manager = NonceManager(w3, client.owner_account.address)
+    return client
+
+
+def test_nonce_released_after_failed_broadcast_is_reused():
+    w3 = FakeW3(chain_nonce=5)
+    client = _client(w3)
+    w3.eth.errors = [ConnectionError('RPC indisponible')]
+
+    try:
+        client._send_transaction({'nonce': 0})
+    except ConnectionError:
+        pass
+
+    # La transaction n'a jamais été diffusée: le nonce 5 est réattribué, sans trou
+    tx_hash, nonce = client._send_transaction({'nonce': 0})
+    assert nonce == 5
+    assert w3.eth.sent == [5]
+    assert client.nonce_manager._in_flight == {5}
+
+
+def test_nonce_error_resyncs_instead_of_reusing():
+    w3 = FakeW3(chain_nonce=5)
+    client = _client(w3)
+    client.nonce_manager.allocate()
+    client.nonce_manager.done(5)
+
+    # Nonce 6 déjà consommé par un autre processus: la chaîne est relue
+    w3.eth.chain_nonce = 8
+    w3.eth.errors = [ValueError('nonce too low')]
+    tx_hash, nonce = client._send_transaction({'nonce': 0})
+    assert nonce == 8
+    assert w3.eth.sent == [8]
+
+
+def test_already_known_transaction_is_not_sent_again():
+    w3 = FakeW3(chain_nonce=5)
+    client = _client(w3)
+    # Réponse perdue puis renvoi de la même transaction signée
+    w3.eth.errors = [ValueError({'code': -32000, 'message': 'already known'})]
+
+    tx_hash, nonce = client._send_transaction({'nonce': 0})
+
+    assert (tx_hash, nonce) == (HexBytes(bytes([5]) * 32), 5)
+    assert w3.eth.sent == []
+    assert client.nonce_manager.allocate() == 6
+
+
+def test_failing_tx_sent_callback_does_not_leak_nonce():
+    w3 = FakeW3(chain_nonce=5)
+    client = _client(w3)
+    call = SimpleNamespace(build_transaction=lambda params: dict(params))
+    client.contract = SimpleNamespace(functions=SimpleNamespace(mintDiploma=lambda *args: call))
+    client.gas_model = SimpleNamespace(gas_limit=lambda call, args, sender: 200000)
+    client._fee_params = lambda: {}
+    client._explain_error = lambda e: str(e)
+    client.wait_for_mint = lambda tx_hash: {'success': True, 'token_id': 1}
+
+    def on_tx_sent(tx_hash):
+        raise RuntimeError('database is locked')
+
+    result = client.mint_diploma('0x' + '3' * 40, 'ipfs://meta', 'Marie Dupont', 'Master',
+                                 'Université', on_tx_sent=on_tx_sent)
+
+    # Transaction diffusée: le job garde son hash et attendra le receipt
+    assert result['success'] is False
+    assert result['pending'] is True
+    assert result['tx_hash'] == '0x' + '05' * 32
+    assert client.nonce_manager._in_flight == set()
+    # Le nonce diffusé n'est pas réattribué
+    assert client.nonce_manager.allocate() == 6
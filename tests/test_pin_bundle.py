@@ -0,0 +1,77 @@
+import threading
+
+import pytest
+
+from app.cid import compute_file_cid
+from app.ipfs_service import BaseIPFSService
+
+
+class FakeBackend(BaseIPFSService):
+    """Backend dont l'upload du PDF attend que celui des métadonnées ait commencé"""
+
+    name = 'fake'
+
+    def __init__(self, pdf_hash=None):
+        super().__init__('https://gateway/ipfs/')
+        self.pdf_hash = pdf_hash
+        self.metadata_started = threading.Event()
+        self.overlapped = False
+        self.metadata = []
+
+    def _pin_file(self, file_path, file_name):
+        self.overlapped = self.metadata_started.wait(5)
+        return self._result(self.pdf_hash or compute_file_cid(file_path), 10, 'now')
+
+    def _pin_json(self, metadata, name):
+        self.metadata_started.set()
+        self.metadata.append(metadata)
+        return self._result(f'bafymeta{len(self.metadata)}', 5, 'now')
+
+    def list_pins(self, page_size=1000):
+        return iter(())
+
+
+def _template(pdf_url):
+    return {'name': 'Diplôme Master - Dupont Marie', 'image': pdf_url}
+
+
+def test_pdf_and_metadata_pinned_concurrently(tmp_path):
+    path = tmp_path / 'diplome.pdf'
+    path.write_bytes(b'%PDF-1.4 diplome')
+    cid = compute_file_cid(str(path))
+    backend = FakeBackend()
+
+    bundle = backend.pin_diploma_bundle(str(path), 'diplome.pdf', _template)
+
+    assert bundle['success'] is True
+    assert backend.overlapped is True
+    # Les métadonnées pointent vers le CID calculé localement avant la réponse du PDF
+    assert backend.metadata == [_template(f'https://gateway/ipfs/{cid}')]
+    assert bundle['pdf']['ipfs_hash'] == cid
+    assert bundle['metadata']['ipfs_hash'] == 'bafymeta1'
+
+
+def test_metadata_repinned_when_remote_cid_differs(tmp_path):
+    path = tmp_path / 'diplome.pdf'
+    path.write_bytes(b'%PDF-1.4 diplome')
+    backend = FakeBackend(pdf_hash='bafyautre')
+
+    bundle = backend.pin_diploma_bundle(str(path), 'diplome.pdf', _template)
+
+    assert bundle['success'] is True
+    assert backend.metadata[-1] == _template('https://gateway/ipfs/bafyautre')
+    assert bundle['metadata']['ipfs_hash'] == 'bafymeta2'
+
+
+def test_backend_without_list_pins_cannot_be_instantiated():
+    class Incomplete(BaseIPFSService):
+        name = 'incomplet'
+
+        def _pin_file(self, file_path, file_name):
+            pass
+
+        def _pin_json(self, metadata, name):
+            pass
+
+    with pytest.raises(TypeError):
+        Incomplete('https://gateway/ipfs/')
@@ -0,0 +1,140 @@
+import contextlib
+import json
+import os
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+from app.pin_index import PinIndex
+from app.storage_backends import KuboIPFSService
+
+
+def _pin_diploma(flask_app, tmp_path, name='diplome.pdf', token_id=0, indexed=True):
+    """PDF et métadonnées épinglés, puis mintés sans passer par la file de jobs"""
+    ipfs_service = flask_app.extensions['ipfs_service']
+    path = tmp_path / name
+    path.write_bytes(b'%PDF-1.4 ' + name.encode())
+    pdf = ipfs_service.upload_file(str(path), name)
+    metadata = ipfs_service.upload_metadata({'name': 'Diplôme Master - Dupont Marie', 'image': pdf['url']})
+
+    # Diplôme connu de l'index par son seul événement DiplomaMinted (URLs NULL)
+    if indexed:
+        flask_app.extensions['diploma_index'].apply_events(
+            [{'token_id': token_id, 'wallet_address': '0x' + '1' * 40, 'student_name': 'Dupont Marie',
+              'tx_hash': '0x' + 'ab' * 32, 'block_number': 10}],
+            [], 10, 'test'
+        )
+    return ipfs_service, pdf, metadata
+
+
+def _blockchain(token_uris, total_supply=None):
+    def get_total_supply():
+        if total_supply is False:
+            return {'success': False, 'error': 'connexion refusée'}
+        return {'success': True, 'total_supply': len(token_uris) if total_supply is None else total_supply}
+
+    def get_token_uri(token_id):
+        if token_id not in token_uris:
+            return {'success': False, 'error': 'execution reverted'}
+        return {'success': True, 'token_uri': token_uris[token_id]}
+
+    client = SimpleNamespace(get_total_supply=get_total_supply, get_token_uri=get_token_uri)
+    return SimpleNamespace(get=lambda: client)
+
+
+def _reconcile(flask_app, *args):
+    return flask_app.test_cli_runner().invoke(args=['pins', 'reconcile', '--min-age-hours', '0', *args])
+
+
+def test_reconcile_keeps_pins_of_diplomas_indexed_from_events(flask_app, tmp_path):
+    ipfs_service, pdf, metadata = _pin_diploma(flask_app, tmp_path)
+    flask_app.extensions['blockchain_nft'] = _blockchain({0: f"ipfs://{metadata['ipfs_hash']}"})
+
+    result = _reconcile(flask_app, '--apply')
+
+    assert result.exit_code == 0, result.output
+    assert '0 orphelins' in result.output
+    assert os.path.exists(ipfs_service.path(pdf['ipfs_hash']))
+    assert os.path.exists(ipfs_service.path(metadata['ipfs_hash']))
+    assert sorted(flask_app.extensions['diploma_index'].ipfs_references()) == sorted(
+        [pdf['url'], f"ipfs://{metadata['ipfs_hash']}"])
+
+
+def test_reconcile_keeps_pins_of_diplomas_minted_before_the_index(flask_app, tmp_path):
+    # Token 0 minté avant le premier bloc indexé: absent de l'index, présent on-chain
+    ipfs_service, old_pdf, old_metadata = _pin_diploma(flask_app, tmp_path, 'ancien.pdf', indexed=False)
+    _, pdf, metadata = _pin_diploma(flask_app, tmp_path, 'recent.pdf', token_id=1)
+    _, orphan, _ = _pin_diploma(flask_app, tmp_path, 'orphelin.pdf', indexed=False)
+    flask_app.extensions['blockchain_nft'] = _blockchain({0: old_metadata['url'], 1: metadata['url']})
+
+    result = _reconcile(flask_app, '--apply')
+
+    assert result.exit_code == 0, result.output
+    for pin in (old_pdf, old_metadata, pdf, metadata):
+        assert os.path.exists(ipfs_service.path(pin['ipfs_hash']))
+    assert not os.path.exists(ipfs_service.path(orphan['ipfs_hash']))
+
+
+def test_reconcile_only_lists_orphans_by_default(flask_app, tmp_path):
+    ipfs_service, pdf, metadata = _pin_diploma(flask_app, tmp_path, indexed=False)
+    flask_app.extensions['blockchain_nft'] = _blockchain({})
+
+    result = _reconcile(flask_app)
+
+    assert result.exit_code == 0, result.output
+    assert '2 orphelins' in result.output and 'simulation' in result.output
+    assert os.path.exists(ipfs_service.path(pdf['ipfs_hash']))
+    assert os.path.exists(ipfs_service.path(metadata['ipfs_hash']))
+
+
+def test_reconcile_refuses_to_run_with_unresolved_diplomas(flask_app, tmp_path):
+    ipfs_service, pdf, metadata = _pin_diploma(flask_app, tmp_path)
+    flask_app.extensions['blockchain_nft'] = _blockchain({}, total_supply=1)
+
+    result = _reconcile(flask_app, '--apply')
+
+    assert result.exit_code == 1
+    assert 'Diplôme #0' in result.output
+    assert os.path.exists(ipfs_service.path(pdf['ipfs_hash']))
+    assert os.path.exists(ipfs_service.path(metadata['ipfs_hash']))
+
+
+def test_reconcile_refuses_to_run_without_total_supply(flask_app, tmp_path):
+    ipfs_service, pdf, metadata = _pin_diploma(flask_app, tmp_path, indexed=False)
+    flask_app.extensions['blockchain_nft'] = _blockchain({}, total_supply=False)
+
+    result = _reconcile(flask_app, '--apply')
+
+    assert result.exit_code == 1
+    assert 'totalSupply' in result.output
+    assert os.path.exists(ipfs_service.path(pdf['ipfs_hash']))
+
+
+class FakeKubo:
+    def __init__(self, lines):
+        self.lines = lines
+        self.calls = []
+
+    @contextlib.contextmanager
+    def post(self, url, params, stream, timeout):
+        self.calls.append((url, params))
+        yield SimpleNamespace(status_code=200, iter_lines=lambda: iter(self.lines))
+
+
+def test_kubo_lists_recursive_pins_with_local_metadata(tmp_path):
+    index = PinIndex(str(tmp_path / 'pins.db'))
+    index.add('bafyapp', {'ipfs_hash': 'bafyapp', 'size': 16, 'timestamp': '2024-01-02T03:04:05+00:00'},
+              'diplome.pdf', 'diploma')
+    service = KuboIPFSService('http://127.0.0.1:5001', 'https://gateway/ipfs/', pin_index=index)
+    service.session = FakeKubo([
+        json.dumps({'Cid': 'bafyapp', 'Type': 'recursive'}).encode(),
+        b'',
+        json.dumps({'Cid': 'bafyautre', 'Type': 'recursive'}).encode()
+    ])
+
+    pins = list(service.list_pins())
+
+    assert service.session.calls == [('http://127.0.0.1:5001/api/v0/pin/ls', {'type': 'recursive', 'stream': 'true'})]
+    assert pins[0] == {'ipfs_hash': 'bafyapp', 'size': 16, 'name': 'diplome.pdf', 'kind': 'diploma',
+                       'date_pinned': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)}
+    # Pin inconnu de l'application: sans type, jamais candidat à la suppression
+    assert pins[1]['kind'] is None
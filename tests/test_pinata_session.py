@@ -0,0 +1,67 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.ipfs_service import IPFSService, MultipartFileBody
+
+
+@pytest.fixture
+def pinata():
+    """Faux Pinata: répond 503 à la première requête, puis 200"""
+    bodies = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            bodies.append(self.rfile.read(int(self.headers['Content-Length'])))
+            if len(bodies) == 1:
+                self.send_response(503)
+                self.send_header('Retry-After', '0')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            payload = json.dumps({'IpfsHash': 'bafytest', 'PinSize': 42, 'Timestamp': 'now'}).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f'http://127.0.0.1:{server.server_port}', bodies
+    server.shutdown()
+    server.server_close()
+
+
+def test_multipart_body_is_reiterable_with_known_length(tmp_path):
+    path = tmp_path / 'diplome.pdf'
+    path.write_bytes(b'%PDF' + b'x' * 200000)
+    body = MultipartFileBody({'pinataOptions': '{}'}, 'file', 'diplome.pdf', str(path), block_size=4096)
+
+    first = b''.join(body)
+    assert first == b''.join(body)
+    assert len(first) == len(body)
+    assert b'x' * 200000 in first
+
+
+def test_file_upload_retried_on_server_error(pinata, tmp_path):
+    url, bodies = pinata
+    path = tmp_path / 'diplome.pdf'
+    path.write_bytes(b'%PDF' + b'y' * 100000)
+
+    service = IPFSService(None, None, 'jwt', max_retries=2, backoff_factor=0)
+    service.pinata_api_url = url
+    result = service._pin_file(str(path), 'diplome.pdf')
+
+    assert result['success'] is True
+    assert result['ipfs_hash'] == 'bafytest'
+    # Le corps complet est renvoyé à la nouvelle tentative
+    assert len(bodies) == 2
+    assert bodies[0] == bodies[1]
+    assert b'y' * 100000 in bodies[1]
@@ -0,0 +1,91 @@
+import threading
+
+from app.receipt_tracker import ReceiptTracker
+
+TX = ['0x' + c * 64 for c in 'abc']
+
+
+class FakeResponse:
+    def __init__(self, body):
+        self.body = body
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.body
+
+
+class FakeNode:
+    """Nœud JSON-RPC minimal: numéro de bloc et receipts des transactions minées"""
+
+    def __init__(self):
+        self.block = 16
+        self.mined = {}
+        self.requests = []
+
+    def post(self, url, json, timeout):
+        self.requests.append([call['method'] for call in json])
+        results = []
+        for call in json:
+            if call['method'] == 'eth_blockNumber':
+                result = hex(self.block)
+            else:
+                result = self.mined.get(call['params'][0])
+            results.append({'jsonrpc': '2.0', 'id': call['id'], 'result': result})
+        return FakeResponse(results)
+
+    def mine(self, tx_hash):
+        self.mined[tx_hash] = {
+            'transactionHash': tx_hash,
+            'blockNumber': hex(self.block),
+            'status': '0x1',
+            'gasUsed': '0x5208',
+            'logs': []
+        }
+
+
+def _tracker(node):
+    tracker = ReceiptTracker('http://node', session=node)
+    # Les polls sont déclenchés par le test, pas par le thread de fond
+    tracker._thread = threading.current_thread()
+    return tracker
+
+
+def test_one_batch_per_new_block_for_all_pending_receipts():
+    node = FakeNode()
+    tracker = _tracker(node)
+    received = []
+    entries = [tracker.track(tx_hash, callback=received.append) for tx_hash in TX]
+    node.mine(TX[0])
+
+    tracker._poll()
+    assert node.requests == [['eth_blockNumber'], ['eth_getTransactionReceipt'] * 3]
+    assert entries[0].done.is_set() and entries[0].receipt['blockNumber'] == 16
+    assert tracker.pending_count() == 2
+
+    # Même bloc, aucune nouvelle transaction: seul eth_blockNumber est appelé
+    node.requests.clear()
+    tracker._poll()
+    assert node.requests == [['eth_blockNumber']]
+
+    # Nouveau bloc: les deux transactions restantes dans un seul batch
+    node.block = 17
+    node.mine(TX[1])
+    node.mine(TX[2])
+    node.requests.clear()
+    tracker._poll()
+    assert node.requests == [['eth_blockNumber'], ['eth_getTransactionReceipt'] * 2]
+    assert tracker.pending_count() == 0
+    assert [receipt['status'] for receipt in received] == [1, 1, 1]
+
+
+def test_expired_transaction_resolves_to_none():
+    node = FakeNode()
+    tracker = _tracker(node)
+    entry = tracker.track(TX[0], timeout=0)
+
+    tracker._poll()
+    assert entry.done.is_set()
+    assert entry.receipt is None
+    assert tracker.pending_count() == 0
@@ -0,0 +1,27 @@
+import threading
+
+import app.blockchain_nft as blockchain_nft
+from app.blockchain_nft import SharedBlockchainNFT
+
+
+def test_client_created_once_on_first_use(monkeypatch):
+    created = []
+
+    class FakeClient:
+        def __init__(self, config):
+            created.append(config)
+
+    monkeypatch.setattr(blockchain_nft, 'BlockchainNFT', FakeClient)
+    shared = SharedBlockchainNFT({'RPC_URL': 'http://node'})
+    # Aucune connexion RPC au démarrage de l'application
+    assert created == []
+
+    clients = []
+    threads = [threading.Thread(target=lambda: clients.append(shared.get())) for _ in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(created) == 1
+    assert all(client is clients[0] for client in clients)
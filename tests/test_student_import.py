@@ -0,0 +1,116 @@
+import io
+import sqlite3
+
+import pytest
+
+from app import blockchain
+from app.student_import import import_students, read_rows
+
+
+def test_students_db_created_by_create_app_at_configured_path(flask_app, tmp_path):
+    assert flask_app.extensions['students'].db_path == str(tmp_path / 'students.db')
+    # Chemin tenu par le gestionnaire: le défaut du module n'est pas modifié
+    assert blockchain.DB_PATH != str(tmp_path / 'students.db')
+    conn = sqlite3.connect(str(tmp_path / 'students.db'))
+    columns = [row[1] for row in conn.execute('PRAGMA table_info(students)')]
+    conn.close()
+    assert {'adresse', 'moyenne', 'mention', 'email'} <= set(columns)
+
+
+def _adresse(i):
+    return f'0x{i:040x}'
+
+
+def _csv(tmp_path, lines):
+    path = tmp_path / 'etudiants.csv'
+    path.write_text('adresse;nom;prenom;email;moyenne\n' +
+                    ''.join(f'{adresse};Nom;Prenom;etu@univ.fr;{moyenne}\n' for adresse, moyenne in lines),
+                    encoding='utf-8')
+    return path
+
+
+def test_duplicates_rejected_across_batches_and_against_existing_rows(flask_app, tmp_path):
+    flask_app.extensions['students'].add_student(_adresse(1), 'Déjà', 'Inscrit', '2000-01-01', 11)
+    # Lots de 2: les doublons tombent dans des lots différents
+    path = _csv(tmp_path, [(_adresse(2), '12'), (_adresse(3), '13'), (_adresse(1), '14'),
+                           (_adresse(4), '15'), (_adresse(2), '16'), (_adresse(5), '21')])
+
+    events = list(import_students(read_rows(str(path), 'csv'), batch_size=2,
+                                  db_path=flask_app.extensions['students'].db_path))
+
+    errors = {event['line']: event['error'] for event in events if 'error' in event}
+    assert sorted(errors) == [4, 6, 7]
+    assert 'existe déjà' in errors[4] and 'double' in errors[6]
+    assert events[-1] == {'done': True, 'success': True, 'imported': 3, 'rejected': 3}
+    students, _ = flask_app.extensions['students'].page_students(limit=10)
+    assert [(s['adresse'], s['moyenneGenerale']) for s in students] == [
+        (_adresse(1), 11), (_adresse(2), 12), (_adresse(3), 13), (_adresse(4), 15)]
+
+
+def test_import_committed_before_report_is_sent(flask_app, tmp_path):
+    # Ligne rejetée en tête: le bilan commence avant la fin de la lecture du fichier
+    path = _csv(tmp_path, [('0xinvalide', '12')] + [(_adresse(i), '12') for i in range(1, 6)])
+    client = flask_app.test_client()
+
+    with open(path, 'rb') as f:
+        response = client.post('/api/students/import', data={'fichier': (f, 'etudiants.csv')},
+                               buffered=False)
+    # Bilan pas encore lu: l'import est déjà visible depuis une autre connexion
+    conn = sqlite3.connect(str(tmp_path / 'students.db'))
+    assert conn.execute('SELECT COUNT(*) FROM students').fetchone()[0] == 5
+    conn.close()
+    response.close()
+
+
+def test_imported_students_listed_by_page(flask_app, tmp_path):
+    path = _csv(tmp_path, [(_adresse(i), '12') for i in range(1, 6)])
+    client = flask_app.test_client()
+    with open(path, 'rb') as f:
+        client.post('/api/students/import', data={'fichier': (f, 'etudiants.csv')})
+
+    first = client.get('/api/students?limit=3').get_json()
+    second = client.get(first['next_url']).get_json()
+
+    assert [s['adresse'] for s in first['students'] + second['students']] == [_adresse(i) for i in range(1, 6)]
+    assert second['next_after'] is None
+    assert first['students'][0]['mention'] and first['students'][0]['email'] == 'etu@univ.fr'
+
+
+def test_duplicates_detected_whatever_the_case(flask_app, tmp_path):
+    adresse = '0x' + 'ab' * 20
+    flask_app.extensions['students'].add_student(adresse.upper().replace('0X', '0x'), 'Déjà', 'Inscrit',
+                                                 '2000-01-01', 11)
+    other = '0x' + 'cd' * 20
+    path = _csv(tmp_path, [(adresse, '12'), (other, '13'), (other.upper().replace('0X', '0x'), '14')])
+
+    events = list(import_students(read_rows(str(path), 'csv'),
+                                  db_path=flask_app.extensions['students'].db_path))
+
+    errors = {event['line']: event['error'] for event in events if 'error' in event}
+    assert sorted(errors) == [2, 4]
+    assert 'existe déjà' in errors[2] and 'double' in errors[4]
+    assert events[-1]['imported'] == 1
+
+
+def _upload(client, content, filename):
+    return client.post('/api/students/import', data={'fichier': (io.BytesIO(content), filename)})
+
+
+@pytest.mark.parametrize('content, filename', [
+    (b'pas un classeur', 'etudiants.xlsx'),
+    ('adresse;nom;prenom;email;moyenne\n'.encode() + b'0x\xe9\xff;Nom;P;etu@univ.fr;12\n', 'etudiants.csv'),
+    # Lignes valides puis champ au-delà de csv.field_size_limit(): rien n'est importé
+    (b'adresse;nom;prenom;email;moyenne\n' +
+     b''.join(b'0x%040x;Nom;P;etu@univ.fr;12\n' % i for i in range(1, 200)) +
+     b'0x;' + b'N' * 200000 + b';P;etu@univ.fr;12\n', 'etudiants.csv'),
+], ids=['zip', 'encodage', 'champ'])
+def test_unreadable_upload_rejected_with_400(flask_app, content, filename):
+    if filename.endswith('.xlsx'):
+        pytest.importorskip('openpyxl')
+    client = flask_app.test_client()
+
+    response = _upload(client, content, filename)
+
+    assert response.status_code == 400, response.get_data(as_text=True)
+    assert response.get_json()['success'] is False
+    assert flask_app.extensions['students'].page_students()[0] == []
@@ -0,0 +1,71 @@
+import io
+import json
+import os
+
+import pytest
+from flask import Flask, jsonify, request
+
+from app.cid import compute_cid
+from app.uploads import DiplomaRequest, StreamedUpload
+
+
+@pytest.fixture
+def client(tmp_path):
+    app = Flask(__name__)
+    app.config.update(UPLOAD_FOLDER=str(tmp_path), MAX_FILE_SIZE=1024 * 1024, TESTING=True)
+    app.request_class = type('UploadRequest', (DiplomaRequest,), {'streamed_endpoints': ('upload',)})
+
+    @app.route('/upload', methods=['POST'])
+    def upload():
+        stream = request.files['pdf'].stream
+        assert isinstance(stream, StreamedUpload)
+        stream.keep(os.path.join(str(tmp_path), 'diplome.pdf'))
+        return jsonify(cid=stream.cid, size=stream.size)
+
+    return app.test_client()
+
+
+def test_upload_written_once_with_cid_computed_on_the_fly(client, tmp_path):
+    content = b'%PDF-1.4 ' + os.urandom(600 * 1024)
+    response = client.post('/upload', data={'pdf': (io.BytesIO(content), 'diplome.pdf')},
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 200
+    assert response.json == {'cid': compute_cid(content), 'size': len(content)}
+    # Seul le fichier conservé reste dans le dossier: pas de copie temporaire
+    assert os.listdir(tmp_path) == ['diplome.pdf']
+    assert (tmp_path / 'diplome.pdf').read_bytes() == content
+
+
+def test_oversized_upload_rejected_without_leftover(client, tmp_path):
+    content = b'0' * (2 * 1024 * 1024)
+    response = client.post('/upload', data={'pdf': (io.BytesIO(content), 'gros.pdf')},
+                           content_type='multipart/form-data')
+
+    assert response.status_code == 413
+    assert os.listdir(tmp_path) == []
+
+
+def _import(client, content):
+    return client.post('/api/students/import', data={'fichier': (io.BytesIO(content), 'etudiants.csv')},
+                       content_type='multipart/form-data')
+
+
+def test_import_files_not_bound_by_diploma_upload_limit(flask_app):
+    flask_app.config['MAX_FILE_SIZE'] = 100
+    lines = ''.join(f'0x{i:040x};Nom;Prenom;etu@univ.fr;12\n' for i in range(1, 50))
+    content = ('adresse;nom;prenom;email;moyenne\n' + lines).encode()
+
+    response = _import(flask_app.test_client(), content)
+
+    assert response.status_code == 200
+    assert json.loads(response.data.splitlines()[-1])['imported'] == 49
+
+
+def test_oversized_import_gets_json_error(flask_app):
+    flask_app.config['MAX_IMPORT_SIZE'] = 1024
+
+    response = _import(flask_app.test_client(), b'adresse;nom\n' + b'0' * 4096)
+
+    assert response.status_code == 413
+    assert response.get_json()['success'] is False